@@ -2,13 +2,18 @@ from flask import Flask
 from .config import Config
 from flask_cors import CORS
 import datetime as datetimeInstance
-from flask_jwt_extended import JWTManager
+from .utils.jwt_handler import CachingJWTManager
+from .utils.json_provider import FastJSONProvider
 
 # Initialize the Flask application
 app = Flask(__name__)
 
+if Config.JSON_PROVIDER == "fast":
+    app.json = FastJSONProvider(app)
+    app.json.rfc3339_dates = Config.JSON_DATETIME_FORMAT == "rfc3339"
+
 cors = CORS(app)
-jwt = JWTManager(app)
+jwt = CachingJWTManager(app)
 
 app.config['JWT_SECRET_KEY'] = Config.JWT_SECRET_KEY
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = datetimeInstance.timedelta(seconds=Config.JWT_EXPIRY_IN_SECONDS)
@@ -0,0 +1,228 @@
+"""
+ASGI entry point.
+
+The text generation routes run natively on the event loop (AsyncOpenAI and an async
+SQLAlchemy engine), so one worker can keep hundreds of generations in flight instead of
+one per thread. Requests still go through Flask's request context, so JWT verification,
+error handlers, `before_request`/`after_request` hooks and the JSON envelope from
+`build_success_response` are unchanged. Every other route is served by the Flask WSGI app
+in a thread pool.
+
+    uvicorn app.asgi:asgi_app --host 0.0.0.0 --port 8080
+"""
+import io
+import sys
+import asyncio
+from . import app
+from flask import request
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.routing import RequestRedirect
+from werkzeug.exceptions import HTTPException
+from app.utils.rate_limit import rate_limited
+from app.utils.metrics import stamp_request
+from app.database import init_db, dispose_async_engine
+from app.utils.api_responses import build_success_response
+from app.services.generation_service import GenerationService
+from app.utils.errors import NotFoundError, UnauthorizedError
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from app.services.generated_text_service import AsyncGeneratedTextService
+from app.schemas.text_schema import GenerateTextSchema, UpdateGeneratedTextSchema
+from app.controllers.text_generation_controller import validate_int, parse_payload, build_text_error_response
+
+wsgi_fallback = WsgiToAsgi(app)
+
+
+@rate_limited()
+async def generate_text():
+    """
+    Generate text using OpenAI and store the response.
+    """
+    data, error_response = parse_payload(GenerateTextSchema())
+
+    if error_response:
+        return error_response
+
+    try:
+        user_id = get_jwt_identity()
+        generated_response, cached = await GenerationService.generate_async(prompt=data["prompt"])
+
+        stored_data = await AsyncGeneratedTextService.store_generated_text(user_id, data["prompt"], generated_response)
+        stored_data["cached"] = cached
+
+        return build_success_response("Text generated successfully.", data=stored_data, status=201)
+
+    except Exception as e:
+        return build_text_error_response(e)
+
+
+async def get_generated_text(id):
+    """
+    Retrieve a stored generated text by ID.
+    """
+    try:
+        generated_text = await AsyncGeneratedTextService.get_text_by_id(validate_int(id), int(get_jwt_identity()))
+        return build_success_response("Generated text retrieved successfully.", data=generated_text)
+
+    except (NotFoundError, UnauthorizedError) as e:
+        return build_text_error_response(e)
+
+
+async def update_generated_text(id):
+    """
+    Update the response of a generated text record.
+    """
+    data, error_response = parse_payload(UpdateGeneratedTextSchema())
+
+    if error_response:
+        return error_response
+
+    try:
+        updated_text = await AsyncGeneratedTextService.update_text(validate_int(id), int(get_jwt_identity()), data["response"])
+        return build_success_response("Generated text updated successfully.", data=updated_text)
+
+    except (NotFoundError, UnauthorizedError) as e:
+        return build_text_error_response(e)
+
+
+async def delete_generated_text(id):
+    """
+    Delete a stored generated text record.
+    """
+    try:
+        await AsyncGeneratedTextService.delete_text(validate_int(id), int(get_jwt_identity()))
+        return build_success_response("Generated text deleted successfully.")
+
+    except (NotFoundError, UnauthorizedError) as e:
+        return build_text_error_response(e)
+
+
+# Flask endpoints served natively on the event loop; all require a JWT
+ASYNC_VIEWS = {
+    "text.generate_text": generate_text,
+    "text.get_generated_text": get_generated_text,
+    "text.update_generated_text": update_generated_text,
+    "text.delete_generated_text": delete_generated_text,
+}
+
+
+async def asgi_app(scope, receive, send):
+    """ASGI application: async text routes, WSGI fallback for everything else."""
+
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+
+    view = _match_async_view(scope) if scope["type"] == "http" else None
+
+    if view is None:
+        await wsgi_fallback(scope, receive, send)
+        return
+
+    body = await _read_body(receive)
+    response = await _dispatch(_build_environ(scope, body), view)
+
+    await send({
+        "type": "http.response.start",
+        "status": response.status_code,
+        "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in response.headers.items()]
+    })
+    await send({"type": "http.response.body", "body": response.get_data()})
+
+
+async def _dispatch(environ, view):
+    """Run an async view inside a Flask request context, mirroring `Flask.full_dispatch_request`."""
+
+    stamp_request(environ)
+
+    with app.request_context(environ):
+        try:
+            rv = app.preprocess_request()
+
+            if rv is None:
+                verify_jwt_in_request()
+                rv = await view(**request.view_args)
+
+        except Exception as e:
+            rv = app.handle_user_exception(e)
+
+        return app.process_response(app.make_response(rv))
+
+
+def _match_async_view(scope):
+    adapter = app.url_map.bind("localhost", script_name=scope.get("root_path") or None)
+
+    try:
+        endpoint, _ = adapter.match(scope["path"], method=scope["method"])
+
+    except (HTTPException, RequestRedirect):
+        return None
+
+    return ASYNC_VIEWS.get(endpoint)
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    more_body = True
+
+    while more_body:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        more_body = message.get("more_body", False)
+
+    return b"".join(chunks)
+
+
+def _build_environ(scope, body: bytes) -> dict:
+    """Build a WSGI environ for the Flask request context from an ASGI HTTP scope."""
+
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"],
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+        "CONTENT_LENGTH": str(len(body)),
+    }
+
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+            continue
+
+        if name == "CONTENT_LENGTH":
+            continue
+
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+
+    return environ
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+
+        if message["type"] == "lifespan.startup":
+            await asyncio.to_thread(init_db)
+            await send({"type": "lifespan.startup.complete"})
+
+        elif message["type"] == "lifespan.shutdown":
+            await dispose_async_engine()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
@@ -1,7 +1,6 @@
 import os
 import logging
 from dotenv import load_dotenv
-from colorlog import ColoredFormatter
 
 # Load environment variables from .env file
 load_dotenv()
@@ -11,10 +10,104 @@ APP_PORT_VAR = "APP_PORT"
 APP_HOST_VAR = "APP_HOST"
 APP_NAME_VAR = "APP_NAME"
 APP_ENV_VAR = "APP_ENV"
+APP_WORKERS_VAR = "APP_WORKERS"
+APP_THREADS_VAR = "APP_THREADS"
+APP_WORKER_TIMEOUT_VAR = "APP_WORKER_TIMEOUT"
+APP_GRACEFUL_TIMEOUT_VAR = "APP_GRACEFUL_TIMEOUT"
+APP_MAX_REQUESTS_VAR = "APP_MAX_REQUESTS"
+APP_MAX_REQUESTS_JITTER_VAR = "APP_MAX_REQUESTS_JITTER"
+APP_PRELOAD_VAR = "APP_PRELOAD"
 JWT_SECRET_KEY_VAR = "JWT_SECRET_KEY"
 DATABASE_URL_VAR = "DATABASE_URL"
+ASYNC_DATABASE_URL_VAR = "ASYNC_DATABASE_URL"
 JWT_EXPIRY_IN_SECONDS_VAR = "JWT_EXPIRY_IN_SECONDS"
+JWT_CACHE_ENABLED_VAR = "JWT_CACHE_ENABLED"
+JWT_CACHE_MAX_ENTRIES_VAR = "JWT_CACHE_MAX_ENTRIES"
 OPENAI_API_KEY_VAR = "OPENAI_API_KEY"
+OPENAI_BASE_URL_VAR = "OPENAI_BASE_URL"
+OPENAI_MODEL_VAR = "OPENAI_MODEL"
+OPENAI_MAX_CONNECTIONS_VAR = "OPENAI_MAX_CONNECTIONS"
+OPENAI_MAX_KEEPALIVE_CONNECTIONS_VAR = "OPENAI_MAX_KEEPALIVE_CONNECTIONS"
+OPENAI_KEEPALIVE_EXPIRY_VAR = "OPENAI_KEEPALIVE_EXPIRY"
+OPENAI_CONNECT_TIMEOUT_VAR = "OPENAI_CONNECT_TIMEOUT"
+OPENAI_READ_TIMEOUT_VAR = "OPENAI_READ_TIMEOUT"
+OPENAI_HTTP2_VAR = "OPENAI_HTTP2"
+OPENAI_FAKE_UPSTREAM_VAR = "OPENAI_FAKE_UPSTREAM"
+OPENAI_FAKE_LATENCY_VAR = "OPENAI_FAKE_LATENCY"
+OPENAI_FAKE_TOKENS_PER_SECOND_VAR = "OPENAI_FAKE_TOKENS_PER_SECOND"
+OPENAI_FAKE_REPLY_WORDS_VAR = "OPENAI_FAKE_REPLY_WORDS"
+OPENAI_FAKE_ERROR_RATE_VAR = "OPENAI_FAKE_ERROR_RATE"
+OPENAI_FAKE_SEED_VAR = "OPENAI_FAKE_SEED"
+REDIS_URL_VAR = "REDIS_URL"
+RESPONSE_CACHE_ENABLED_VAR = "RESPONSE_CACHE_ENABLED"
+RESPONSE_CACHE_BACKEND_VAR = "RESPONSE_CACHE_BACKEND"
+RESPONSE_CACHE_TTL_SECONDS_VAR = "RESPONSE_CACHE_TTL_SECONDS"
+RESPONSE_CACHE_MAX_BYTES_VAR = "RESPONSE_CACHE_MAX_BYTES"
+SEMANTIC_CACHE_ENABLED_VAR = "SEMANTIC_CACHE_ENABLED"
+SEMANTIC_CACHE_THRESHOLD_VAR = "SEMANTIC_CACHE_THRESHOLD"
+SEMANTIC_CACHE_DIMENSIONS_VAR = "SEMANTIC_CACHE_DIMENSIONS"
+SEMANTIC_CACHE_MAX_ENTRIES_VAR = "SEMANTIC_CACHE_MAX_ENTRIES"
+SEMANTIC_CACHE_PATH_VAR = "SEMANTIC_CACHE_PATH"
+BATCH_MAX_ITEMS_VAR = "BATCH_MAX_ITEMS"
+BATCH_MAX_CONCURRENCY_VAR = "BATCH_MAX_CONCURRENCY"
+PASSWORD_HASH_METHOD_VAR = "PASSWORD_HASH_METHOD"
+PASSWORD_HASH_POOL_VAR = "PASSWORD_HASH_POOL"
+PASSWORD_HASH_WORKERS_VAR = "PASSWORD_HASH_WORKERS"
+PASSWORD_HASH_MAX_PENDING_VAR = "PASSWORD_HASH_MAX_PENDING"
+USER_CACHE_ENABLED_VAR = "USER_CACHE_ENABLED"
+USER_CACHE_TTL_SECONDS_VAR = "USER_CACHE_TTL_SECONDS"
+USER_CACHE_MAX_ENTRIES_VAR = "USER_CACHE_MAX_ENTRIES"
+LIST_PAGE_SIZE_VAR = "LIST_PAGE_SIZE"
+LIST_MAX_PAGE_SIZE_VAR = "LIST_MAX_PAGE_SIZE"
+EXPORT_BATCH_SIZE_VAR = "EXPORT_BATCH_SIZE"
+IMPORT_BATCH_SIZE_VAR = "IMPORT_BATCH_SIZE"
+IMPORT_MAX_LINE_BYTES_VAR = "IMPORT_MAX_LINE_BYTES"
+IMPORT_MAX_ROWS_VAR = "IMPORT_MAX_ROWS"
+JOB_QUEUE_BACKEND_VAR = "JOB_QUEUE_BACKEND"
+JOB_QUEUE_WORKERS_VAR = "JOB_QUEUE_WORKERS"
+JOB_QUEUE_POLL_INTERVAL_VAR = "JOB_QUEUE_POLL_INTERVAL"
+JOB_QUEUE_LEASE_SECONDS_VAR = "JOB_QUEUE_LEASE_SECONDS"
+JOB_QUEUE_MAX_WAIT_SECONDS_VAR = "JOB_QUEUE_MAX_WAIT_SECONDS"
+RATE_LIMIT_ENABLED_VAR = "RATE_LIMIT_ENABLED"
+RATE_LIMIT_BACKEND_VAR = "RATE_LIMIT_BACKEND"
+RATE_LIMIT_REQUESTS_PER_SECOND_VAR = "RATE_LIMIT_REQUESTS_PER_SECOND"
+RATE_LIMIT_BURST_VAR = "RATE_LIMIT_BURST"
+RATE_LIMIT_TOKENS_PER_MINUTE_VAR = "RATE_LIMIT_TOKENS_PER_MINUTE"
+RATE_LIMIT_MAX_IN_FLIGHT_VAR = "RATE_LIMIT_MAX_IN_FLIGHT"
+RATE_LIMIT_COMPLETION_TOKENS_VAR = "RATE_LIMIT_COMPLETION_TOKENS"
+UPSTREAM_MAX_RETRIES_VAR = "UPSTREAM_MAX_RETRIES"
+UPSTREAM_BACKOFF_BASE_VAR = "UPSTREAM_BACKOFF_BASE"
+UPSTREAM_BACKOFF_MAX_VAR = "UPSTREAM_BACKOFF_MAX"
+UPSTREAM_CONCURRENCY_INITIAL_VAR = "UPSTREAM_CONCURRENCY_INITIAL"
+UPSTREAM_CONCURRENCY_MIN_VAR = "UPSTREAM_CONCURRENCY_MIN"
+UPSTREAM_CONCURRENCY_MAX_VAR = "UPSTREAM_CONCURRENCY_MAX"
+UPSTREAM_QUEUE_TIMEOUT_VAR = "UPSTREAM_QUEUE_TIMEOUT"
+UPSTREAM_BREAKER_FAILURE_RATE_VAR = "UPSTREAM_BREAKER_FAILURE_RATE"
+UPSTREAM_BREAKER_MIN_CALLS_VAR = "UPSTREAM_BREAKER_MIN_CALLS"
+UPSTREAM_BREAKER_WINDOW_SECONDS_VAR = "UPSTREAM_BREAKER_WINDOW_SECONDS"
+UPSTREAM_BREAKER_OPEN_SECONDS_VAR = "UPSTREAM_BREAKER_OPEN_SECONDS"
+UPSTREAM_BREAKER_HALF_OPEN_CALLS_VAR = "UPSTREAM_BREAKER_HALF_OPEN_CALLS"
+METRICS_ENABLED_VAR = "METRICS_ENABLED"
+PROFILER_ENABLED_VAR = "PROFILER_ENABLED"
+PROFILER_SAMPLE_RATE_VAR = "PROFILER_SAMPLE_RATE"
+PROFILER_INTERVAL_VAR = "PROFILER_INTERVAL"
+PROFILER_MAX_PROFILES_VAR = "PROFILER_MAX_PROFILES"
+PROFILER_ADMIN_TOKEN_VAR = "PROFILER_ADMIN_TOKEN"
+LOG_LEVEL_VAR = "LOG_LEVEL"
+JSON_PROVIDER_VAR = "JSON_PROVIDER"
+JSON_DATETIME_FORMAT_VAR = "JSON_DATETIME_FORMAT"
+COMPRESSION_ENABLED_VAR = "COMPRESSION_ENABLED"
+COMPRESSION_MIN_SIZE_VAR = "COMPRESSION_MIN_SIZE"
+COMPRESSION_ENCODINGS_VAR = "COMPRESSION_ENCODINGS"
+COMPRESSION_GZIP_LEVEL_VAR = "COMPRESSION_GZIP_LEVEL"
+COMPRESSION_BROTLI_QUALITY_VAR = "COMPRESSION_BROTLI_QUALITY"
+COMPRESSION_ZSTD_LEVEL_VAR = "COMPRESSION_ZSTD_LEVEL"
+COMPRESSION_CACHE_MAX_BYTES_VAR = "COMPRESSION_CACHE_MAX_BYTES"
+LOG_FORMAT_VAR = "LOG_FORMAT"
+LOG_ASYNC_VAR = "LOG_ASYNC"
+LOG_QUEUE_SIZE_VAR = "LOG_QUEUE_SIZE"
+LOG_ERROR_BURST_VAR = "LOG_ERROR_BURST"
+LOG_ERROR_WINDOW_SECONDS_VAR = "LOG_ERROR_WINDOW_SECONDS"
 
 # Configuration class
 class Config:
@@ -24,15 +117,154 @@ class Config:
     APP_ENV: str = os.getenv(APP_ENV_VAR)
     JWT_SECRET_KEY: str = os.getenv(JWT_SECRET_KEY_VAR)
     DATABASE_URL: str = os.getenv(DATABASE_URL_VAR)
+    ASYNC_DATABASE_URL: str = os.getenv(ASYNC_DATABASE_URL_VAR) or None
     JWT_EXPIRY_IN_SECONDS: int = int(os.getenv(JWT_EXPIRY_IN_SECONDS_VAR))
     OPENAI_API_KEY: str = os.getenv(OPENAI_API_KEY_VAR)
 
+    # Cache of verified JWTs; repeat requests with the same token skip signature checks
+    JWT_CACHE_ENABLED: bool = os.getenv(JWT_CACHE_ENABLED_VAR, "true").lower() == "true"
+    JWT_CACHE_MAX_ENTRIES: int = int(os.getenv(JWT_CACHE_MAX_ENTRIES_VAR, "10000"))
+
+    # Production server (gunicorn.conf.py)
+    APP_WORKERS: int = int(os.getenv(APP_WORKERS_VAR, str(2 * (os.cpu_count() or 1) + 1)))
+    APP_THREADS: int = int(os.getenv(APP_THREADS_VAR, "8"))
+    APP_WORKER_TIMEOUT: int = int(os.getenv(APP_WORKER_TIMEOUT_VAR, "180"))
+    APP_GRACEFUL_TIMEOUT: int = int(os.getenv(APP_GRACEFUL_TIMEOUT_VAR, "30"))
+    APP_MAX_REQUESTS: int = int(os.getenv(APP_MAX_REQUESTS_VAR, "10000"))
+    APP_MAX_REQUESTS_JITTER: int = int(os.getenv(APP_MAX_REQUESTS_JITTER_VAR, "1000"))
+    APP_PRELOAD: bool = os.getenv(APP_PRELOAD_VAR, "true").lower() == "true"
+
+    # OpenAI HTTP client tuning (optional)
+    OPENAI_BASE_URL: str = os.getenv(OPENAI_BASE_URL_VAR) or None
+    OPENAI_MODEL: str = os.getenv(OPENAI_MODEL_VAR, "gpt-4o")
+    OPENAI_MAX_CONNECTIONS: int = int(os.getenv(OPENAI_MAX_CONNECTIONS_VAR, "100"))
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv(OPENAI_MAX_KEEPALIVE_CONNECTIONS_VAR, "20"))
+    OPENAI_KEEPALIVE_EXPIRY: float = float(os.getenv(OPENAI_KEEPALIVE_EXPIRY_VAR, "30"))
+    OPENAI_CONNECT_TIMEOUT: float = float(os.getenv(OPENAI_CONNECT_TIMEOUT_VAR, "5"))
+    OPENAI_READ_TIMEOUT: float = float(os.getenv(OPENAI_READ_TIMEOUT_VAR, "120"))
+    OPENAI_HTTP2: bool = os.getenv(OPENAI_HTTP2_VAR, "false").lower() == "true"
+
+    # Built-in fake upstream (app/utils/fake_openai.py) instead of the OpenAI API; for load tests and offline work.
+    # Latency, tokens per second and reply words are numbers or specs such as "lognormal:0.2,0.5"; error rate is "429=0.02,503=0.01"
+    OPENAI_FAKE_UPSTREAM: bool = os.getenv(OPENAI_FAKE_UPSTREAM_VAR, "false").lower() == "true"
+    OPENAI_FAKE_LATENCY: str = os.getenv(OPENAI_FAKE_LATENCY_VAR, "0")
+    OPENAI_FAKE_TOKENS_PER_SECOND: str = os.getenv(OPENAI_FAKE_TOKENS_PER_SECOND_VAR) or None
+    OPENAI_FAKE_REPLY_WORDS: str = os.getenv(OPENAI_FAKE_REPLY_WORDS_VAR) or None
+    OPENAI_FAKE_ERROR_RATE: str = os.getenv(OPENAI_FAKE_ERROR_RATE_VAR) or None
+    OPENAI_FAKE_SEED: int = int(os.getenv(OPENAI_FAKE_SEED_VAR, "0"))
+
+    # Shared backends for multi-worker deployments (optional)
+    REDIS_URL: str = os.getenv(REDIS_URL_VAR, "redis://localhost:6379/0")
+
+    # Prompt-response cache
+    RESPONSE_CACHE_ENABLED: bool = os.getenv(RESPONSE_CACHE_ENABLED_VAR, "true").lower() == "true"
+    RESPONSE_CACHE_BACKEND: str = os.getenv(RESPONSE_CACHE_BACKEND_VAR, "memory")
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv(RESPONSE_CACHE_TTL_SECONDS_VAR, "3600"))
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv(RESPONSE_CACHE_MAX_BYTES_VAR, str(64 * 1024 * 1024)))
+
+    # Near-duplicate prompt cache: serves a stored response when prompt embeddings are at least THRESHOLD similar
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv(SEMANTIC_CACHE_ENABLED_VAR, "false").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv(SEMANTIC_CACHE_THRESHOLD_VAR, "0.95"))
+    SEMANTIC_CACHE_DIMENSIONS: int = int(os.getenv(SEMANTIC_CACHE_DIMENSIONS_VAR, "512"))
+    SEMANTIC_CACHE_MAX_ENTRIES: int = int(os.getenv(SEMANTIC_CACHE_MAX_ENTRIES_VAR, "100000"))
+    SEMANTIC_CACHE_PATH: str = os.getenv(SEMANTIC_CACHE_PATH_VAR, "")
+
+    # Batch generation
+    BATCH_MAX_ITEMS: int = int(os.getenv(BATCH_MAX_ITEMS_VAR, "50"))
+    BATCH_MAX_CONCURRENCY: int = int(os.getenv(BATCH_MAX_CONCURRENCY_VAR, "8"))
+
+    # Password hashing (werkzeug method string, e.g. "scrypt" or "pbkdf2:sha256:600000")
+    PASSWORD_HASH_METHOD: str = os.getenv(PASSWORD_HASH_METHOD_VAR, "scrypt")
+    PASSWORD_HASH_POOL: str = os.getenv(PASSWORD_HASH_POOL_VAR, "thread")
+    PASSWORD_HASH_WORKERS: int = int(os.getenv(PASSWORD_HASH_WORKERS_VAR, str(os.cpu_count() or 1)))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv(PASSWORD_HASH_MAX_PENDING_VAR, "32"))
+
+    # Username -> (id, password hash) lookup cache for login
+    USER_CACHE_ENABLED: bool = os.getenv(USER_CACHE_ENABLED_VAR, "true").lower() == "true"
+    USER_CACHE_TTL_SECONDS: float = float(os.getenv(USER_CACHE_TTL_SECONDS_VAR, "60"))
+    USER_CACHE_MAX_ENTRIES: int = int(os.getenv(USER_CACHE_MAX_ENTRIES_VAR, "10000"))
+
+    # History listing
+    LIST_PAGE_SIZE: int = int(os.getenv(LIST_PAGE_SIZE_VAR, "20"))
+    LIST_MAX_PAGE_SIZE: int = int(os.getenv(LIST_MAX_PAGE_SIZE_VAR, "100"))
+
+    # NDJSON export and import: rows per database round trip, the longest accepted import line, and the
+    # most lines per import, which bounds how long its transaction holds SQLite's write lock (~80 s per 1M rows)
+    EXPORT_BATCH_SIZE: int = int(os.getenv(EXPORT_BATCH_SIZE_VAR, "1000"))
+    IMPORT_BATCH_SIZE: int = int(os.getenv(IMPORT_BATCH_SIZE_VAR, "1000"))
+    IMPORT_MAX_LINE_BYTES: int = int(os.getenv(IMPORT_MAX_LINE_BYTES_VAR, str(1024 * 1024)))
+    IMPORT_MAX_ROWS: int = int(os.getenv(IMPORT_MAX_ROWS_VAR, "50000"))
+
+    # Background generation jobs
+    JOB_QUEUE_BACKEND: str = os.getenv(JOB_QUEUE_BACKEND_VAR, "database")
+    JOB_QUEUE_WORKERS: int = int(os.getenv(JOB_QUEUE_WORKERS_VAR, "4"))
+    JOB_QUEUE_POLL_INTERVAL: float = float(os.getenv(JOB_QUEUE_POLL_INTERVAL_VAR, "0.5"))
+    JOB_QUEUE_LEASE_SECONDS: int = int(os.getenv(JOB_QUEUE_LEASE_SECONDS_VAR, "600"))
+    JOB_QUEUE_MAX_WAIT_SECONDS: float = float(os.getenv(JOB_QUEUE_MAX_WAIT_SECONDS_VAR, "30"))
+
+    # Per-user limits on generation routes; 0 disables an individual limit
+    RATE_LIMIT_ENABLED: bool = os.getenv(RATE_LIMIT_ENABLED_VAR, "true").lower() == "true"
+    RATE_LIMIT_BACKEND: str = os.getenv(RATE_LIMIT_BACKEND_VAR, "memory")
+    RATE_LIMIT_REQUESTS_PER_SECOND: float = float(os.getenv(RATE_LIMIT_REQUESTS_PER_SECOND_VAR, "2"))
+    RATE_LIMIT_BURST: int = int(os.getenv(RATE_LIMIT_BURST_VAR, "10"))
+    RATE_LIMIT_TOKENS_PER_MINUTE: int = int(os.getenv(RATE_LIMIT_TOKENS_PER_MINUTE_VAR, "40000"))
+    RATE_LIMIT_MAX_IN_FLIGHT: int = int(os.getenv(RATE_LIMIT_MAX_IN_FLIGHT_VAR, "4"))
+    # Expected completion size added to every prompt's token estimate
+    RATE_LIMIT_COMPLETION_TOKENS: int = int(os.getenv(RATE_LIMIT_COMPLETION_TOKENS_VAR, "500"))
+
+    # Upstream protection: retries with backoff, adaptive concurrency limit, circuit breaker
+    UPSTREAM_MAX_RETRIES: int = int(os.getenv(UPSTREAM_MAX_RETRIES_VAR, "3"))
+    UPSTREAM_BACKOFF_BASE: float = float(os.getenv(UPSTREAM_BACKOFF_BASE_VAR, "0.5"))
+    UPSTREAM_BACKOFF_MAX: float = float(os.getenv(UPSTREAM_BACKOFF_MAX_VAR, "20"))
+    UPSTREAM_CONCURRENCY_INITIAL: int = int(os.getenv(UPSTREAM_CONCURRENCY_INITIAL_VAR, "32"))
+    UPSTREAM_CONCURRENCY_MIN: int = int(os.getenv(UPSTREAM_CONCURRENCY_MIN_VAR, "2"))
+    UPSTREAM_CONCURRENCY_MAX: int = int(os.getenv(UPSTREAM_CONCURRENCY_MAX_VAR, "256"))
+    UPSTREAM_QUEUE_TIMEOUT: float = float(os.getenv(UPSTREAM_QUEUE_TIMEOUT_VAR, "10"))
+    UPSTREAM_BREAKER_FAILURE_RATE: float = float(os.getenv(UPSTREAM_BREAKER_FAILURE_RATE_VAR, "0.5"))
+    UPSTREAM_BREAKER_MIN_CALLS: int = int(os.getenv(UPSTREAM_BREAKER_MIN_CALLS_VAR, "20"))
+    UPSTREAM_BREAKER_WINDOW_SECONDS: float = float(os.getenv(UPSTREAM_BREAKER_WINDOW_SECONDS_VAR, "30"))
+    UPSTREAM_BREAKER_OPEN_SECONDS: float = float(os.getenv(UPSTREAM_BREAKER_OPEN_SECONDS_VAR, "15"))
+    UPSTREAM_BREAKER_HALF_OPEN_CALLS: int = int(os.getenv(UPSTREAM_BREAKER_HALF_OPEN_CALLS_VAR, "3"))
+
+    # Prometheus metrics at /metrics
+    METRICS_ENABLED: bool = os.getenv(METRICS_ENABLED_VAR, "true").lower() == "true"
+
+    # Sampling request profiler; requests carrying X-Admin-Token are always profiled
+    PROFILER_ENABLED: bool = os.getenv(PROFILER_ENABLED_VAR, "false").lower() == "true"
+    PROFILER_SAMPLE_RATE: float = float(os.getenv(PROFILER_SAMPLE_RATE_VAR, "0"))
+    PROFILER_INTERVAL: float = float(os.getenv(PROFILER_INTERVAL_VAR, "0.005"))
+    PROFILER_MAX_PROFILES: int = int(os.getenv(PROFILER_MAX_PROFILES_VAR, "100"))
+    PROFILER_ADMIN_TOKEN: str = os.getenv(PROFILER_ADMIN_TOKEN_VAR) or None
+
+    # "fast" (orjson) or "flask" (Flask's default provider) for JSON responses
+    JSON_PROVIDER: str = os.getenv(JSON_PROVIDER_VAR, "fast")
+    # "http" (Flask's HTTP dates, e.g. "Sat, 01 Mar 2025 08:00:00 GMT") or "rfc3339" (opt-in, fast provider only)
+    JSON_DATETIME_FORMAT: str = os.getenv(JSON_DATETIME_FORMAT_VAR, "http")
+
+    # Response compression for JSON bodies of at least COMPRESSION_MIN_SIZE bytes; encodings in server preference order
+    COMPRESSION_ENABLED: bool = os.getenv(COMPRESSION_ENABLED_VAR, "true").lower() == "true"
+    COMPRESSION_MIN_SIZE: int = int(os.getenv(COMPRESSION_MIN_SIZE_VAR, "1024"))
+    COMPRESSION_ENCODINGS: str = os.getenv(COMPRESSION_ENCODINGS_VAR, "zstd,br,gzip")
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv(COMPRESSION_GZIP_LEVEL_VAR, "5"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv(COMPRESSION_BROTLI_QUALITY_VAR, "1"))
+    COMPRESSION_ZSTD_LEVEL: int = int(os.getenv(COMPRESSION_ZSTD_LEVEL_VAR, "3"))
+    # Compressed bytes held by the body cache; entries are keyed by a digest, so bodies themselves are not kept
+    COMPRESSION_CACHE_MAX_BYTES: int = int(os.getenv(COMPRESSION_CACHE_MAX_BYTES_VAR, str(16 * 1024 * 1024)))
+
+    # Logging: "color" or "json" lines, written by a background thread when LOG_ASYNC is set
+    LOG_LEVEL: str = os.getenv(LOG_LEVEL_VAR, "INFO")
+    LOG_FORMAT: str = os.getenv(LOG_FORMAT_VAR, "color")
+    LOG_ASYNC: bool = os.getenv(LOG_ASYNC_VAR, "false").lower() == "true"
+    LOG_QUEUE_SIZE: int = int(os.getenv(LOG_QUEUE_SIZE_VAR, "10000"))
+    # Warnings and errors let through per logging call site and window; 0 disables the limit
+    LOG_ERROR_BURST: int = int(os.getenv(LOG_ERROR_BURST_VAR, "10"))
+    LOG_ERROR_WINDOW_SECONDS: float = float(os.getenv(LOG_ERROR_WINDOW_SECONDS_VAR, "60"))
+
     @classmethod
     def validate_env(cls):
         required_vars = [
             DATABASE_URL_VAR,
             JWT_EXPIRY_IN_SECONDS_VAR,
-            OPENAI_API_KEY_VAR,
             APP_NAME_VAR,
             APP_ENV_VAR,
             JWT_SECRET_KEY_VAR,
@@ -40,23 +272,23 @@ class Config:
             APP_HOST_VAR
         ]
 
+        # The fake upstream needs no credentials
+        if not cls.OPENAI_FAKE_UPSTREAM:
+            required_vars.append(OPENAI_API_KEY_VAR)
+
         missing_vars = [var for var in required_vars if not os.getenv(var)]
 
         if missing_vars:
             raise EnvironmentError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
-# Define color format for log messages
-formatter = ColoredFormatter(
-    "%(log_color)s%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    log_colors={
-        "INFO": "green",
-        "WARNING": "yellow",
-        "ERROR": "red",
-    },
-)
+# Set up the root logger; see app/log_pipeline.py
+from app.log_pipeline import configure_logging
 
-# Set up logging with color formatter
-handler = logging.StreamHandler()
-handler.setFormatter(formatter)
-logging.basicConfig(level=logging.INFO, handlers=[handler])
\ No newline at end of file
+log_pipeline = configure_logging(
+    level=Config.LOG_LEVEL,
+    fmt=Config.LOG_FORMAT,
+    use_queue=Config.LOG_ASYNC,
+    queue_size=Config.LOG_QUEUE_SIZE,
+    error_burst=Config.LOG_ERROR_BURST,
+    error_window=Config.LOG_ERROR_WINDOW_SECONDS
+)
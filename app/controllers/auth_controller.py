@@ -1,12 +1,31 @@
-from flask import Blueprint, request
+from flask import Blueprint, request, g
+from flask_jwt_extended import jwt_required
 from app.services.auth_service import AuthService
+from app.services.password_hasher import password_hasher
 from app.schemas.auth_schema import UserRegisterSchema, UserLoginSchema
-from app.utils.errors import UnprocessableEntityError, UnauthorizedError
 from app.utils.api_responses import build_success_response, build_error_response
+from app.utils.errors import UnprocessableEntityError, UnauthorizedError, ServiceUnavailableError
 
 auth_bp = Blueprint("auth", __name__)
 
 
+def build_overloaded_response(error):
+    """503 for requests shed by the password hashing pool; clients should retry shortly."""
+    response = build_error_response(message=str(error), status=503)
+    response.headers["Retry-After"] = "1"
+
+    return response
+
+
+@auth_bp.after_request
+def add_hash_timing(response):
+    """Report time spent waiting for and computing password hashes in a Server-Timing header."""
+    if "password_hash_seconds" in g:
+        response.headers["Server-Timing"] = f"hash;dur={g.password_hash_seconds * 1000:.1f}"
+
+    return response
+
+
 @auth_bp.route("/register", methods=["POST"])
 def register():
     """
@@ -28,6 +47,9 @@ def register():
     except UnprocessableEntityError as e:
         return build_error_response(message=str(e), status=422)
 
+    except ServiceUnavailableError as e:
+        return build_overloaded_response(e)
+
 
 @auth_bp.route("/login", methods=["POST"])
 def login():
@@ -47,4 +69,16 @@ def login():
         return build_success_response(message="Login successful", data=response)
     
     except UnauthorizedError as e:
-        return build_error_response(message=str(e), status=401)
\ No newline at end of file
+        return build_error_response(message=str(e), status=401)
+
+    except ServiceUnavailableError as e:
+        return build_overloaded_response(e)
+
+
+@auth_bp.route("/hash-stats", methods=["GET"])
+@jwt_required()
+def get_hash_stats():
+    """
+    Report password hashing pool load and timing counters.
+    """
+    return build_success_response(message="Password hashing statistics retrieved successfully.", data=password_hasher.stats())
\ No newline at end of file
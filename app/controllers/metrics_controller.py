@@ -0,0 +1,86 @@
+from app.config import log_pipeline
+from flask import Blueprint, Response
+from sqlalchemy.pool import QueuePool
+from app.utils.metrics import metrics
+from app.services.user_cache import user_cache
+from app.utils.compression import response_compressor
+from app.services.rate_limiter import rate_limiter
+from app.services.upstream_guard import upstream_guard
+from app.services.response_cache import response_cache
+from app.services.semantic_cache import semantic_cache
+from app.services.password_hasher import password_hasher
+from app.database import engine, DB_POOL_SIZE, DB_MAX_OVERFLOW
+
+metrics_bp = Blueprint("metrics", __name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Gauge encoding of the upstream circuit breaker state
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _cache_stats():
+    """(cache name, stats) for every lookup cache; disabled caches report nothing."""
+    from app import jwt
+
+    caches = [
+        ("response", response_cache.stats()), ("user", user_cache.stats()), ("jwt", jwt.verified_tokens.stats()),
+        ("compressed_body", response_compressor.cache.stats()), ("semantic", semantic_cache.stats())
+    ]
+    return [(name, stats) for name, stats in caches if stats.get("hits") is not None]
+
+
+def _per_cache(key):
+    return lambda: [((name,), stats[key]) for name, stats in _cache_stats() if key in stats]
+
+
+# Counters and gauges that services already keep, read at scrape time
+metrics.callback("cache_hits", "Lookup cache hits.", _per_cache("hits"), kind="counter", labelnames=("cache",))
+metrics.callback("cache_misses", "Lookup cache misses.", _per_cache("misses"), kind="counter", labelnames=("cache",))
+metrics.callback("cache_entries", "Entries held by each lookup cache.", _per_cache("entries"), labelnames=("cache",))
+
+# Only a QueuePool is sized; see queue_pool_options
+if isinstance(engine.pool, QueuePool):
+    metrics.callback("db_pool_size", "Connections the pool keeps open.", lambda: engine.pool.size())
+    metrics.callback("db_pool_checked_out", "Connections currently checked out.", lambda: engine.pool.checkedout())
+    metrics.callback("db_pool_overflow", "Connections opened beyond the pool size.", lambda: max(0, engine.pool.overflow()))
+    metrics.callback(
+        "db_pool_saturation", "Checked-out connections as a fraction of the pool's maximum.",
+        lambda: engine.pool.checkedout() / (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    )
+
+metrics.callback("password_hash_operations", "Password hashes computed or checked.", lambda: password_hasher.operations, kind="counter")
+metrics.callback("password_hash_rejected", "Password hashes shed because the pool queue was full.", lambda: password_hasher.rejected, kind="counter")
+metrics.callback("password_hash_pending", "Password hashes queued or running.", lambda: password_hasher.stats()["pending"])
+metrics.callback("password_hash_seconds", "Time spent computing password hashes.", lambda: password_hasher.hash_seconds, kind="counter")
+metrics.callback("password_hash_wait_seconds", "Time password hashes waited for a pool worker.", lambda: password_hasher.wait_seconds, kind="counter")
+
+metrics.callback(
+    "rate_limit_decisions", "Per-user rate limiter decisions.",
+    lambda: [(("admitted",), rate_limiter.admitted), (("rejected",), rate_limiter.rejected)], kind="counter", labelnames=("decision",)
+)
+
+metrics.callback("upstream_breaker_state", "Upstream circuit breaker state (0 closed, 1 half-open, 2 open).", lambda: BREAKER_STATES[upstream_guard.breaker.state])
+metrics.callback("upstream_breaker_short_circuited", "Calls rejected by the open circuit breaker.", lambda: upstream_guard.breaker.short_circuited, kind="counter")
+metrics.callback("upstream_concurrency_limit", "Current adaptive limit on concurrent OpenAI calls.", lambda: int(upstream_guard.limiter.limit))
+metrics.callback("upstream_in_flight", "OpenAI calls in progress.", lambda: upstream_guard.limiter.in_flight)
+metrics.callback("upstream_shed", "Calls that found no upstream slot within the queue timeout.", lambda: upstream_guard.limiter.rejected, kind="counter")
+metrics.callback("upstream_retries", "OpenAI request attempts retried after an overload error.", lambda: upstream_guard.retries, kind="counter")
+
+metrics.callback(
+    "compressed_responses", "Responses compressed, by encoding.",
+    lambda: [((encoding,), count) for encoding, count in response_compressor.responses.items()], kind="counter", labelnames=("encoding",)
+)
+metrics.callback("compression_bytes_in", "Response bytes before compression.", lambda: response_compressor.bytes_in, kind="counter")
+metrics.callback("compression_bytes_out", "Response bytes after compression.", lambda: response_compressor.bytes_out, kind="counter")
+
+metrics.callback("log_records_dropped", "Log records dropped because the log queue was full.", lambda: log_pipeline.stats()["dropped"], kind="counter")
+metrics.callback("log_records_suppressed", "Repeated warnings and errors dropped by the log rate limit.", lambda: log_pipeline.stats()["suppressed"], kind="counter")
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def get_metrics():
+    """
+    Expose every metric in the Prometheus text format.
+    """
+    return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
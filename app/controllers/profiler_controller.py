@@ -0,0 +1,59 @@
+import functools
+from flask import Blueprint, Response, request
+from app.utils.profiler import profiler, PROFILE_HEADER
+from app.utils.api_responses import build_success_response, build_error_response
+
+profiler_bp = Blueprint("profiler", __name__)
+
+
+def admin_required(view):
+    """Reject requests without the PROFILER_ADMIN_TOKEN in the X-Admin-Token header."""
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not profiler.is_admin(request.headers.get(PROFILE_HEADER)):
+            return build_error_response("Admin token required.", status=403)
+
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+@profiler_bp.route("", methods=["GET"])
+@admin_required
+def list_profiles():
+    """
+    List captured request profiles, newest first, with their phase breakdowns.
+    """
+    return build_success_response(
+        message="Profiles retrieved successfully!",
+        data={"enabled": profiler.enabled, "sample_rate": profiler.sample_rate, "profiles": [profile.summary() for profile in profiler.profiles()]}
+    )
+
+
+@profiler_bp.route("/<profile_id>", methods=["GET"])
+@admin_required
+def get_profile(profile_id):
+    """
+    Retrieve one profile's summary and phase breakdown.
+    """
+    profile = profiler.get(profile_id)
+
+    if profile is None:
+        return build_error_response("Profile not found.", status=404)
+
+    return build_success_response(message="Profile retrieved successfully!", data=profile.summary())
+
+
+@profiler_bp.route("/<profile_id>/collapsed", methods=["GET"])
+@admin_required
+def get_collapsed_stacks(profile_id):
+    """
+    Retrieve one profile's samples as collapsed stacks, for flamegraph.pl or speedscope.
+    """
+    profile = profiler.get(profile_id)
+
+    if profile is None:
+        return build_error_response("Profile not found.", status=404)
+
+    return Response(profile.collapsed(), content_type="text/plain; charset=utf-8")
@@ -1,13 +1,25 @@
-from flask import Blueprint, request
+import io
+import math
+from app.config import Config
+from app.utils.profiler import phase
+from flask import Blueprint, request, url_for, current_app
+from app.utils.rate_limit import rate_limited, weigh_batch, weigh_request
+from app.services.job_queue import job_queue, SUCCEEDED
 from app.services.openai_service import OpenAIService
+from app.services.upstream_guard import upstream_guard
+from app.services.response_cache import response_cache
+from app.services.generation_service import GenerationService
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services.generated_text_service import GeneratedTextService
-from app.utils.api_responses import build_success_response, build_error_response
-from app.schemas.text_schema import GenerateTextSchema, UpdateGeneratedTextSchema
-from app.utils.errors import UnprocessableEntityError, NotFoundError, UnauthorizedError
+from app.schemas.text_schema import GenerateTextSchema, UpdateGeneratedTextSchema, ListGeneratedTextsSchema, SearchGeneratedTextsSchema
+from app.utils.errors import BaseError, UnprocessableEntityError, NotFoundError, UnauthorizedError
+from app.utils.api_responses import build_success_response, build_error_response, build_event_stream_response, format_sse_event, build_ndjson_response
 
 text_bp = Blueprint("text", __name__)
 
+# Bytes read from the request body at a time while importing
+IMPORT_READ_BUFFER_SIZE = 64 * 1024
+
 
 def validate_int(value):
     """Helper function to validate that a value is an integer."""
@@ -18,37 +30,340 @@ def validate_int(value):
         raise UnprocessableEntityError("Invalid input: ID of generated text must be an integer.")
 
 
+def parse_payload(schema):
+    """
+    Validate the JSON request body against a schema.
+    :return: Tuple of (data, error response); the error response is None when the body is valid.
+    """
+    with phase("validate"):
+        data = request.get_json()
+        errors = schema.validate(data)
+
+    if errors:
+        return data, build_error_response("Invalid input.", status=422, data=errors)
+
+    return data, None
+
+
+def build_text_error_response(error):
+    """Map generated text service errors to error responses."""
+    if isinstance(error, NotFoundError):
+        return build_error_response(str(error), status=404)
+
+    if isinstance(error, UnauthorizedError):
+        return build_error_response(str(error), status=403)
+
+    if isinstance(error, UnprocessableEntityError):
+        return build_error_response(message=str(error), status=422)
+
+    response = build_error_response(message=str(error), status=503)
+
+    if getattr(error, "retry_after", None) is not None:
+        response.headers["Retry-After"] = str(max(1, math.ceil(error.retry_after)))
+
+    return response
+
+
+def read_ndjson_records(stream, max_line_bytes):
+    """
+    Decode an NDJSON body line by line, so it is never held in memory whole.
+    :return: Generator of (line number, decoded value) tuples; blank lines are skipped.
+    :raises UnprocessableEntityError: If a line is too long or not valid JSON.
+    """
+    # Werkzeug's LimitedStream is unbuffered: its readline reads one byte per call
+    if isinstance(stream, io.RawIOBase):
+        stream = io.BufferedReader(stream, buffer_size=IMPORT_READ_BUFFER_SIZE)
+
+    for line_number, line in enumerate(iter(lambda: stream.readline(max_line_bytes + 1), b""), start=1):
+        if len(line) > max_line_bytes:
+            raise UnprocessableEntityError(f"Invalid input on line {line_number}: longer than {max_line_bytes} bytes.")
+
+        if not line.strip():
+            continue
+
+        try:
+            yield line_number, current_app.json.loads(line)
+
+        except ValueError:
+            raise UnprocessableEntityError(f"Invalid input on line {line_number}: not valid JSON.")
+
+
+def build_batch_item_error(message, status, data=None):
+    """Per-item error entry of a batch response, shaped like `build_error_response`."""
+    return {"success": False, "error_message": message, "status_code": status, "data": data or {}}
+
+
 @text_bp.route("/", methods=["POST"])
 @jwt_required()
+@rate_limited()
 def generate_text():
     """
     Generate text using OpenAI and store the response.
     """
-    data = request.get_json()
+    data, error_response = parse_payload(GenerateTextSchema())
 
-    # Validate request data
-    schema = GenerateTextSchema()
-    errors = schema.validate(data)
-
-    if errors:
-        return build_error_response("Invalid input.", status=422, data=errors)
+    if error_response:
+        return error_response
 
     try:
         user_id = get_jwt_identity()
-        generated_response = OpenAIService.generate_text(prompt=data["prompt"])
+        generated_response, cached = GenerationService.generate(prompt=data["prompt"])
 
         stored_data = GeneratedTextService.store_generated_text(user_id, data["prompt"], generated_response)
+        stored_data["cached"] = cached
+
         return build_success_response("Text generated successfully.", data=stored_data, status=201)
 
-    except UnprocessableEntityError as e:
-        return build_error_response(message=str(e), status=422)
-    
     except Exception as e:
-        return build_error_response(
-            message=str(e),
-            status=503
+        return build_text_error_response(e)
+
+
+@text_bp.route("/", methods=["GET"])
+@jwt_required()
+def list_generated_texts():
+    """
+    List the user's generated texts, newest first.
+    Query parameters: `limit`, `cursor` (the previous page's `next_cursor`) and `view=summary`
+    to return only ids, timestamps and prompt previews.
+    """
+    schema = ListGeneratedTextsSchema()
+    errors = schema.validate(request.args)
+
+    if errors:
+        return build_error_response("Invalid input.", status=422, data=errors)
+
+    args = schema.load(request.args)
+
+    try:
+        page = GeneratedTextService.list_texts(
+            int(get_jwt_identity()),
+            limit=args["limit"],
+            cursor=args["cursor"],
+            summary=args["view"] == "summary"
+        )
+        return build_success_response("Generated texts retrieved successfully.", data=page)
+
+    except UnprocessableEntityError as e:
+        return build_text_error_response(e)
+
+
+@text_bp.route("/search", methods=["GET"])
+@jwt_required()
+def search_generated_texts():
+    """
+    Full-text search of the user's prompts and responses, best match first.
+    Query parameters: `q` (the search terms) and `limit`. Results carry plain-text snippets around the
+    matched terms, marked with U+E000 and U+E001, instead of the full text; fetch a text by id for the rest.
+    """
+    schema = SearchGeneratedTextsSchema()
+    errors = schema.validate(request.args)
+
+    if errors:
+        return build_error_response("Invalid input.", status=422, data=errors)
+
+    args = schema.load(request.args)
+
+    try:
+        results = GeneratedTextService.search_texts(int(get_jwt_identity()), args["q"], limit=args["limit"])
+        return build_success_response("Search results retrieved successfully.", data=results)
+
+    except UnprocessableEntityError as e:
+        return build_text_error_response(e)
+
+
+@text_bp.route("/export", methods=["GET"])
+@jwt_required()
+def export_generated_texts():
+    """
+    Stream all of the user's generated texts, oldest first, as NDJSON: one JSON object per line.
+    The output can be sent back to `/import`.
+    """
+    batches = GeneratedTextService.export_texts(int(get_jwt_identity()), Config.EXPORT_BATCH_SIZE)
+    dumps = current_app.json.dumps
+
+    # One write per fetched batch rather than per row
+    lines = ("".join(dumps(row) + "\n" for row in rows) for rows in batches)
+    return build_ndjson_response(lines, filename="generated-texts.ndjson")
+
+
+@text_bp.route("/import", methods=["POST"])
+@jwt_required()
+@rate_limited(weigh_request)
+def import_generated_texts():
+    """
+    Store the texts of an NDJSON body for the user, as written by `/export`: one object per line
+    with `prompt`, `response` and optionally `timestamp`. The body is read and inserted in chunks;
+    nothing is stored if any line is invalid or there are more than `IMPORT_MAX_ROWS` lines.
+    """
+    records = read_ndjson_records(request.stream, Config.IMPORT_MAX_LINE_BYTES)
+
+    try:
+        count = GeneratedTextService.import_texts(int(get_jwt_identity()), records, Config.IMPORT_BATCH_SIZE, Config.IMPORT_MAX_ROWS)
+        return build_success_response("Generated texts imported successfully.", data={"imported": count}, status=201)
+
+    except UnprocessableEntityError as e:
+        return build_text_error_response(e)
+
+
+@text_bp.route("/batch", methods=["POST"])
+@jwt_required()
+@rate_limited(weigh_batch)
+def generate_text_batch():
+    """
+    Generate text for a list of prompts and store every response with one bulk insert.
+    Each item succeeds or fails on its own; the response reports a result or an error per item.
+    """
+    items = request.get_json()
+
+    if not isinstance(items, list) or not items:
+        return build_error_response("Invalid input: expected a non-empty list of prompts.", status=422)
+
+    if len(items) > Config.BATCH_MAX_ITEMS:
+        return build_error_response(f"Invalid input: a batch accepts at most {Config.BATCH_MAX_ITEMS} prompts.", status=422)
+
+    # One validation pass; errors are keyed by item index
+    errors = GenerateTextSchema(many=True).validate(items)
+    results = [None] * len(items)
+
+    for index, item_errors in errors.items():
+        results[index] = build_batch_item_error("Invalid input.", status=422, data=item_errors)
+
+    valid_indexes = [index for index in range(len(items)) if index not in errors]
+    outcomes = GenerationService.generate_batch([items[index]["prompt"] for index in valid_indexes])
+    generated = []
+
+    for index, outcome in zip(valid_indexes, outcomes):
+        if isinstance(outcome, Exception):
+            results[index] = build_batch_item_error(str(outcome), status=503)
+
+        else:
+            generated.append((index, outcome))
+
+    try:
+        stored = GeneratedTextService.store_generated_texts(
+            int(get_jwt_identity()),
+            [(items[index]["prompt"], generated_response) for index, (generated_response, _) in generated]
         )
 
+    except Exception as e:
+        return build_text_error_response(e)
+
+    for (index, (_, cached)), stored_data in zip(generated, stored):
+        stored_data["cached"] = cached
+        results[index] = {"success": True, "status_code": 201, "data": stored_data}
+
+    # 207 Multi-Status tells clients to inspect the per-item results
+    status = 201 if len(stored) == len(items) else 207
+    return build_success_response("Batch processed.", data={"results": results, "succeeded": len(stored), "failed": len(items) - len(stored)}, status=status)
+
+
+@text_bp.route("/jobs", methods=["POST"])
+@jwt_required()
+# Jobs run on the shared worker pool, which already takes users in turn; only the rates apply
+@rate_limited(concurrency=False)
+def enqueue_generation_job():
+    """
+    Queue a text generation to run in the background.
+    Responds immediately with 202 and the job; poll the URL in the Location header for the result.
+    """
+    data, error_response = parse_payload(GenerateTextSchema())
+
+    if error_response:
+        return error_response
+
+    job = job_queue.submit(int(get_jwt_identity()), data["prompt"])
+
+    response = build_success_response("Generation job queued.", data=job, status=202)
+    response.headers["Location"] = url_for("text.get_generation_job", job_id=job["id"])
+
+    return response
+
+
+@text_bp.route("/jobs/<job_id>", methods=["GET"])
+@jwt_required()
+def get_generation_job(job_id):
+    """
+    Retrieve a generation job, including the stored text once it has succeeded.
+    With `?wait=<seconds>` the request is held until the job finishes or the wait expires.
+    """
+    try:
+        wait = min(float(request.args.get("wait", 0)), Config.JOB_QUEUE_MAX_WAIT_SECONDS)
+
+    except ValueError:
+        return build_error_response("Invalid input: wait must be a number of seconds.", status=422)
+
+    user_id = int(get_jwt_identity())
+    job = job_queue.wait(job_id, wait) if wait > 0 else job_queue.get(job_id)
+
+    try:
+        if not job:
+            raise NotFoundError("Generation job not found.")
+
+        if job["user_id"] != user_id:
+            raise UnauthorizedError("You are not authorized to access this resource.")
+
+        if job["status"] == SUCCEEDED and job["result_id"] is not None:
+            job["result"] = GeneratedTextService.get_text_by_id(job["result_id"], user_id)
+
+        return build_success_response("Generation job retrieved successfully.", data=job)
+
+    except (NotFoundError, UnauthorizedError) as e:
+        return build_text_error_response(e)
+
+
+@text_bp.route("/stream", methods=["POST"])
+@jwt_required()
+@rate_limited()
+def stream_generated_text():
+    """
+    Generate text using OpenAI, forwarding token deltas as Server-Sent Events.
+    The assembled response is stored once the stream completes.
+    """
+    data, error_response = parse_payload(GenerateTextSchema())
+
+    if error_response:
+        return error_response
+
+    user_id = get_jwt_identity()
+    prompt = data["prompt"]
+
+    def events():
+        parts = []
+
+        try:
+            for delta in OpenAIService.stream_text(prompt=prompt):
+                parts.append(delta)
+                yield format_sse_event({"delta": delta})
+
+            stored_data = GeneratedTextService.store_generated_text(user_id, prompt, "".join(parts))
+            yield format_sse_event(stored_data, event="done")
+
+        except BaseError as e:
+            yield format_sse_event({"error": e.message, "details": e.verboseMessage}, event="error")
+
+        except Exception as e:
+            yield format_sse_event({"error": str(e)}, event="error")
+
+    return build_event_stream_response(events())
+
+
+@text_bp.route("/cache/stats", methods=["GET"])
+@jwt_required()
+def get_cache_stats():
+    """
+    Report prompt-response cache hit, miss and eviction counters.
+    """
+    return build_success_response("Cache statistics retrieved successfully.", data=response_cache.stats())
+
+
+@text_bp.route("/upstream/stats", methods=["GET"])
+@jwt_required()
+def get_upstream_stats():
+    """
+    Report the upstream circuit breaker state, adaptive concurrency limit and retry counters.
+    """
+    return build_success_response("Upstream statistics retrieved successfully.", data=upstream_guard.stats())
+
 
 @text_bp.route("/<id>", methods=["GET"])
 @jwt_required()
@@ -63,11 +378,8 @@ def get_generated_text(id):
         generated_text = GeneratedTextService.get_text_by_id(id, int(user_id))
         return build_success_response("Generated text retrieved successfully.", data=generated_text)
 
-    except NotFoundError as e:
-        return build_error_response(str(e), status=404)
-
-    except UnauthorizedError as e:
-        return build_error_response(str(e), status=403)
+    except (NotFoundError, UnauthorizedError) as e:
+        return build_text_error_response(e)
 
 
 @text_bp.route("/<id>", methods=["PUT"])
@@ -76,14 +388,10 @@ def update_generated_text(id):
     """
     Update the response of a generated text record.
     """
-    data = request.get_json()
+    data, error_response = parse_payload(UpdateGeneratedTextSchema())
 
-    # Validate request data
-    schema = UpdateGeneratedTextSchema()
-    errors = schema.validate(data)
-
-    if errors:
-        return build_error_response("Invalid input.", status=422, data=errors)
+    if error_response:
+        return error_response
 
     try:
         id = validate_int(id)
@@ -92,11 +400,8 @@ def update_generated_text(id):
         updated_text = GeneratedTextService.update_text(id, int(user_id), data["response"])
         return build_success_response("Generated text updated successfully.", data=updated_text)
 
-    except NotFoundError as e:
-        return build_error_response(str(e), status=404)
-
-    except UnauthorizedError as e:
-        return build_error_response(str(e), status=403)
+    except (NotFoundError, UnauthorizedError) as e:
+        return build_text_error_response(e)
 
 
 @text_bp.route("/<id>", methods=["DELETE"])
@@ -112,8 +417,5 @@ def delete_generated_text(id):
         GeneratedTextService.delete_text(id, int(user_id))
         return build_success_response("Generated text deleted successfully.")
 
-    except NotFoundError as e:
-        return build_error_response(str(e), status=404)
-
-    except UnauthorizedError as e:
-        return build_error_response(str(e), status=403)
\ No newline at end of file
+    except (NotFoundError, UnauthorizedError) as e:
+        return build_text_error_response(e)
\ No newline at end of file
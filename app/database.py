@@ -1,17 +1,128 @@
+import os
+import asyncio
+import weakref
+from sqlalchemy.pool import QueuePool
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from app.config import Config, logging
+from app.utils.profiler import profile_engine
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
+from app.utils.metrics import InstrumentedQueuePool, instrument_engine
 
-engine = create_engine(Config.DATABASE_URL, echo=False, pool_size=10, max_overflow=20)
+DB_POOL_SIZE = 10
+DB_MAX_OVERFLOW = 20
+
+
+def queue_pool_options(url: str) -> dict:
+    """
+    Pool settings for a database URL. Dialects that default to a QueuePool get a sized, instrumented one;
+    others (e.g. in-memory SQLite, where every new connection is a new empty database) keep their own pool.
+    """
+
+    url = make_url(url)
+
+    if not issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+        return {}
+
+    return {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "poolclass": InstrumentedQueuePool}
+
+
+engine = create_engine(Config.DATABASE_URL, echo=False, **queue_pool_options(Config.DATABASE_URL))
+instrument_engine(engine)
+profile_engine(engine)
 db_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
 
 Base = declarative_base()
 
+# Async drivers matching each sync dialect, for the ASGI serving path
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+# Async engines keyed by event loop: asyncpg connections cannot move between loops
+_async_engines = weakref.WeakKeyDictionary()
+
+
 def init_db():
     """Initialize database tables."""
 
-    from app.models import user, generated_text
+    from app.models import user, generated_text, generation_job
     Base.metadata.create_all(bind=engine)
+
+    # create_all leaves existing tables alone; add indexes introduced since a database was created
+    with engine.begin() as connection:
+        for index in (*user.User.__table__.indexes, *generated_text.GeneratedText.__table__.indexes):
+            index.create(connection, checkfirst=True)
+
+        generated_text.install_search_index(connection)
     
-    logging.info("Database connected successfully!")
\ No newline at end of file
+    logging.info("Database connected successfully!")
+
+
+def get_async_database_url() -> str:
+    """Async database URL: ASYNC_DATABASE_URL, or DATABASE_URL with its async driver."""
+
+    if Config.ASYNC_DATABASE_URL:
+        return Config.ASYNC_DATABASE_URL
+
+    scheme, _, rest = Config.DATABASE_URL.partition("://")
+
+    if scheme not in ASYNC_DRIVERS:
+        raise EnvironmentError(f"No async driver known for '{scheme}'; set ASYNC_DATABASE_URL.")
+
+    return f"{ASYNC_DRIVERS[scheme]}://{rest}"
+
+
+def get_async_session():
+    """
+    Return a new AsyncSession bound to the running event loop's engine.
+    The async engine is created on first use so sync-only deployments never need an async driver.
+    """
+
+    loop = asyncio.get_running_loop()
+    entry = _async_engines.get(loop)
+
+    if entry is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+        url = get_async_database_url()
+
+        # SQLite allows one writer: queue on the pool instead of spinning in SQLite's busy handler
+        pool_options = {"pool_size": 1, "max_overflow": 0} if url.startswith("sqlite") else {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}
+
+        async_engine = create_async_engine(url, echo=False, **pool_options)
+        instrument_engine(async_engine.sync_engine)
+        profile_engine(async_engine.sync_engine)
+        entry = _async_engines[loop] = (async_engine, async_sessionmaker(async_engine, expire_on_commit=False))
+
+    return entry[1]()
+
+
+async def dispose_async_engine():
+    """Close the running event loop's async engine and its pooled connections."""
+
+    entry = _async_engines.pop(asyncio.get_running_loop(), None)
+
+    if entry is not None:
+        await entry[0].dispose()
+
+
+def dispose_engine_after_fork():
+    """
+    Child-side fork hook for pre-forking servers.
+    Pooled connections inherited from the parent are dropped without closing them, since
+    closing would tear down sockets the parent is still using.
+    """
+
+    global _async_engines
+
+    engine.dispose(close=False)
+    _async_engines = weakref.WeakKeyDictionary()
+
+
+# Never hand inherited database connections to a forked worker
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=dispose_engine_after_fork)
@@ -0,0 +1,266 @@
+"""
+Logging setup for the whole process.
+
+With LOG_ASYNC the root logger gets a QueueHandler: request threads only filter a record and
+put it on a bounded in-memory queue, and a QueueListener thread formats and writes it. A full
+queue drops records instead of blocking requests. LOG_FORMAT=json writes one JSON object per
+line carrying the request id. Repeated warnings and errors are rate limited per call site, so
+an error storm costs a dictionary lookup per record instead of a write.
+"""
+import os
+import sys
+import copy
+import json
+import time
+import uuid
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+from contextvars import ContextVar
+from collections import OrderedDict
+from colorlog import ColoredFormatter
+from datetime import datetime, timezone
+
+REQUEST_ID_HEADER = "X-Request-Id"
+
+# Id of the request the current thread (or asyncio task) is serving
+request_id_var = ContextVar("request_id", default=None)
+
+# LogRecord attributes; anything else on a record came from `extra=` and is written as a field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id", "suppressed"}
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp every record with the current request id."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class ErrorRateLimitFilter(logging.Filter):
+    """
+    Let through at most `burst` records per logging call site and level every `window` seconds,
+    for WARNING and above. Records are keyed by where they were logged rather than by message,
+    since most messages are f-strings that embed varying data. The first record after a window
+    with suppressed duplicates carries their count as `suppressed`. Beyond `max_keys` call sites,
+    the least recently seen one is forgotten.
+    """
+
+    def __init__(self, burst: int = 10, window: float = 60.0, max_keys: int = 1024):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.max_keys = max_keys
+        self.suppressed = 0
+
+        # (logger, level, pathname, lineno) -> [window start, records let through, records suppressed], in LRU order
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING or self.burst <= 0:
+            return True
+
+        key = (record.name, record.levelno, record.pathname, record.lineno)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._windows.get(key)
+
+            if entry is not None:
+                self._windows.move_to_end(key)
+
+            elif len(self._windows) >= self.max_keys:
+                self._windows.popitem(last=False)
+
+            if entry is None or now - entry[0] >= self.window:
+                if entry is not None and entry[2]:
+                    record.suppressed = entry[2]
+
+                self._windows[key] = [now, 1, 0]
+                return True
+
+            if entry[1] < self.burst:
+                entry[1] += 1
+                return True
+
+            entry[2] += 1
+            self.suppressed += 1
+            return False
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, request id and any `extra` fields."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+
+        if getattr(record, "suppressed", None):
+            entry["suppressed"] = record.suppressed
+
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRS:
+                entry[name] = value
+
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str)
+
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler for an in-process queue. The record is not pickled, so exc_info is kept for the
+    listener to format instead of being rendered on the request thread, and a full queue drops
+    the record rather than blocking.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+
+    def prepare(self, record):
+        # Merge args now: they may be mutated once the caller moves on. Other handlers still see
+        # the original record, so change a copy, as the stdlib QueueHandler does
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    """The root logger's handler chain, and the listener thread when logging is asynchronous."""
+
+    def __init__(self, output: logging.Handler, use_queue: bool, queue_size: int, filters):
+        self.output = output
+        self.use_queue = use_queue
+        self.queue_size = queue_size
+        self.listener = None
+
+        if use_queue:
+            self.handler = LocalQueueHandler(queue.Queue(queue_size))
+            self.listener = logging.handlers.QueueListener(self.handler.queue, output, respect_handler_level=True)
+
+        else:
+            self.handler = output
+
+        for log_filter in filters:
+            self.handler.addFilter(log_filter)
+
+
+    def start(self):
+        if self.listener is not None:
+            self.listener.start()
+            atexit.register(self.stop)
+
+
+    def stop(self):
+        """Write out every queued record and stop the listener."""
+        if self.listener is not None and self.listener._thread is not None:
+            self.listener.stop()
+
+
+    def stats(self) -> dict:
+        return {
+            "async": self.use_queue,
+            "queued": self.handler.queue.qsize() if self.use_queue else 0,
+            "dropped": self.handler.dropped if self.use_queue else 0,
+            "suppressed": sum(f.suppressed for f in self.handler.filters if isinstance(f, ErrorRateLimitFilter))
+        }
+
+
+    def _reset_after_fork(self):
+        # The listener thread did not survive the fork, and the queue's lock may be held
+        if self.listener is not None:
+            self.handler.queue = queue.Queue(self.queue_size)
+            self.listener = logging.handlers.QueueListener(self.handler.queue, self.output, respect_handler_level=True)
+            self.listener.start()
+
+
+def configure_logging(level: str = "INFO", fmt: str = "color", use_queue: bool = False, queue_size: int = 10000,
+                      error_burst: int = 10, error_window: float = 60.0) -> LogPipeline:
+    """
+    Install the root logger's handlers.
+    :param fmt: "color" for colored text lines or "json" for JSON lines.
+    :param use_queue: Write through a background listener thread instead of on the calling thread.
+    :param error_burst: Identical warnings/errors let through per `error_window` seconds; 0 disables the limit.
+    :return: The installed pipeline.
+    """
+    output = logging.StreamHandler(sys.stderr)
+
+    if fmt == "json":
+        output.setFormatter(JsonFormatter())
+
+    else:
+        output.setFormatter(ColoredFormatter(
+            "%(log_color)s%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+            log_colors={
+                "INFO": "green",
+                "WARNING": "yellow",
+                "ERROR": "red",
+            },
+        ))
+
+    pipeline = LogPipeline(output, use_queue, queue_size, [RequestIdFilter(), ErrorRateLimitFilter(error_burst, error_window)])
+    logging.basicConfig(level=level.upper(), handlers=[pipeline.handler])
+    pipeline.start()
+
+    if use_queue and hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=pipeline._reset_after_fork)
+
+    return pipeline
+
+
+def install_request_ids(app):
+    """
+    Give every request an id for its log records: the caller's X-Request-Id when it is a short
+    printable token, otherwise a new one. The id is echoed in the response header.
+    """
+    from flask import request
+
+    @app.before_request
+    def _assign_request_id():
+        request_id = request.headers.get(REQUEST_ID_HEADER)
+
+        if not request_id or len(request_id) > 128 or not request_id.isprintable():
+            request_id = uuid.uuid4().hex
+
+        request_id_var.set(request_id)
+
+
+    @app.after_request
+    def _echo_request_id(response):
+        request_id = request_id_var.get()
+
+        if request_id:
+            response.headers[REQUEST_ID_HEADER] = request_id
+
+        return response
+
+
+    @app.teardown_request
+    def _clear_request_id(error=None):
+        # Worker threads are reused; records logged between requests carry no id
+        request_id_var.set(None)
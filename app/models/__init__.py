@@ -1,2 +1,3 @@
 from .user import User
-from .generated_text import GeneratedText
\ No newline at end of file
+from .generated_text import GeneratedText
+from .generation_job import GenerationJob
\ No newline at end of file
@@ -1,6 +1,12 @@
 from app.database import Base
 from sqlalchemy.orm import relationship
-from sqlalchemy import Column, Integer, Text, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, Text, ForeignKey, DateTime, Index, DDL, event, func, inspect
+
+# Text search configuration of the Postgres index; queries must use the same one to hit it
+SEARCH_CONFIG = "english"
+
+# SQLite FTS5 table indexing the prompt and response of every row
+SEARCH_TABLE = "generated_texts_fts"
 
 
 class GeneratedText(Base):
@@ -9,10 +15,69 @@ class GeneratedText(Base):
     __tablename__ = "generated_texts"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     prompt = Column(Text, nullable=False)
     response = Column(Text, nullable=False)
     timestamp = Column(DateTime, default=func.now(), nullable=False)
 
     # Define relationship with the User model
-    user = relationship("User", back_populates="generated_text")
\ No newline at end of file
+    user = relationship("User", back_populates="generated_text")
+
+    # Backs keyset pagination of a user's history, newest first; also serves plain user_id lookups
+    __table_args__ = (Index("ix_generated_texts_user_id_timestamp_id", "user_id", "timestamp", "id"),)
+
+
+# Postgres: a generated tsvector column (kept current on every insert and update) under a GIN index.
+# Prompt terms are weighted above response terms in the ranking.
+POSTGRES_SEARCH_DDL = [
+    f"ALTER TABLE generated_texts ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', prompt), 'A') || setweight(to_tsvector('{SEARCH_CONFIG}', response), 'B')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_generated_texts_search_vector ON generated_texts USING gin (search_vector)",
+]
+
+# SQLite: an external-content FTS5 table, so the text is stored once, kept in sync by triggers.
+# The owner is indexed as a "u<user_id>" token: a query ANDed with it only scores the user's own rows,
+# where filtering on user_id after the match would rank every user's matches first.
+SQLITE_SEARCH_DDL = [
+    f"CREATE VIEW IF NOT EXISTS {SEARCH_TABLE}_content AS SELECT id, prompt, response, 'u' || user_id AS owner FROM generated_texts",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    f"prompt, response, owner, content='{SEARCH_TABLE}_content', content_rowid='id', tokenize='porter unicode61')",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert AFTER INSERT ON generated_texts BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, prompt, response, owner) VALUES (new.id, new.prompt, new.response, 'u' || new.user_id); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete AFTER DELETE ON generated_texts BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, prompt, response, owner) VALUES ('delete', old.id, old.prompt, old.response, 'u' || old.user_id); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update AFTER UPDATE OF prompt, response, user_id ON generated_texts BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, prompt, response, owner) VALUES ('delete', old.id, old.prompt, old.response, 'u' || old.user_id); "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, prompt, response, owner) VALUES (new.id, new.prompt, new.response, 'u' || new.user_id); END",
+]
+
+
+def install_search_index(connection):
+    """
+    Create the full-text index for the connection's dialect, if it is missing.
+    Runs after `generated_texts` is created and from `init_db`, so existing databases get it too;
+    rows stored before the index existed are indexed when it is created.
+    """
+    dialect = connection.dialect.name
+
+    if dialect == "postgresql":
+        for statement in POSTGRES_SEARCH_DDL:
+            connection.execute(DDL(statement))
+
+    elif dialect == "sqlite":
+        existed = inspect(connection).has_table(SEARCH_TABLE)
+
+        for statement in SQLITE_SEARCH_DDL:
+            connection.execute(DDL(statement))
+
+        if not existed:
+            connection.execute(DDL(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"))
+
+
+@event.listens_for(GeneratedText.__table__, "after_create")
+def _create_search_index(target, connection, **kwargs):
+    install_search_index(connection)
+
+# Triggers go with the table; the virtual table and its content view do not
+event.listen(GeneratedText.__table__, "before_drop", DDL(f"DROP TABLE IF EXISTS {SEARCH_TABLE}").execute_if(dialect="sqlite"))
+event.listen(GeneratedText.__table__, "before_drop", DDL(f"DROP VIEW IF EXISTS {SEARCH_TABLE}_content").execute_if(dialect="sqlite"))
@@ -0,0 +1,20 @@
+from app.database import Base
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index
+
+
+class GenerationJob(Base):
+    """Queued text generation, used by the database-backed job queue."""
+
+    __tablename__ = "generation_jobs"
+
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    prompt = Column(Text, nullable=False)
+    status = Column(String(16), nullable=False)
+    result_id = Column(Integer, ForeignKey("generated_texts.id", ondelete="SET NULL"), nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+    # Workers scan for the oldest claimable jobs
+    __table_args__ = (Index("ix_generation_jobs_status_created_at", "status", "created_at"),)
@@ -1,6 +1,6 @@
 from app.database import Base
 from sqlalchemy.orm import relationship
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index
 
 
 class User(Base):
@@ -9,8 +9,14 @@ class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    username = Column(String, unique=True, nullable=False)
+    username = Column(String, nullable=False)
     password_hash = Column(String, nullable=False)
 
     # Define relationship with GeneratedText
-    generated_text = relationship("GeneratedText", back_populates="user", cascade="all, delete-orphan")
\ No newline at end of file
+    generated_text = relationship("GeneratedText", back_populates="user", cascade="all, delete-orphan")
+
+    # Unique username index that also covers the login lookup on PostgreSQL (index-only scan).
+    # SQLite ignores INCLUDE, but its indexes always carry the rowid (`id`).
+    __table_args__ = (
+        Index("uq_users_username", "username", unique=True, postgresql_include=["id", "password_hash"]),
+    )
\ No newline at end of file
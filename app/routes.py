@@ -1,9 +1,15 @@
 from . import app
-from .config import logging
+from .config import Config, logging
+from .log_pipeline import install_request_ids
+from app.utils.profiler import profile_app
+from app.utils.compression import compress_responses
+from app.utils.metrics import instrument_app, app_errors
 from app.controllers.auth_controller import auth_bp
+from app.controllers.metrics_controller import metrics_bp
+from app.controllers.profiler_controller import profiler_bp
 from app.controllers.text_generation_controller import text_bp
 from .utils.api_responses import build_error_response, build_success_response
-from .utils.errors import UnprocessableEntityError, NotFoundError, OperationForbiddenError
+from .utils.errors import BaseError, UnprocessableEntityError, NotFoundError, OperationForbiddenError, errorTypes
 
 # Global API prefix
 API_PREFIX = "/api"
@@ -24,11 +30,28 @@ def home():
 app.register_blueprint(auth_bp, url_prefix=API_PREFIX + "/auth")
 app.register_blueprint(text_bp, url_prefix=API_PREFIX + "/generate-text")
 
+# Request latency histograms and the Prometheus endpoint
+if Config.METRICS_ENABLED:
+    instrument_app(app)
+    app.register_blueprint(metrics_bp)
+
+# Sampled request profiles; the hook returns at once unless PROFILER_ENABLED is set
+profile_app(app)
+app.register_blueprint(profiler_bp, url_prefix=API_PREFIX + "/admin/profiles")
+
+# Request ids for log records, echoed in X-Request-Id
+install_request_ids(app)
+
+# Negotiated gzip/brotli/zstd for large JSON responses
+compress_responses(app)
+
 
 @app.errorhandler(Exception)
 def handle_exception(error):
-    # Log the error for debugging purposes
-    logging.error(f"Unhandled exception: {error}")
+    # BaseError subclasses are logged and counted when raised
+    if not isinstance(error, BaseError):
+        logging.error(f"Unhandled exception: {error}", exc_info=error)
+        app_errors.inc(errorTypes["INTERNAL_SERVER_ERROR"])
     
     # Check the type of error and customize the response
     if isinstance(error, UnprocessableEntityError):
@@ -1,10 +1,15 @@
+from app.config import Config
 from marshmallow import Schema, fields, validate
 
+# Length limits of stored texts; the NDJSON import checks them by hand
+PROMPT_MIN_LENGTH, PROMPT_MAX_LENGTH = 5, 1000
+RESPONSE_MIN_LENGTH, RESPONSE_MAX_LENGTH = 5, 5000
+
 class GenerateTextSchema(Schema):
     """Schema for validating text generation requests."""
     prompt = fields.Str(
         required=True, 
-        validate=validate.Length(min=5, max=1000),
+        validate=validate.Length(min=PROMPT_MIN_LENGTH, max=PROMPT_MAX_LENGTH),
         error_messages={"required": "Prompt is required.", "invalid": "Invalid prompt format."}
     )
     
@@ -13,6 +18,35 @@ class UpdateGeneratedTextSchema(Schema):
     """Schema for validating updates to generated text records."""
     response = fields.Str(
         required=True, 
-        validate=validate.Length(min=5, max=5000),
+        validate=validate.Length(min=RESPONSE_MIN_LENGTH, max=RESPONSE_MAX_LENGTH),
         error_messages={"required": "Response is required.", "invalid": "Invalid response format."}
+    )
+
+
+class ListGeneratedTextsSchema(Schema):
+    """Schema for validating history listing query parameters."""
+    limit = fields.Int(
+        load_default=Config.LIST_PAGE_SIZE,
+        validate=validate.Range(min=1, max=Config.LIST_MAX_PAGE_SIZE),
+        error_messages={"invalid": "Limit must be an integer."}
+    )
+    cursor = fields.Str(load_default=None)
+    view = fields.Str(
+        load_default="full",
+        validate=validate.OneOf(["full", "summary"]),
+        error_messages={"invalid": "View must be 'full' or 'summary'."}
+    )
+
+
+class SearchGeneratedTextsSchema(Schema):
+    """Schema for validating full-text search query parameters."""
+    q = fields.Str(
+        required=True,
+        validate=validate.Length(min=1, max=200),
+        error_messages={"required": "Query is required.", "invalid": "Invalid query format."}
+    )
+    limit = fields.Int(
+        load_default=Config.LIST_PAGE_SIZE,
+        validate=validate.Range(min=1, max=Config.LIST_MAX_PAGE_SIZE),
+        error_messages={"invalid": "Limit must be an integer."}
     )
\ No newline at end of file
@@ -1,8 +1,12 @@
+from sqlalchemy import select, update
 from app.models.user import User
 from app.database import db_session
 from app.utils.jwt_handler import JWTHandler
-from app.utils.errors import UnauthorizedError, UnprocessableEntityError
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.services.user_cache import user_cache
+from app.services.password_hasher import password_hasher
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.utils.errors import UnauthorizedError, UnprocessableEntityError, ServiceUnavailableError
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
 
 class AuthService:
     """Handles user authentication: registration and login."""
@@ -15,20 +19,22 @@ class AuthService:
         :param password: Raw password to hash.
         :return: User ID and username.
         :raises UnprocessableEntityError: If username is already taken.
+        :raises ServiceUnavailableError: If the password hashing queue is full.
         """
 
-        existing_user = db_session.query(User).filter_by(username=username).first()
+        hashed_password = password_hasher.hash(password)
 
-        if existing_user:
-            raise UnprocessableEntityError("Username is already in use.")
+        # One atomic statement: concurrent registrations of a name cannot both succeed
+        user_id = db_session.execute(AuthService._insert_user_statement(username, hashed_password)).scalar()
 
-        hashed_password = generate_password_hash(password)
-        new_user = User(username=username, password_hash=hashed_password)
+        if user_id is None:
+            db_session.rollback()
+            raise UnprocessableEntityError("Username is already in use.")
 
-        db_session.add(new_user)
         db_session.commit()
+        user_cache.set(username, user_id, hashed_password)
 
-        return { "user_id": new_user.id, "username": new_user.username }
+        return { "user_id": user_id, "username": username }
 
 
     @staticmethod
@@ -39,15 +45,73 @@ class AuthService:
         :param password: User's raw password.
         :return: user ID & JWT token.
         :raises UnauthorizedError: If authentication fails.
+        :raises ServiceUnavailableError: If the password hashing queue is full.
         """
 
-        user = db_session.query(User).filter_by(username=username).first()
+        user = AuthService._lookup_user(username)
 
         if not user:
             raise UnauthorizedError("Invalid username.")
-        
-        if not check_password_hash(user.password_hash, password):
+
+        user_id, password_hash = user
+
+        if not password_hasher.check(password_hash, password):
             raise UnauthorizedError("Incorrect password.")
 
-        token = JWTHandler.generate_token(user.id)
-        return { "user_id": user.id, "access_token": token }
\ No newline at end of file
+        # The plain password is only available now, so upgrade hashes made with old parameters here
+        if password_hasher.needs_rehash(password_hash):
+            AuthService._rehash_password(user_id, username, password)
+
+        token = JWTHandler.generate_token(user_id)
+        return { "user_id": user_id, "access_token": token }
+
+
+    @staticmethod
+    def _lookup_user(username: str):
+        """
+        Resolve a username through the user cache, falling back to an index-only query.
+        :return: Tuple of (user id, password hash), or None if the user does not exist.
+        """
+        user = user_cache.get(username)
+
+        if user is None:
+            user = db_session.execute(
+                select(User.id, User.password_hash).where(User.username == username)
+            ).first()
+
+            if user is None:
+                return None
+
+            user_cache.set(username, user.id, user.password_hash)
+
+        return tuple(user)
+
+
+    @staticmethod
+    def _rehash_password(user_id: int, username: str, password: str):
+        """Store a hash made with the current PASSWORD_HASH_METHOD; skipped while the hashing pool is full."""
+        try:
+            new_hash = password_hasher.hash(password)
+
+        except ServiceUnavailableError:
+            # The password was already verified; the upgrade can wait for a later login
+            return
+
+        db_session.execute(update(User).where(User.id == user_id).values(password_hash=new_hash))
+        db_session.commit()
+
+        # A bulk UPDATE bypasses the ORM invalidation hooks
+        user_cache.set(username, user_id, new_hash)
+
+
+    @staticmethod
+    def _insert_user_statement(username: str, password_hash: str):
+        """INSERT ... ON CONFLICT (username) DO NOTHING RETURNING id; returns no row for a taken name."""
+        insert = postgresql_insert if db_session.get_bind().dialect.name == "postgresql" else sqlite_insert
+
+        return (
+            insert(User)
+            .values(username=username, password_hash=password_hash)
+            .on_conflict_do_nothing(index_elements=["username"])
+            .returning(User.id)
+        )
@@ -1,6 +1,28 @@
-from app.database import db_session
-from app.models.generated_text import GeneratedText
-from app.utils.errors import NotFoundError, UnauthorizedError
+import re
+import json
+import asyncio
+import base64
+import datetime
+from app.services.openai_service import OpenAIService
+from app.database import db_session, get_async_session, engine
+from app.services.semantic_cache import semantic_cache
+from app.models.generated_text import GeneratedText, SEARCH_CONFIG, SEARCH_TABLE
+from app.utils.errors import NotFoundError, UnauthorizedError, UnprocessableEntityError
+from sqlalchemy import select, insert, update, delete, func, tuple_, table, column, literal_column
+from app.schemas.text_schema import PROMPT_MIN_LENGTH, PROMPT_MAX_LENGTH, RESPONSE_MIN_LENGTH, RESPONSE_MAX_LENGTH
+
+# Characters of the prompt returned by summary listings
+PROMPT_PREVIEW_LENGTH = 100
+
+# Search snippets: matched terms are wrapped in these markers, and runs of text are cut to about this many words.
+# Snippets are plain stored text, so the markers are Unicode private-use characters rather than HTML tags: a client
+# that renders highlights must escape the snippet and then swap the markers for its own (no stored XSS via <b>).
+SNIPPET_START = "\ue000"
+SNIPPET_END = "\ue001"
+SNIPPET_ELLIPSIS = "…"
+SNIPPET_WORDS = 16
+
+SEARCH_TERM = re.compile(r"\w+")
 
 
 class GeneratedTextService:
@@ -16,13 +38,165 @@ class GeneratedTextService:
         db_session.add(new_text)
         db_session.commit()
 
-        return {
-            "id": new_text.id,
-            "user_id": user_id,
-            "prompt": prompt,
-            "response": response,
-            "timestamp": new_text.timestamp
-        }
+        stored = GeneratedTextService._to_dict(new_text)
+        semantic_cache.add(prompt, OpenAIService.generation_params(), stored["id"])
+
+        return stored
+
+
+    @staticmethod
+    def store_generated_texts(user_id: int, items: list) -> list:
+        """
+        Store several generated texts with one multi-row INSERT and a single commit.
+        :param items: List of (prompt, response) tuples.
+        :return: The stored records, in the order given.
+        """
+        if not items:
+            return []
+
+        texts = db_session.scalars(
+            insert(GeneratedText).returning(GeneratedText),
+            [{"user_id": user_id, "prompt": prompt, "response": response} for prompt, response in items]
+        ).all()
+
+        # RETURNING order is unspecified, but one multi-row INSERT assigns ids in VALUES order.
+        # (`sort_by_parameter_order=True` would make SQLite fall back to one INSERT per row.)
+        texts = sorted(texts, key=lambda text: text.id)
+
+        # Serialize before committing; the commit expires every returned row
+        stored = [GeneratedTextService._to_dict(text) for text in texts]
+        db_session.commit()
+
+        semantic_cache.add_many([(text["prompt"], text["id"]) for text in stored], OpenAIService.generation_params())
+
+        return stored
+
+
+    @staticmethod
+    def list_texts(user_id: int, limit: int, cursor: str = None, summary: bool = False) -> dict:
+        """
+        List a user's generated texts, newest first, one page at a time.
+        Pages are keyset-paginated on (timestamp, id), so every page is an index range scan
+        no matter how deep the client has paged.
+        :param limit: Maximum number of records on the page.
+        :param cursor: The `next_cursor` of the previous page, or None for the first page.
+        :param summary: Return only the id, timestamp and a prompt preview, without loading the response text.
+        :return: Dict with the page `items` and the `next_cursor`, which is None on the last page.
+        :raises UnprocessableEntityError: If the cursor is malformed.
+        """
+        if summary:
+            columns = [
+                GeneratedText.id,
+                GeneratedText.timestamp,
+                func.substr(GeneratedText.prompt, 1, PROMPT_PREVIEW_LENGTH).label("prompt_preview")
+            ]
+
+        else:
+            columns = [GeneratedText.id, GeneratedText.user_id, GeneratedText.prompt, GeneratedText.response, GeneratedText.timestamp]
+
+        query = (
+            select(*columns)
+            .where(GeneratedText.user_id == user_id)
+            .order_by(GeneratedText.timestamp.desc(), GeneratedText.id.desc())
+            .limit(limit + 1)
+        )
+
+        if cursor:
+            timestamp, text_id = GeneratedTextService._decode_cursor(cursor)
+            query = query.where(tuple_(GeneratedText.timestamp, GeneratedText.id) < tuple_(timestamp, text_id))
+
+        # One extra row tells us whether another page follows
+        rows = db_session.execute(query).all()
+        items = [row._asdict() for row in rows[:limit]]
+
+        next_cursor = None
+
+        if len(rows) > limit:
+            next_cursor = GeneratedTextService._encode_cursor(rows[limit - 1].timestamp, rows[limit - 1].id)
+
+        return {"items": items, "next_cursor": next_cursor}
+
+
+    @staticmethod
+    def search_texts(user_id: int, query: str, limit: int) -> dict:
+        """
+        Full-text search of a user's prompts and responses, best match first.
+        Served by the tsvector GIN index on Postgres and the FTS5 table on SQLite. Only snippets of the
+        matching text are returned, never full responses.
+        :param query: Search terms; every term must match (Postgres also accepts "quoted phrases" and -exclusions).
+        :param limit: Maximum number of results.
+        :return: Dict with the result `items`: id, timestamp, score, prompt_snippet and response_snippet.
+        :raises UnprocessableEntityError: If the database has no full-text index.
+        """
+        dialect = db_session.get_bind().dialect.name
+
+        if dialect == "postgresql":
+            statement = GeneratedTextService._postgres_search_statement(user_id, query, limit)
+
+        elif dialect == "sqlite":
+            return {"items": GeneratedTextService._sqlite_search(user_id, SEARCH_TERM.findall(query), limit)}
+
+        else:
+            raise UnprocessableEntityError(f"Full-text search is not available on {dialect}.")
+
+        return {"items": [row._asdict() for row in db_session.execute(statement)]}
+
+
+    @staticmethod
+    def export_texts(user_id: int, batch_size: int):
+        """
+        Stream all of a user's generated texts, oldest first, from a server-side cursor.
+        Rows are fetched `batch_size` at a time, so memory use does not grow with the history.
+        :return: Generator of row dict lists of at most `batch_size` rows: id, prompt, response and RFC 3339 timestamp.
+        """
+        query = (
+            select(GeneratedText.id, GeneratedText.prompt, GeneratedText.response, GeneratedText.timestamp)
+            .where(GeneratedText.user_id == user_id)
+            .order_by(GeneratedText.timestamp, GeneratedText.id)
+        )
+
+        # Its own connection: the generator outlives the view that returned it
+        with engine.connect() as connection:
+            for rows in connection.execution_options(yield_per=batch_size).execute(query).partitions():
+                # RFC 3339 whatever JSON_DATETIME_FORMAT is, since that is what import reads; stored times are UTC
+                yield [{**row._asdict(), "timestamp": row.timestamp.replace(tzinfo=datetime.timezone.utc).isoformat()} for row in rows]
+
+
+    @staticmethod
+    def import_texts(user_id: int, records, batch_size: int, max_rows: int) -> int:
+        """
+        Store a stream of texts for a user with chunked bulk INSERTs in one transaction: either every
+        record is stored or, on the first invalid one, none is. Ids are assigned anew.
+        :param records: Iterable of (line number, decoded JSON value) tuples, each an object with
+                        `prompt` and `response` strings and an optional RFC 3339 `timestamp`.
+        :param batch_size: Rows per INSERT.
+        :param max_rows: Most records accepted; bounds how long the transaction holds the write lock.
+        :return: The number of texts stored.
+        :raises UnprocessableEntityError: If a record is malformed or there are more than `max_rows`.
+        """
+        imported_at = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        statement = insert(GeneratedText)
+        count = 0
+        chunk = []
+
+        with engine.begin() as connection:
+            for line_number, record in records:
+                if count + len(chunk) >= max_rows:
+                    raise UnprocessableEntityError(f"Invalid input on line {line_number}: at most {max_rows} texts can be imported at once.")
+
+                chunk.append(GeneratedTextService._import_row(user_id, line_number, record, imported_at))
+
+                if len(chunk) >= batch_size:
+                    # One executemany; SQLAlchemy batches it into multi-row INSERTs where the driver allows
+                    connection.execute(statement, chunk)
+                    count += len(chunk)
+                    chunk = []
+
+            if chunk:
+                connection.execute(statement, chunk)
+                count += len(chunk)
+
+        return count
 
 
     @staticmethod
@@ -31,38 +205,183 @@ class GeneratedTextService:
         Retrieve a generated text by ID.
         """
         text = db_session.query(GeneratedText).filter_by(id=text_id).first()
+        GeneratedTextService._authorize(text, user_id, "access")
 
-        if not text:
-            raise NotFoundError("Generated text not found.")
-
-        if text.user_id != user_id:
-            raise UnauthorizedError("You are not authorized to access this resource.")
-        
-        return {
-            "id": text.id,
-            "user_id": text.user_id,
-            "prompt": text.prompt,
-            "response": text.response,
-            "timestamp": text.timestamp
-        }
+        return GeneratedTextService._to_dict(text)
 
 
     @staticmethod
     def update_text(text_id: int, user_id: int, new_response: str) -> dict:
         """
         Update the response of a generated text.
+        The ownership check is part of the UPDATE; a second query runs only on a miss.
         """
-        text = db_session.query(GeneratedText).filter_by(id=text_id).first()
+        text = db_session.execute(GeneratedTextService._update_statement(text_id, user_id, new_response)).first()
+
+        if text is None:
+            db_session.rollback()
+            owner = db_session.execute(GeneratedTextService._owner_statement(text_id)).first()
+            GeneratedTextService._raise_for_miss(owner, user_id, "update")
+
+        db_session.commit()
+
+        # An edited response is no longer a generated answer to its prompt
+        semantic_cache.discard(text_id)
 
+        return GeneratedTextService._to_dict(text)
+
+
+    @staticmethod
+    def delete_text(text_id: int, user_id: int):
+        """
+        Delete a stored generated text.
+        The ownership check is part of the DELETE; a second query runs only on a miss.
+        """
+        deleted = db_session.execute(GeneratedTextService._delete_statement(text_id, user_id))
+
+        if deleted.rowcount == 0:
+            db_session.rollback()
+            owner = db_session.execute(GeneratedTextService._owner_statement(text_id)).first()
+            GeneratedTextService._raise_for_miss(owner, user_id, "delete")
+
+        db_session.commit()
+        semantic_cache.discard(text_id)
+
+
+    @staticmethod
+    def _postgres_search_statement(user_id: int, query: str, limit: int):
+        """
+        Ranked tsvector search. Matches are ranked and cut to `limit` first, so ts_headline, which
+        re-parses the text, only runs on the rows returned.
+        """
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        vector = literal_column("search_vector")
+        score = func.ts_rank_cd(vector, tsquery)
+
+        ranked = (
+            select(GeneratedText.id, GeneratedText.timestamp, GeneratedText.prompt, GeneratedText.response, score.label("score"))
+            .where(GeneratedText.user_id == user_id, vector.op("@@")(tsquery))
+            .order_by(score.desc(), GeneratedText.id.desc())
+            .limit(limit)
+            .subquery()
+        )
+
+        options = f"StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}"
+
+        return select(
+            ranked.c.id,
+            ranked.c.timestamp,
+            ranked.c.score,
+            func.ts_headline(SEARCH_CONFIG, ranked.c.prompt, tsquery, options).label("prompt_snippet"),
+            func.ts_headline(SEARCH_CONFIG, ranked.c.response, tsquery, options).label("response_snippet")
+        ).order_by(ranked.c.score.desc(), ranked.c.id.desc())
+
+
+    @staticmethod
+    def _sqlite_search(user_id: int, terms: list, limit: int) -> list:
+        """
+        Ranked FTS5 search, in two statements: the match, ranking and snippets come from the FTS5 table
+        alone, then timestamps are read for the returned rows. Joining generated_texts into the ranked
+        query costs a row lookup per match, and SQLite then builds every match's snippets before sorting.
+        """
+        if not terms:
+            return []
+
+        rows = db_session.execute(GeneratedTextService._sqlite_search_statement(user_id, terms, limit)).all()
+        timestamps = dict(db_session.execute(
+            select(GeneratedText.id, GeneratedText.timestamp).where(GeneratedText.id.in_([row.id for row in rows]))
+        ).all())
+
+        return [
+            {"id": row.id, "timestamp": timestamps.get(row.id), "score": row.score, "prompt_snippet": row.prompt_snippet, "response_snippet": row.response_snippet}
+            for row in rows
+        ]
+
+
+    @staticmethod
+    def _sqlite_search_statement(user_id: int, terms: list, limit: int):
+        """
+        FTS5 match of the terms, best first. Terms are quoted, so user input never reaches the FTS5 query
+        syntax, and matched against the text columns only, ANDed with the owner token so only the user's
+        rows are scored. bm25 is lower for better matches; its negation is returned so higher scores are
+        better on both databases.
+        """
+        fts = table(SEARCH_TABLE, column("rowid"))
+        fts_ref = literal_column(SEARCH_TABLE)
+
+        # Prompt matches weigh double, as on Postgres; the owner token does not count
+        bm25 = func.bm25(fts_ref, 2.0, 1.0, 0.0)
+        match = f"owner:u{int(user_id)} AND {{prompt response}}: (" + " ".join('"' + term + '"' for term in terms) + ")"
+
+        def snippet(index):
+            return func.snippet(fts_ref, index, SNIPPET_START, SNIPPET_END, SNIPPET_ELLIPSIS, SNIPPET_WORDS)
+
+        return (
+            select(
+                fts.c.rowid.label("id"),
+                (-bm25).label("score"),
+                snippet(0).label("prompt_snippet"),
+                snippet(1).label("response_snippet")
+            )
+            .where(fts_ref.op("MATCH")(match))
+            .order_by(bm25, fts.c.rowid.desc())
+            .limit(limit)
+        )
+
+
+    @staticmethod
+    def _update_statement(text_id: int, user_id: int, new_response: str):
+        """UPDATE of a text scoped to its owner, returning the updated row."""
+        return (
+            update(GeneratedText)
+            .where(GeneratedText.id == text_id, GeneratedText.user_id == user_id)
+            .values(response=new_response)
+            .returning(GeneratedText.id, GeneratedText.user_id, GeneratedText.prompt, GeneratedText.response, GeneratedText.timestamp)
+        )
+
+
+    @staticmethod
+    def _delete_statement(text_id: int, user_id: int):
+        """DELETE of a text scoped to its owner."""
+        return delete(GeneratedText).where(GeneratedText.id == text_id, GeneratedText.user_id == user_id)
+
+
+    @staticmethod
+    def _owner_statement(text_id: int):
+        """Owner lookup used to tell a missing text from another user's text."""
+        return select(GeneratedText.user_id).where(GeneratedText.id == text_id)
+
+
+    @staticmethod
+    def _raise_for_miss(owner, user_id: int, action: str):
+        """
+        Explain why an owner-scoped write matched no row.
+        :raises NotFoundError: If the text does not exist.
+        :raises UnauthorizedError: If the text belongs to another user.
+        """
+        GeneratedTextService._authorize(owner, user_id, action)
+
+        # Only reachable if the text was deleted or reassigned between the two statements
+        raise NotFoundError("Generated text not found.")
+
+
+    @staticmethod
+    def _authorize(text, user_id: int, action: str):
+        """
+        Ensure a generated text exists and belongs to the user.
+        :raises NotFoundError: If the text does not exist.
+        :raises UnauthorizedError: If the text belongs to another user.
+        """
         if not text:
             raise NotFoundError("Generated text not found.")
-        
+
         if text.user_id != user_id:
-            raise UnauthorizedError("You are not authorized to update this resource.")
-        
-        text.response = new_response
-        db_session.commit()
+            raise UnauthorizedError(f"You are not authorized to {action} this resource.")
 
+
+    @staticmethod
+    def _to_dict(text) -> dict:
+        """Serialize a generated text row for API responses."""
         return {
             "id": text.id,
             "user_id": text.user_id,
@@ -73,17 +392,137 @@ class GeneratedTextService:
 
 
     @staticmethod
-    def delete_text(text_id: int, user_id: int):
+    def _encode_cursor(timestamp: datetime.datetime, text_id: int) -> str:
+        """Opaque cursor pointing just past the given row."""
+        payload = json.dumps([timestamp.isoformat(), text_id]).encode("utf-8")
+        return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple:
+        """
+        :return: Tuple of (timestamp, id) of the last row of the previous page.
+        :raises UnprocessableEntityError: If the cursor is malformed.
+        """
+        try:
+            timestamp, text_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return datetime.datetime.fromisoformat(timestamp), int(text_id)
+
+        except (ValueError, TypeError):
+            raise UnprocessableEntityError("Invalid input: malformed cursor.")
+
+
+    @staticmethod
+    def _import_row(user_id: int, line_number: int, record, imported_at: datetime.datetime) -> dict:
+        """
+        Validate one imported record. Checked by hand rather than with a marshmallow schema,
+        which costs about 40 times as much per row.
+        :raises UnprocessableEntityError: If the record is malformed.
+        """
+        if not isinstance(record, dict):
+            raise UnprocessableEntityError(f"Invalid input on line {line_number}: expected a JSON object.")
+
+        prompt, response, timestamp = record.get("prompt"), record.get("response"), record.get("timestamp")
+
+        if not isinstance(prompt, str) or not PROMPT_MIN_LENGTH <= len(prompt) <= PROMPT_MAX_LENGTH:
+            raise UnprocessableEntityError(f"Invalid input on line {line_number}: prompt must be a string of {PROMPT_MIN_LENGTH} to {PROMPT_MAX_LENGTH} characters.")
+
+        if not isinstance(response, str) or not RESPONSE_MIN_LENGTH <= len(response) <= RESPONSE_MAX_LENGTH:
+            raise UnprocessableEntityError(f"Invalid input on line {line_number}: response must be a string of {RESPONSE_MIN_LENGTH} to {RESPONSE_MAX_LENGTH} characters.")
+
+        if timestamp is None:
+            timestamp = imported_at
+
+        else:
+            try:
+                timestamp = datetime.datetime.fromisoformat(timestamp)
+
+            except (ValueError, TypeError):
+                raise UnprocessableEntityError(f"Invalid input on line {line_number}: timestamp must be an RFC 3339 date-time.")
+
+            # Stored times are naive UTC
+            if timestamp.tzinfo:
+                timestamp = timestamp.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+        return {"user_id": user_id, "prompt": prompt, "response": response, "timestamp": timestamp}
+
+
+class AsyncGeneratedTextService:
+    """
+    Async counterpart of GeneratedTextService for the ASGI serving path.
+    Only the I/O differs; ownership checks and serialization are shared with GeneratedTextService.
+    """
+
+    @staticmethod
+    async def store_generated_text(user_id: int, prompt: str, response: str) -> dict:
+        """
+        Store generated text in the database.
+        """
+        async with get_async_session() as session:
+            new_text = GeneratedText(user_id=user_id, prompt=prompt, response=response)
+
+            session.add(new_text)
+            await session.commit()
+
+            # Load the server-generated timestamp; lazy loads are not allowed in async sessions
+            await session.refresh(new_text)
+
+            stored = GeneratedTextService._to_dict(new_text)
+
+            # Embedding and indexing take the cache's lock; keep them off the event loop
+            if semantic_cache.enabled:
+                await asyncio.to_thread(semantic_cache.add, prompt, OpenAIService.generation_params(), stored["id"])
+
+            return stored
+
+
+    @staticmethod
+    async def get_text_by_id(text_id: int, user_id: int) -> dict:
+        """
+        Retrieve a generated text by ID.
+        """
+        async with get_async_session() as session:
+            text = (await session.execute(select(GeneratedText).filter_by(id=text_id))).scalar_one_or_none()
+            GeneratedTextService._authorize(text, user_id, "access")
+
+            return GeneratedTextService._to_dict(text)
+
+
+    @staticmethod
+    async def update_text(text_id: int, user_id: int, new_response: str) -> dict:
+        """
+        Update the response of a generated text.
+        """
+        async with get_async_session() as session:
+            text = (await session.execute(GeneratedTextService._update_statement(text_id, user_id, new_response))).first()
+
+            if text is None:
+                await session.rollback()
+                owner = (await session.execute(GeneratedTextService._owner_statement(text_id))).first()
+                GeneratedTextService._raise_for_miss(owner, user_id, "update")
+
+            await session.commit()
+
+            if semantic_cache.enabled:
+                await asyncio.to_thread(semantic_cache.discard, text_id)
+
+            return GeneratedTextService._to_dict(text)
+
+
+    @staticmethod
+    async def delete_text(text_id: int, user_id: int):
         """
         Delete a stored generated text.
         """
-        text = db_session.query(GeneratedText).filter_by(id=text_id).first()
+        async with get_async_session() as session:
+            deleted = await session.execute(GeneratedTextService._delete_statement(text_id, user_id))
 
-        if not text:
-            raise NotFoundError("Generated text not found.")
-        
-        if text.user_id != user_id:
-            raise UnauthorizedError("You are not authorized to delete this resource.")
-        
-        db_session.delete(text)
-        db_session.commit()
\ No newline at end of file
+            if deleted.rowcount == 0:
+                await session.rollback()
+                owner = (await session.execute(GeneratedTextService._owner_statement(text_id))).first()
+                GeneratedTextService._raise_for_miss(owner, user_id, "delete")
+
+            await session.commit()
+
+            if semantic_cache.enabled:
+                await asyncio.to_thread(semantic_cache.discard, text_id)
@@ -0,0 +1,148 @@
+import os
+import asyncio
+from app.config import Config
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.single_flight import SingleFlight, AsyncSingleFlight
+from app.services.openai_service import OpenAIService
+from app.services.semantic_cache import semantic_cache
+from app.services.response_cache import response_cache, ResponseCache
+
+# Concurrent identical generations share one upstream call
+upstream_flight = SingleFlight()
+async_upstream_flight = AsyncSingleFlight()
+
+
+def _build_batch_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=Config.BATCH_MAX_CONCURRENCY, thread_name_prefix="batch-generation")
+
+
+# Upstream fan-out for batch requests, shared by every batch in the process so
+# concurrent batches cannot multiply the number of in-flight OpenAI calls
+batch_executor = _build_batch_executor()
+
+
+class GenerationService:
+    """Resolves a prompt to generated text through the response cache and request coalescing."""
+
+    @staticmethod
+    def generate(prompt: str, semantic: bool = True) -> tuple:
+        """
+        Return the generated text for a prompt, calling OpenAI only when needed.
+        :param prompt: The input prompt for AI generation.
+        :param semantic: Consult the near-duplicate prompt cache after an exact-match miss.
+        :return: Tuple of (generated text, cached) where cached is True for cache hits.
+        :raises ServiceUnavailableError: If OpenAI API call fails.
+        """
+        params = OpenAIService.generation_params()
+
+        generated_response = response_cache.get(prompt, params)
+
+        if generated_response is not None:
+            return generated_response, True
+
+        def call_upstream():
+            # A leader may have filled the cache between our miss and becoming leader
+            response = response_cache.get(prompt, params, record_miss=False)
+
+            if response is not None:
+                return response, True
+
+            # A stored response to a near-identical earlier prompt
+            response = semantic_cache.get(prompt, params) if semantic else None
+
+            if response is not None:
+                response_cache.set(prompt, params, response)
+                return response, True
+
+            response = OpenAIService.generate_text(prompt=prompt)
+            response_cache.set(prompt, params, response)
+
+            return response, False
+
+        (generated_response, cached), _ = upstream_flight.do(ResponseCache.make_key(prompt, params), call_upstream)
+        return generated_response, cached
+
+
+    @staticmethod
+    def generate_batch(prompts: list) -> list:
+        """
+        Generate text for several prompts through the bounded batch worker pool.
+        :param prompts: The input prompts for AI generation.
+        :return: One entry per prompt, in order: a (generated text, cached) tuple, or the exception raised for that prompt.
+        """
+        params = OpenAIService.generation_params()
+
+        # One vectorized near-duplicate lookup for the whole batch; only the misses go to the pool
+        similar = semantic_cache.get_many(prompts, params)
+        futures = [None if response is not None else batch_executor.submit(GenerationService.generate, prompt, False) for prompt, response in zip(prompts, similar)]
+        outcomes = []
+
+        for prompt, response, future in zip(prompts, similar, futures):
+            if future is None:
+                response_cache.set(prompt, params, response)
+                outcomes.append((response, True))
+                continue
+
+            try:
+                outcomes.append(future.result())
+
+            except Exception as e:
+                outcomes.append(e)
+
+        return outcomes
+
+
+    @staticmethod
+    async def generate_async(prompt: str) -> tuple:
+        """
+        Async variant of `generate` for the ASGI serving path.
+        :param prompt: The input prompt for AI generation.
+        :return: Tuple of (generated text, cached) where cached is True for cache hits.
+        :raises ServiceUnavailableError: If OpenAI API call fails.
+        """
+        params = OpenAIService.generation_params()
+
+        generated_response = await _run_cache_call(response_cache.get, prompt, params)
+
+        if generated_response is not None:
+            return generated_response, True
+
+        async def call_upstream():
+            # A leader may have filled the cache between our miss and becoming leader
+            response = await _run_cache_call(response_cache.get, prompt, params, False)
+
+            if response is not None:
+                return response, True
+
+            # Near-duplicate lookups read the database; keep them off the event loop
+            response = await asyncio.to_thread(semantic_cache.get, prompt, params) if semantic_cache.enabled else None
+
+            if response is not None:
+                await _run_cache_call(response_cache.set, prompt, params, response)
+                return response, True
+
+            response = await OpenAIService.generate_text_async(prompt=prompt)
+            await _run_cache_call(response_cache.set, prompt, params, response)
+
+            return response, False
+
+        (generated_response, cached), _ = await async_upstream_flight.do(ResponseCache.make_key(prompt, params), call_upstream)
+        return generated_response, cached
+
+
+async def _run_cache_call(fn, *args):
+    """Call a response cache method, in a worker thread when the backend does network I/O."""
+    if response_cache.blocking:
+        return await asyncio.to_thread(fn, *args)
+
+    return fn(*args)
+
+
+def _reset_batch_executor_after_fork():
+    """Worker threads do not survive fork; give the child a fresh pool."""
+    global batch_executor
+    batch_executor = _build_batch_executor()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_batch_executor_after_fork)
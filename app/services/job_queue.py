@@ -0,0 +1,343 @@
+import os
+import time
+import uuid
+import datetime
+import threading
+from typing import Optional
+from sqlalchemy.orm import sessionmaker
+from app.config import Config, logging
+from collections import deque, OrderedDict
+from app.database import engine, db_session
+from sqlalchemy import select, update, func, or_
+from app.models.generation_job import GenerationJob
+from app.services.generation_service import GenerationService
+from app.services.generated_text_service import GeneratedTextService
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+FINISHED_STATUSES = (SUCCEEDED, FAILED)
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _new_job(user_id: int, prompt: str) -> dict:
+    now = _utcnow()
+
+    return {
+        "id": uuid.uuid4().hex,
+        "user_id": user_id,
+        "prompt": prompt,
+        "status": QUEUED,
+        "result_id": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now
+    }
+
+
+class MemoryJobBackend:
+    """
+    In-process job store. Queued jobs are kept per user and claimed round-robin,
+    so one user submitting many jobs cannot starve everyone else.
+    Jobs are lost on restart and are only visible to the process that queued them,
+    so this backend is only usable with a single worker process.
+    """
+
+    def __init__(self, max_finished: int = 10000):
+        self.max_finished = max_finished
+
+        self._jobs = {}
+        self._queues = OrderedDict()
+        self._finished = deque()
+        self._lock = threading.Lock()
+
+
+    def enqueue(self, job: dict):
+        with self._lock:
+            self._jobs[job["id"]] = job
+            self._queues.setdefault(job["user_id"], deque()).append(job["id"])
+
+
+    def claim(self) -> Optional[dict]:
+        with self._lock:
+            if not self._queues:
+                return None
+
+            # Serve the user at the head of the rotation, then move them to the back
+            user_id, queue = self._queues.popitem(last=False)
+            job = self._jobs[queue.popleft()]
+
+            if queue:
+                self._queues[user_id] = queue
+
+            job.update(status=RUNNING, updated_at=_utcnow())
+            return dict(job)
+
+
+    def finish(self, job_id: str, result_id: int = None, error: str = None):
+        with self._lock:
+            self._jobs[job_id].update(
+                status=FAILED if error else SUCCEEDED,
+                result_id=result_id,
+                error=error,
+                updated_at=_utcnow()
+            )
+
+            # Forget the oldest finished jobs; clients are expected to collect results promptly
+            self._finished.append(job_id)
+
+            while len(self._finished) > self.max_finished:
+                self._jobs.pop(self._finished.popleft(), None)
+
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+
+    def reset_after_fork(self):
+        self._lock = threading.Lock()
+
+
+class DatabaseJobBackend:
+    """
+    Job store in the application database, shared by every worker process.
+    Claims are atomic conditional UPDATEs, so each job runs once. Fairness is by load:
+    the next job goes to the user with the fewest running jobs, oldest job first.
+    A running job whose worker died is claimed again once its lease expires.
+    """
+
+    def __init__(self, lease_seconds: int):
+        self.lease_seconds = lease_seconds
+
+        # Own sessions, so queue bookkeeping never commits or closes a request's session
+        self._sessions = sessionmaker(bind=engine)
+
+
+    def enqueue(self, job: dict):
+        with self._sessions() as session:
+            session.add(GenerationJob(**job))
+            session.commit()
+
+
+    def claim(self) -> Optional[dict]:
+        running = GenerationJob.__table__.alias("running")
+        lease_cutoff = _utcnow() - datetime.timedelta(seconds=self.lease_seconds)
+
+        user_load = (
+            select(func.count())
+            .where(running.c.user_id == GenerationJob.user_id, running.c.status == RUNNING)
+            .scalar_subquery()
+        )
+
+        claimable = or_(
+            GenerationJob.status == QUEUED,
+            (GenerationJob.status == RUNNING) & (GenerationJob.updated_at < lease_cutoff)
+        )
+
+        with self._sessions() as session:
+            # Another process may claim a candidate first; try the next few before giving up
+            for _ in range(3):
+                candidate = session.execute(
+                    select(GenerationJob.id, GenerationJob.status, GenerationJob.updated_at)
+                    .where(claimable)
+                    .order_by(user_load, GenerationJob.created_at)
+                    .limit(1)
+                ).first()
+
+                if candidate is None:
+                    return None
+
+                claimed = session.execute(
+                    update(GenerationJob)
+                    .where(
+                        GenerationJob.id == candidate.id,
+                        GenerationJob.status == candidate.status,
+                        GenerationJob.updated_at == candidate.updated_at
+                    )
+                    .values(status=RUNNING, updated_at=_utcnow())
+                )
+                session.commit()
+
+                if claimed.rowcount == 1:
+                    return self._to_dict(session.get(GenerationJob, candidate.id))
+
+            return None
+
+
+    def finish(self, job_id: str, result_id: int = None, error: str = None):
+        with self._sessions() as session:
+            session.execute(
+                update(GenerationJob)
+                .where(GenerationJob.id == job_id)
+                .values(status=FAILED if error else SUCCEEDED, result_id=result_id, error=error, updated_at=_utcnow())
+            )
+            session.commit()
+
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._sessions() as session:
+            job = session.get(GenerationJob, job_id)
+            return self._to_dict(job) if job else None
+
+
+    def reset_after_fork(self):
+        pass
+
+
+    @staticmethod
+    def _to_dict(job) -> dict:
+        return {column.name: getattr(job, column.name) for column in GenerationJob.__table__.columns}
+
+
+class JobQueue:
+    """
+    Runs queued text generations on a pool of background worker threads.
+    Workers start on first use in each process, so a pre-forking server never forks running threads.
+    """
+
+    def __init__(self, backend, workers: int, poll_interval: float):
+        self.backend = backend
+        self.workers = workers
+        self.poll_interval = poll_interval
+
+        self._threads = []
+        self._changed = threading.Condition()
+        self._pid = os.getpid()
+
+
+    def submit(self, user_id: int, prompt: str) -> dict:
+        """
+        Queue a generation job.
+        :return: The queued job.
+        """
+        self.start()
+
+        job = _new_job(user_id, prompt)
+        self.backend.enqueue(job)
+
+        with self._changed:
+            self._changed.notify_all()
+
+        return dict(job)
+
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self.backend.get(job_id)
+
+
+    def wait(self, job_id: str, timeout: float) -> Optional[dict]:
+        """
+        Long-poll a job until it finishes or `timeout` seconds pass.
+        Local completions wake waiters immediately; jobs finished by other processes are
+        noticed within `poll_interval`.
+        :return: The job in its latest state, or None if it does not exist.
+        """
+        deadline = time.monotonic() + timeout
+
+        while True:
+            job = self.backend.get(job_id)
+            remaining = deadline - time.monotonic()
+
+            if job is None or job["status"] in FINISHED_STATUSES or remaining <= 0:
+                return job
+
+            with self._changed:
+                self._changed.wait(min(remaining, self.poll_interval))
+
+
+    def start(self):
+        """Start the worker threads if this process has not started them yet."""
+        if self._pid != os.getpid():
+            self._reset_after_fork()
+
+        if self._threads:
+            return
+
+        with self._changed:
+            if self._threads:
+                return
+
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"generation-job-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+
+    def _work(self):
+        while True:
+            try:
+                job = self.backend.claim()
+
+                if job is None:
+                    with self._changed:
+                        self._changed.wait(self.poll_interval)
+
+                    continue
+
+                self._run(job)
+
+            except Exception as e:
+                # Keep the worker alive through transient backend failures
+                logging.error(f"Generation job worker error: {e}")
+                time.sleep(self.poll_interval)
+                continue
+
+            with self._changed:
+                self._changed.notify_all()
+
+
+    def _run(self, job: dict):
+        try:
+            generated_response, _ = GenerationService.generate(prompt=job["prompt"])
+            stored_data = GeneratedTextService.store_generated_text(job["user_id"], job["prompt"], generated_response)
+
+        except Exception as e:
+            logging.warning(f"Generation job {job['id']} failed: {e}")
+            self.backend.finish(job["id"], error=str(e))
+            return
+
+        except BaseException:
+            # The worker thread is going away; never leave the job `running` with nobody to finish it
+            self.backend.finish(job["id"], error="Generation was interrupted.")
+            raise
+
+        finally:
+            db_session.remove()
+
+        self.backend.finish(job["id"], result_id=stored_data["id"])
+
+
+    def _reset_after_fork(self):
+        """Child-side fork hook: the parent's worker threads do not exist here."""
+        self._threads = []
+        self._changed = threading.Condition()
+        self._pid = os.getpid()
+        self.backend.reset_after_fork()
+
+
+    @classmethod
+    def from_config(cls) -> "JobQueue":
+        """Build the queue selected by Config.JOB_QUEUE_BACKEND."""
+        if Config.JOB_QUEUE_BACKEND == "database":
+            backend = DatabaseJobBackend(lease_seconds=Config.JOB_QUEUE_LEASE_SECONDS)
+
+        elif Config.JOB_QUEUE_BACKEND == "memory":
+            backend = MemoryJobBackend()
+
+        else:
+            raise EnvironmentError(f"Unknown JOB_QUEUE_BACKEND: {Config.JOB_QUEUE_BACKEND}")
+
+        return cls(backend, workers=Config.JOB_QUEUE_WORKERS, poll_interval=Config.JOB_QUEUE_POLL_INTERVAL)
+
+
+job_queue = JobQueue.from_config()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=job_queue._reset_after_fork)
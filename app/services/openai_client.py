@@ -0,0 +1,176 @@
+import os
+import httpx
+import asyncio
+import weakref
+import threading
+from app.config import Config, logging
+from openai import OpenAI, AsyncOpenAI
+
+
+class OpenAIClientRegistry:
+    """
+    Process-wide registry of pooled OpenAI clients.
+
+    Clients are keyed by (api_key, base_url) and share one HTTPX connection pool,
+    so keep-alive connections and TLS sessions are reused across requests.
+    SDK retries are disabled; `UpstreamGuard` owns the retry policy.
+    The registry is reset in forked children, since sockets must never be shared between processes.
+    """
+
+    _clients = {}
+    _async_clients = weakref.WeakKeyDictionary()
+    _lock = threading.Lock()
+    _pid = os.getpid()
+
+    @classmethod
+    def get_client(cls, api_key: str = None, base_url: str = None) -> OpenAI:
+        """
+        Return the pooled client for the given credentials, creating it on first use.
+        :param api_key: OpenAI API key, defaults to Config.OPENAI_API_KEY.
+        :param base_url: API base URL, defaults to Config.OPENAI_BASE_URL.
+        :return: A shared OpenAI client.
+        """
+        key = cls.resolve_endpoint(api_key, base_url)
+
+        if cls._pid != os.getpid():
+            cls.reset(close=False)
+
+        client = cls._clients.get(key)
+
+        if client is None:
+            with cls._lock:
+                client = cls._clients.get(key)
+
+                if client is None:
+                    client = OpenAI(api_key=key[0], base_url=key[1], max_retries=0, http_client=cls._build_http_client())
+                    cls._clients[key] = client
+
+        return client
+
+
+    @classmethod
+    def get_async_client(cls, api_key: str = None, base_url: str = None) -> AsyncOpenAI:
+        """
+        Return the pooled async client for the running event loop, creating it on first use.
+        Async connection pools are bound to the loop that created them, so each loop gets its own.
+        :param api_key: OpenAI API key, defaults to Config.OPENAI_API_KEY.
+        :param base_url: API base URL, defaults to Config.OPENAI_BASE_URL.
+        :return: A shared AsyncOpenAI client.
+        """
+        key = cls.resolve_endpoint(api_key, base_url)
+        loop = asyncio.get_running_loop()
+
+        if cls._pid != os.getpid():
+            cls.reset(close=False)
+
+        clients = cls._async_clients.setdefault(loop, {})
+        client = clients.get(key)
+
+        if client is None:
+            client = AsyncOpenAI(api_key=key[0], base_url=key[1], max_retries=0, http_client=cls._build_async_http_client())
+            clients[key] = client
+
+        return client
+
+
+    @staticmethod
+    def resolve_endpoint(api_key: str = None, base_url: str = None) -> tuple:
+        """
+        Fill in the default credentials and base URL. With OPENAI_FAKE_UPSTREAM set, the default
+        is this process's built-in fake upstream, which accepts any key.
+        :return: Tuple of (api_key, base_url).
+        """
+        if base_url is None and Config.OPENAI_FAKE_UPSTREAM:
+            from app.utils.fake_openai import local_base_url
+
+            return api_key or Config.OPENAI_API_KEY or "fake", local_base_url()
+
+        return api_key or Config.OPENAI_API_KEY, base_url or Config.OPENAI_BASE_URL
+
+
+    @classmethod
+    def reset(cls, close: bool = True):
+        """
+        Drop every pooled client.
+        :param close: Close the underlying connection pools. Pass False in a forked child,
+            where the inherited sockets belong to the parent.
+        """
+        with cls._lock:
+            clients = list(cls._clients.values())
+            cls._clients = {}
+            # Async clients can only be closed from their own loop; dropping them is enough
+            cls._async_clients = weakref.WeakKeyDictionary()
+            cls._pid = os.getpid()
+
+        if close:
+            for client in clients:
+                client.close()
+
+
+    @classmethod
+    def _reset_after_fork(cls):
+        """
+        Child-side fork hook. Another thread may have held `_lock` at fork time and will never
+        release it in the child, so replace the lock instead of acquiring it.
+        """
+        cls._lock = threading.Lock()
+        cls._clients = {}
+        cls._async_clients = weakref.WeakKeyDictionary()
+        cls._pid = os.getpid()
+
+
+    @staticmethod
+    def build_limits() -> httpx.Limits:
+        """Connection pool limits from Config."""
+        return httpx.Limits(
+            max_connections=Config.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=Config.OPENAI_KEEPALIVE_EXPIRY
+        )
+
+
+    @staticmethod
+    def build_timeout() -> httpx.Timeout:
+        """Connect/read timeouts from Config."""
+        return httpx.Timeout(
+            Config.OPENAI_READ_TIMEOUT,
+            connect=Config.OPENAI_CONNECT_TIMEOUT
+        )
+
+
+    @staticmethod
+    def http2_enabled() -> bool:
+        """HTTP/2 is used only when requested and the `h2` package is installed."""
+        if not Config.OPENAI_HTTP2:
+            return False
+
+        try:
+            import h2  # noqa: F401
+            return True
+
+        except ImportError:
+            logging.warning("OPENAI_HTTP2 is enabled but the 'h2' package is not installed; falling back to HTTP/1.1.")
+            return False
+
+
+    @classmethod
+    def _build_http_client(cls) -> httpx.Client:
+        return httpx.Client(
+            limits=cls.build_limits(),
+            timeout=cls.build_timeout(),
+            http2=cls.http2_enabled()
+        )
+
+
+    @classmethod
+    def _build_async_http_client(cls) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            limits=cls.build_limits(),
+            timeout=cls.build_timeout(),
+            http2=cls.http2_enabled()
+        )
+
+
+# Never hand inherited connection pools to a forked worker
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=OpenAIClientRegistry._reset_after_fork)
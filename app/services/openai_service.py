@@ -1,12 +1,29 @@
 import openai
-from openai import OpenAI
+from typing import Iterator
 from app.config import Config
+from app.utils.metrics import upstream_tokens
+from app.services.upstream_guard import upstream_guard
+from app.services.openai_client import OpenAIClientRegistry
 from app.utils.errors import BadRequestError, ServiceUnavailableError
 
 
 class OpenAIService:
     """Handles communication with OpenAI's API for text generation."""
 
+    @staticmethod
+    def generation_params() -> dict:
+        """Model parameters that determine a completion, used to key cached responses."""
+        return {"model": Config.OPENAI_MODEL}
+
+
+    @staticmethod
+    def record_usage(response):
+        """Feed a completion's token counts into the upstream token histograms."""
+        if response.usage is not None:
+            upstream_tokens.observe(response.usage.prompt_tokens, "prompt")
+            upstream_tokens.observe(response.usage.completion_tokens, "completion")
+
+
     @staticmethod
     def generate_text(prompt: str) -> str:
         """
@@ -18,22 +35,90 @@ class OpenAIService:
         :raises ServiceUnavailableError: If OpenAI API call fails.
         """
         try:
-            client = OpenAI(
-                api_key=Config.OPENAI_API_KEY
-            )
+            client = OpenAIClientRegistry.get_client()
 
-            response = client.chat.completions.create(
-                model="gpt-4o",
+            response = upstream_guard.call(lambda: client.chat.completions.create(
+                model=Config.OPENAI_MODEL,
                 store=True,
                 messages=[
                     {"role": "user", "content": prompt}
                 ]
-            )
+            ))
 
+            OpenAIService.record_usage(response)
             return response.choices[0].message.content
         
+        except ServiceUnavailableError:
+            # Short-circuited by the upstream guard
+            raise
+
+        except openai.OpenAIError as e:
+            raise ServiceUnavailableError("OpenAI API is currently unavailable. Please try again later.", verboseMessage=str(e))
+
+        except Exception as e:
+            raise BadRequestError(str(e))
+
+
+    @staticmethod
+    async def generate_text_async(prompt: str) -> str:
+        """
+        Async variant of `generate_text` for the ASGI serving path.
+
+        :param prompt: The input prompt for AI generation.
+        :return: The generated text response from OpenAI.
+        :raises ServiceUnavailableError: If OpenAI API call fails.
+        """
+        try:
+            client = OpenAIClientRegistry.get_async_client()
+
+            response = await upstream_guard.call_async(lambda: client.chat.completions.create(
+                model=Config.OPENAI_MODEL,
+                store=True,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            ))
+
+            OpenAIService.record_usage(response)
+            return response.choices[0].message.content
+
+        except ServiceUnavailableError:
+            # Short-circuited by the upstream guard
+            raise
+
         except openai.OpenAIError as e:
             raise ServiceUnavailableError("OpenAI API is currently unavailable. Please try again later.", verboseMessage=str(e))
 
         except Exception as e:
-            raise BadRequestError(str(e))
\ No newline at end of file
+            raise BadRequestError(str(e))
+
+
+    @staticmethod
+    def stream_text(prompt: str) -> Iterator[str]:
+        """
+        Sends a prompt to OpenAI and yields the generated text as it arrives.
+
+        :param prompt: The input prompt for AI generation.
+        :return: Iterator over the content deltas of the completion.
+        :raises ServiceUnavailableError: If OpenAI API call fails.
+        """
+        try:
+            client = OpenAIClientRegistry.get_client()
+
+            # Guards opening the stream, where rate limits and outages surface; deltas already sent cannot be retried
+            stream = upstream_guard.call(lambda: client.chat.completions.create(
+                model=Config.OPENAI_MODEL,
+                store=True,
+                stream=True,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            ))
+
+            with stream:
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+
+        except openai.OpenAIError as e:
+            raise ServiceUnavailableError("OpenAI API is currently unavailable. Please try again later.", verboseMessage=str(e))
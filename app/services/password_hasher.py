@@ -0,0 +1,158 @@
+import os
+import time
+import threading
+from app.config import Config
+from flask import g, has_request_context
+from app.utils.errors import ServiceUnavailableError
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+
+
+def _timed_call(fn, *args):
+    """Run `fn` in the pool and report how long the key derivation itself took."""
+    started = time.perf_counter()
+    result = fn(*args)
+
+    return result, time.perf_counter() - started
+
+
+def expand_method(method: str) -> str:
+    """
+    The parameter prefix Werkzeug writes for a hash method, with its defaults filled in
+    (e.g. "scrypt" -> "scrypt:32768:8:1"), without deriving a key.
+    """
+    name, *args = method.split(":")
+
+    if name == "scrypt":
+        return f"scrypt:{':'.join(args) if args else f'{2 ** 15}:8:1'}"
+
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = args[1] if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+
+    return method
+
+
+class PasswordHasher:
+    """
+    Runs password hashing on a bounded pool instead of the request thread.
+
+    Key derivation is deliberately slow, so a login storm could otherwise occupy every
+    request thread of a worker. At most `max_pending` hashes may be queued or running;
+    beyond that, callers are rejected immediately with ServiceUnavailableError (503)
+    rather than waiting behind the backlog.
+    """
+
+    def __init__(self, method: str, workers: int, max_pending: int, use_processes: bool = False):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self.use_processes = use_processes
+
+        self.operations = 0
+        self.rejected = 0
+        self.hash_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.max_hash_seconds = 0.0
+
+        self._pending = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+
+    def hash(self, password: str) -> str:
+        """
+        Hash a password with the configured method.
+        :raises ServiceUnavailableError: If the hashing queue is full.
+        """
+        return self._run(generate_password_hash, password, self.method)
+
+
+    def check(self, password_hash: str, password: str) -> bool:
+        """
+        Check a password against a stored hash.
+        :raises ServiceUnavailableError: If the hashing queue is full.
+        """
+        return self._run(check_password_hash, password_hash, password)
+
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """True when a stored hash was made with other parameters than the configured method."""
+        return password_hash.split("$", 1)[0] != expand_method(self.method)
+
+
+    def stats(self) -> dict:
+        return {
+            "method": self.method,
+            "workers": self.workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "operations": self.operations,
+            "rejected": self.rejected,
+            "hash_seconds_total": round(self.hash_seconds, 6),
+            "wait_seconds_total": round(self.wait_seconds, 6),
+            "max_hash_seconds": round(self.max_hash_seconds, 6)
+        }
+
+
+    def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise ServiceUnavailableError("Too many authentication requests in progress. Please try again shortly.")
+
+            self._pending += 1
+            executor = self._get_executor()
+
+        submitted = time.perf_counter()
+
+        try:
+            result, hash_seconds = executor.submit(_timed_call, fn, *args).result()
+
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+        elapsed = time.perf_counter() - submitted
+
+        with self._lock:
+            self.operations += 1
+            self.hash_seconds += hash_seconds
+            self.wait_seconds += max(0.0, elapsed - hash_seconds)
+            self.max_hash_seconds = max(self.max_hash_seconds, hash_seconds)
+
+        # Per-request total, reported to the client in a Server-Timing header
+        if has_request_context():
+            g.password_hash_seconds = g.get("password_hash_seconds", 0.0) + elapsed
+
+        return result
+
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+
+        return self._executor
+
+
+    def _reset_after_fork(self):
+        """Child-side fork hook: pool threads and processes belong to the parent."""
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+
+password_hasher = PasswordHasher(
+    method=Config.PASSWORD_HASH_METHOD,
+    workers=Config.PASSWORD_HASH_WORKERS,
+    max_pending=Config.PASSWORD_HASH_MAX_PENDING,
+    use_processes=Config.PASSWORD_HASH_POOL == "process"
+)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=password_hasher._reset_after_fork)
@@ -0,0 +1,325 @@
+import os
+import math
+import time
+import threading
+from app.config import Config
+from typing import Optional, Sequence
+
+
+class MemoryRateLimitBackend:
+    """
+    Per-process token buckets and in-flight counters.
+
+    Limits apply per worker process, so with N workers a user gets up to N times the
+    configured rates; use the redis backend to share one budget across workers.
+    """
+
+    # Everything happens under one in-memory lock and never blocks an event loop
+    blocking = False
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+
+        self._buckets = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+
+    def acquire(self, key: str, buckets: Sequence[tuple], costs: Sequence[float]) -> float:
+        """
+        Take `costs` from every bucket of `key`, or from none of them.
+        :param buckets: Tuples of (name, refill rate per second, capacity).
+        :return: 0 when admitted, otherwise the seconds until all buckets could cover their cost.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            remaining = []
+            retry_after = 0.0
+
+            for (name, rate, capacity), cost in zip(buckets, costs):
+                state = self._buckets.pop((key, name), None)
+                tokens = capacity if state is None else min(capacity, state[0] + (now - state[1]) * rate)
+
+                if tokens < cost:
+                    retry_after = max(retry_after, (cost - tokens) / rate)
+
+                remaining.append((name, tokens, cost))
+
+            # Re-inserting keeps the dict ordered from least to most recently used
+            for name, tokens, cost in remaining:
+                self._buckets[(key, name)] = (tokens if retry_after else tokens - cost, now)
+
+            # Forgetting an idle bucket only hands that user a fresh burst
+            while len(self._buckets) > self.max_keys:
+                del self._buckets[next(iter(self._buckets))]
+
+            return retry_after
+
+
+    def try_enter(self, key: str, limit: int) -> bool:
+        """Claim one of `limit` in-flight slots for `key`."""
+        with self._lock:
+            count = self._in_flight.get(key, 0)
+
+            if count >= limit:
+                return False
+
+            self._in_flight[key] = count + 1
+            return True
+
+
+    def leave(self, key: str):
+        with self._lock:
+            count = self._in_flight.pop(key, 0) - 1
+
+            if count > 0:
+                self._in_flight[key] = count
+
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._in_flight.clear()
+
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "buckets": len(self._buckets), "in_flight": sum(self._in_flight.values())}
+
+
+    def _reset_after_fork(self):
+        """Child-side fork hook: slots held by the parent's requests are not ours to release."""
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+
+# All-or-nothing multi-bucket take. KEYS: bucket keys; ARGV: ttl, then rate, capacity, cost per bucket.
+# Uses the server clock so every worker agrees on elapsed time.
+_ACQUIRE_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local ttl = tonumber(ARGV[1])
+local retry_after = 0
+local remaining = {}
+
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local capacity = tonumber(ARGV[i * 3])
+    local cost = tonumber(ARGV[i * 3 + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'updated')
+    local tokens = capacity
+
+    if state[1] then
+        tokens = math.min(capacity, tonumber(state[1]) + (now - tonumber(state[2])) * rate)
+    end
+
+    if tokens < cost then
+        retry_after = math.max(retry_after, (cost - tokens) / rate)
+    end
+
+    remaining[i] = tokens - cost
+end
+
+if retry_after > 0 then
+    return tostring(retry_after)
+end
+
+for i, key in ipairs(KEYS) do
+    redis.call('HSET', key, 'tokens', tostring(remaining[i]), 'updated', tostring(now))
+    redis.call('EXPIRE', key, ttl)
+end
+
+return '0'
+"""
+
+_ENTER_SCRIPT = """
+local count = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+
+if count > tonumber(ARGV[1]) then
+    redis.call('DECR', KEYS[1])
+    return 0
+end
+
+return 1
+"""
+
+
+class RedisRateLimitBackend:
+    """
+    Token buckets and in-flight counters shared by every worker through Redis.
+    Each check is one atomic script call. In-flight counters expire after `slot_ttl`
+    seconds without activity, so a crashed worker cannot hold a user's slots forever.
+    """
+
+    # Every call is a network round trip
+    blocking = True
+
+    def __init__(self, url: str, slot_ttl: int, prefix: str = "rate-limit:"):
+        try:
+            import redis
+
+        except ImportError:
+            raise EnvironmentError("RATE_LIMIT_BACKEND=redis requires the 'redis' package.")
+
+        self.slot_ttl = slot_ttl
+        self.prefix = prefix
+
+        self._client = redis.Redis.from_url(url)
+        self._acquire = self._client.register_script(_ACQUIRE_SCRIPT)
+        self._enter = self._client.register_script(_ENTER_SCRIPT)
+
+
+    def acquire(self, key: str, buckets: Sequence[tuple], costs: Sequence[float]) -> float:
+        keys = [f"{self.prefix}{key}:{name}" for name, _, _ in buckets]
+        args = [math.ceil(max(capacity / rate for _, rate, capacity in buckets))]
+
+        for (_, rate, capacity), cost in zip(buckets, costs):
+            args.extend((rate, capacity, cost))
+
+        return float(self._acquire(keys=keys, args=args))
+
+
+    def try_enter(self, key: str, limit: int) -> bool:
+        return bool(self._enter(keys=[f"{self.prefix}{key}:in-flight"], args=[limit, self.slot_ttl]))
+
+
+    def leave(self, key: str):
+        self._client.decr(f"{self.prefix}{key}:in-flight")
+
+
+    def clear(self):
+        for key in self._client.scan_iter(f"{self.prefix}*"):
+            self._client.delete(key)
+
+
+    def stats(self) -> dict:
+        return {"backend": "redis"}
+
+
+class RateLimiter:
+    """
+    Per-user admission control for generation requests.
+
+    Each user has two token buckets: requests per second (with a burst allowance) and
+    estimated OpenAI tokens per minute. A request is admitted only when both buckets can
+    cover it; otherwise nothing is taken and the caller learns how long to wait. On top
+    of the rates, `max_in_flight` caps how many generations one user may run at once.
+    A limit of 0 disables that check.
+    """
+
+    def __init__(self, backend=None, requests_per_second: float = 0, burst: int = 0, tokens_per_minute: int = 0, max_in_flight: int = 0):
+        self.backend = backend
+        self.max_in_flight = max_in_flight
+
+        self.admitted = 0
+        self.rejected = 0
+
+        self._buckets = []
+
+        if requests_per_second > 0:
+            self._buckets.append(("requests", requests_per_second, max(burst, 1)))
+
+        if tokens_per_minute > 0:
+            self._buckets.append(("tokens", tokens_per_minute / 60, tokens_per_minute))
+
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+
+    def acquire(self, user_id, requests: int = 1, tokens: int = 0) -> float:
+        """
+        Charge a request (or a batch of `requests`) estimated at `tokens` against the user's budget.
+        Costs larger than a bucket's capacity are capped, so oversized requests still get through once the bucket is full.
+        :return: 0 when admitted, otherwise the seconds to wait before retrying.
+        """
+        if not self.enabled or not self._buckets:
+            return 0.0
+
+        costs = [min(requests if name == "requests" else tokens, capacity) for name, _, capacity in self._buckets]
+        retry_after = self.backend.acquire(str(user_id), self._buckets, costs)
+
+        if retry_after:
+            self.rejected += 1
+
+        else:
+            self.admitted += 1
+
+        return retry_after
+
+
+    def enter(self, user_id) -> bool:
+        """Claim an in-flight slot; every successful call must be paired with `leave`."""
+        if not self.enabled or self.max_in_flight <= 0:
+            return True
+
+        if self.backend.try_enter(str(user_id), self.max_in_flight):
+            return True
+
+        self.rejected += 1
+        return False
+
+
+    def leave(self, user_id):
+        if self.enabled and self.max_in_flight > 0:
+            self.backend.leave(str(user_id))
+
+
+    def clear(self):
+        """Reset every bucket, slot and counter."""
+        self.admitted = 0
+        self.rejected = 0
+
+        if self.enabled:
+            self.backend.clear()
+
+
+    def stats(self) -> dict:
+        if not self.enabled:
+            return {"enabled": False}
+
+        return {
+            "enabled": True,
+            **self.backend.stats(),
+            "limits": {name: {"rate_per_second": rate, "capacity": capacity} for name, rate, capacity in self._buckets},
+            "max_in_flight": self.max_in_flight,
+            "admitted": self.admitted,
+            "rejected": self.rejected
+        }
+
+
+    @classmethod
+    def from_config(cls) -> "RateLimiter":
+        if not Config.RATE_LIMIT_ENABLED:
+            return cls()
+
+        if Config.RATE_LIMIT_BACKEND == "redis":
+            # A slot outlives the longest request it could guard
+            backend = RedisRateLimitBackend(Config.REDIS_URL, slot_ttl=int(Config.APP_WORKER_TIMEOUT) * 2)
+
+        elif Config.RATE_LIMIT_BACKEND == "memory":
+            backend = MemoryRateLimitBackend()
+
+        else:
+            raise EnvironmentError(f"Unknown RATE_LIMIT_BACKEND: {Config.RATE_LIMIT_BACKEND}")
+
+        return cls(
+            backend,
+            requests_per_second=Config.RATE_LIMIT_REQUESTS_PER_SECOND,
+            burst=Config.RATE_LIMIT_BURST,
+            tokens_per_minute=Config.RATE_LIMIT_TOKENS_PER_MINUTE,
+            max_in_flight=Config.RATE_LIMIT_MAX_IN_FLIGHT
+        )
+
+
+def estimate_tokens(prompt: Optional[str]) -> int:
+    """Rough OpenAI token count of a generation: ~4 characters per prompt token plus the expected completion."""
+    return len(prompt or "") // 4 + Config.RATE_LIMIT_COMPLETION_TOKENS
+
+
+rate_limiter = RateLimiter.from_config()
+
+if hasattr(os, "register_at_fork") and isinstance(rate_limiter.backend, MemoryRateLimitBackend):
+    os.register_at_fork(after_in_child=rate_limiter.backend._reset_after_fork)
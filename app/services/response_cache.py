@@ -0,0 +1,249 @@
+import json
+import time
+import hashlib
+import threading
+import unicodedata
+from typing import Optional
+from collections import OrderedDict
+from app.config import Config, logging
+
+
+class MemoryCacheBackend:
+    """In-process LRU cache with a per-entry TTL and a total size cap in bytes."""
+
+    # Lookups are in-memory and never block an event loop
+    blocking = False
+
+    def __init__(self, max_bytes: int, ttl: int):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def get(self, key: str, record_miss: bool = True) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += record_miss
+                return None
+
+            value, expires_at, size = entry
+
+            if expires_at <= time.monotonic():
+                self._remove(key, size)
+                self.evictions += 1
+                self.misses += record_miss
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+
+    def set(self, key: str, value: str):
+        size = len(key) + len(value.encode("utf-8"))
+
+        # An entry larger than the whole cache would only flush everything else
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            existing = self._entries.pop(key, None)
+
+            if existing is not None:
+                self.size -= existing[2]
+
+            self._entries[key] = (value, time.monotonic() + self.ttl, size)
+            self.size += size
+
+            while self.size > self.max_bytes:
+                oldest_key, (_, _, oldest_size) = next(iter(self._entries.items()))
+                self._remove(oldest_key, oldest_size)
+                self.evictions += 1
+
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "size_bytes": self.size,
+            "max_bytes": self.max_bytes
+        }
+
+
+    def _remove(self, key: str, size: int):
+        del self._entries[key]
+        self.size -= size
+
+
+class RedisCacheBackend:
+    """
+    Shared cache for multi-worker deployments.
+    Redis enforces TTLs itself; size and LRU eviction follow the server's `maxmemory` policy.
+    """
+
+    # Every call is a network round trip
+    blocking = True
+
+    def __init__(self, url: str, ttl: int, prefix: str = "response-cache:"):
+        try:
+            import redis
+
+        except ImportError:
+            raise EnvironmentError("RESPONSE_CACHE_BACKEND=redis requires the 'redis' package.")
+
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+        self._client = redis.Redis.from_url(url)
+
+
+    def get(self, key: str, record_miss: bool = True) -> Optional[str]:
+        value = self._client.get(self.prefix + key)
+
+        if value is None:
+            self.misses += record_miss
+            return None
+
+        self.hits += 1
+        return value.decode("utf-8")
+
+
+    def set(self, key: str, value: str):
+        self._client.set(self.prefix + key, value.encode("utf-8"), ex=self.ttl)
+
+
+    def clear(self):
+        """Drop this cache's keys and reset the local counters."""
+        for key in self._client.scan_iter(match=self.prefix + "*"):
+            self._client.delete(key)
+
+        self.hits = 0
+        self.misses = 0
+
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis",
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self._client.info("stats").get("evicted_keys", 0)
+        }
+
+
+class ResponseCache:
+    """Caches generated responses keyed on the normalized prompt plus model parameters."""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+
+    @property
+    def blocking(self) -> bool:
+        """True when lookups do network I/O and must be kept off an event loop."""
+        return self.enabled and self.backend.blocking
+
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        """Collapse whitespace and Unicode representation differences that do not change meaning."""
+        return " ".join(unicodedata.normalize("NFC", prompt).split())
+
+
+    @classmethod
+    def make_key(cls, prompt: str, params: dict) -> str:
+        """Stable digest of the normalized prompt and the model parameters."""
+        material = json.dumps({"prompt": cls.normalize_prompt(prompt), "params": params}, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+    def get(self, prompt: str, params: dict, record_miss: bool = True) -> Optional[str]:
+        """
+        Look up a cached response.
+        :param record_miss: Count a miss in the statistics. Repeat lookups for the same request pass False.
+        :return: The cached response, or None on a miss or when caching is disabled.
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            return self.backend.get(self.make_key(prompt, params), record_miss)
+
+        except Exception as e:
+            # A broken cache must never fail a generation
+            logging.warning(f"Response cache lookup failed: {e}")
+            return None
+
+
+    def set(self, prompt: str, params: dict, response: str):
+        """Store a generated response."""
+        if not self.enabled:
+            return
+
+        try:
+            self.backend.set(self.make_key(prompt, params), response)
+
+        except Exception as e:
+            logging.warning(f"Response cache write failed: {e}")
+
+
+    def clear(self):
+        if self.enabled:
+            self.backend.clear()
+
+
+    def stats(self) -> dict:
+        if not self.enabled:
+            return {"backend": None}
+
+        return self.backend.stats()
+
+
+    @classmethod
+    def from_config(cls) -> "ResponseCache":
+        """Build the cache selected by Config.RESPONSE_CACHE_BACKEND."""
+        if not Config.RESPONSE_CACHE_ENABLED:
+            return cls()
+
+        if Config.RESPONSE_CACHE_BACKEND == "redis":
+            return cls(RedisCacheBackend(Config.REDIS_URL, ttl=Config.RESPONSE_CACHE_TTL_SECONDS))
+
+        if Config.RESPONSE_CACHE_BACKEND != "memory":
+            raise EnvironmentError(f"Unknown RESPONSE_CACHE_BACKEND: {Config.RESPONSE_CACHE_BACKEND}")
+
+        return cls(MemoryCacheBackend(
+            max_bytes=Config.RESPONSE_CACHE_MAX_BYTES,
+            ttl=Config.RESPONSE_CACHE_TTL_SECONDS
+        ))
+
+
+response_cache = ResponseCache.from_config()
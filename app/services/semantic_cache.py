@@ -0,0 +1,582 @@
+import os
+import re
+import json
+import zlib
+import hashlib
+import threading
+import unicodedata
+import numpy as np
+from typing import Optional
+from sqlalchemy import select
+from app.database import engine
+from app.config import Config, logging
+from app.models.generated_text import GeneratedText
+
+WORD = re.compile(r"\w+")
+
+# Words that rarely change what a prompt asks for; dropping them makes "Please write a story about
+# the sea" and "write story about sea" the same prompt, while "dog" vs "cat" still differ
+STOP_WORDS = frozenset(
+    "a an the of to in into on onto for about and or with by at from as is are was were be been me my i you your "
+    "please can could would will shall this that these those it its do does how what whats some".split()
+)
+
+# A new entry this close to an existing one adds nothing to the index
+DUPLICATE_SIMILARITY = 0.99
+
+INDEX_MAGIC = b"SEMIDX01"
+INDEX_HEADER_SIZE = 4096
+
+_MASK32 = np.uint64(0xFFFFFFFF)
+
+
+class HashingVectorizer:
+    """
+    Embeds prompts as L2-normalized vectors of hashed content words and character trigrams.
+    Words carry the meaning; trigrams absorb typos and inflections ("summarise" / "summarize").
+    Hashes are stable across processes (crc32 and fixed multipliers, not Python's salted `hash`),
+    so vectors saved by one worker are valid in every other.
+    """
+
+    def __init__(self, dimensions: int = 512):
+        self.dimensions = dimensions
+
+
+    def tokens(self, prompt: str) -> list:
+        words = WORD.findall(unicodedata.normalize("NFKC", prompt).casefold())
+        content = [word for word in words if word not in STOP_WORDS]
+
+        # A prompt made only of stop words keeps them rather than embedding to nothing
+        return content or words
+
+
+    def transform(self, prompts: list) -> np.ndarray:
+        """:return: A (len(prompts), dimensions) float32 matrix of unit vectors (zero rows for empty prompts)."""
+        vectors = np.zeros((len(prompts), self.dimensions), dtype=np.float32)
+
+        for row, prompt in enumerate(prompts):
+            words = self.tokens(prompt)
+
+            if words:
+                hashes = np.array([zlib.crc32(word.encode("utf-8")) for word in words], dtype=np.uint64)
+                vector = _unit(self._signed_counts(hashes))
+
+                codepoints = np.frombuffer((" " + " ".join(words) + " ").encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+                trigrams = (codepoints[:-2] * np.uint64(0x9E3779B1) ^ codepoints[1:-1] * np.uint64(0x85EBCA77) ^ codepoints[2:] * np.uint64(0xC2B2AE3D)) & _MASK32
+                vector += _unit(self._signed_counts((trigrams ^ (trigrams >> np.uint64(15))) * np.uint64(0x2C1B3C6D) & _MASK32))
+
+                vectors[row] = _unit(vector)
+
+        return vectors
+
+
+    def _signed_counts(self, hashes: np.ndarray) -> np.ndarray:
+        """Feature hashing: one bucket per hash, with a hash bit for the sign so collisions tend to cancel."""
+        signs = ((hashes >> np.uint64(31)) & np.uint64(1)).astype(np.float64) * 2 - 1
+        return np.bincount((hashes % np.uint64(self.dimensions)).astype(np.intp), weights=signs, minlength=self.dimensions)
+
+
+class LSHIndex:
+    """
+    Approximate nearest-neighbour index over unit vectors: random-hyperplane LSH with `tables` hash tables
+    of `bits` bits each. A query's candidates are the entries sharing its bucket in any table; they are
+    ranked by how many hyperplane signs they share with the query, and only the `rerank` closest are
+    scored exactly, so a lookup touches a small fraction of the index.
+
+    Entries live in two segments. The base keeps one sorted array of bucket keys for all tables, so a
+    batch of queries finds every bucket with a single binary search, and can be memory-mapped from a
+    file written by `save`. New entries go to a small tail that is scanned directly and merged into the
+    base once it holds `merge_size` entries.
+    """
+
+    def __init__(self, dimensions: int, tables: int = 32, bits: int = 13, seed: int = 0, merge_size: int = 4096,
+                 rerank: int = 16):
+        if tables * 2 ** bits > 2 ** 32:
+            raise ValueError("LSH bucket keys are 32-bit; use fewer tables or bits.")
+
+        self.dimensions = dimensions
+        self.tables = tables
+        self.bits = bits
+        self.seed = seed
+        self.merge_size = merge_size
+        self.rerank = rerank
+
+        # Hyperplanes from a fixed seed, so every process hashes the same vector to the same buckets
+        self.planes = np.random.default_rng(seed).standard_normal((dimensions, tables * bits)).astype(np.float32)
+        self._weights = (1 << np.arange(bits)).astype(np.uint32)
+
+        # Table t's buckets are keys t * 2**bits + code, so all tables sort into one array
+        self._table_offsets = np.arange(tables, dtype=np.uint32) << np.uint32(bits)
+
+        self._base = _Segment.empty(dimensions, tables)
+        self._tail = _Segment.empty(dimensions, tables)
+        self._deleted = set()
+
+
+    def __len__(self):
+        return len(self._base.ids) + len(self._tail.ids)
+
+
+    def keys(self, vectors: np.ndarray) -> np.ndarray:
+        """:return: A (len(vectors), tables) uint32 matrix of bucket keys."""
+        bits = (vectors @ self.planes > 0).reshape(len(vectors), self.tables, self.bits)
+        return (bits * self._weights).sum(axis=2, dtype=np.uint32) + self._table_offsets
+
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray, tags: np.ndarray):
+        """Append entries: unit vectors, the ids they stand for, and a tag that lookups must match."""
+        self._tail = self._tail.append(vectors, self.keys(vectors), ids, tags)
+
+        if len(self._tail.ids) >= self.merge_size:
+            self._merge()
+
+
+    def discard(self, entry_id: int):
+        """Stop returning an id; its entries are dropped for good when the index is next saved."""
+        self._deleted.add(int(entry_id))
+
+
+    def search(self, vectors: np.ndarray, tags: np.ndarray) -> tuple:
+        """
+        Best match for each query among the entries with the same tag.
+        :return: Tuple of (ids, similarities) arrays; id -1 and similarity -inf where nothing matched.
+        """
+        count = len(vectors)
+        best_ids = np.full(count, -1, dtype=np.int64)
+        best_sims = np.full(count, -np.inf, dtype=np.float32)
+
+        if count == 0:
+            return best_ids, best_sims
+
+        # Tail: few entries, scored against every query at once
+        if len(self._tail.ids):
+            sims = vectors @ self._tail.vectors.T
+            sims[(tags[:, None] != self._tail.tags[None, :]) | self._deleted_mask(self._tail.ids)[None, :]] = -np.inf
+
+            columns = sims.argmax(axis=1)
+            best_sims = sims[np.arange(count), columns]
+            best_ids = np.where(best_sims > -np.inf, self._tail.ids[columns], -1)
+
+        size = len(self._base.ids)
+
+        if not size:
+            return best_ids, best_sims
+
+        # Base: every query's bucket in every table, found with one binary search
+        keys = self.keys(vectors).ravel()
+        starts = np.searchsorted(self._base.keys, keys, side="left")
+        lengths = np.searchsorted(self._base.keys, keys, side="right") - starts
+        positions = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+
+        # Keys are query-major, so each query's candidates are contiguous: (query, row) pairs sort by query.
+        # Entries proposed by several tables are scored once.
+        pairs = np.repeat(np.arange(count, dtype=np.int64), lengths.reshape(count, self.tables).sum(axis=1)) * size + self._base.order[positions]
+        pairs.sort()
+        distinct = np.ones(len(pairs), dtype=bool)
+        distinct[1:] = pairs[1:] != pairs[:-1]
+
+        queries, rows = np.divmod(pairs[distinct], size)
+        keep = (self._base.tags[rows] == tags[queries]) & ~self._deleted_mask(self._base.ids[rows])
+        queries, rows = queries[keep], rows[keep]
+
+        # The codes hold all tables * bits hyperplane signs, and the share of differing signs estimates the
+        # angle. Ranking candidates by it first means only the closest few per query have their full vectors
+        # read: clustered prompts (same template, different subject) can fill a bucket with thousands of rows.
+        distances = np.bitwise_count(self._base.codes[rows] ^ keys.reshape(count, self.tables)[queries]).sum(axis=1, dtype=np.int32)
+        order = np.lexsort((distances, queries))
+        queries, rows = queries[order], rows[order]
+
+        group_starts = np.searchsorted(queries, queries, side="left")
+        closest = np.arange(len(queries)) - group_starts < self.rerank
+        queries, rows = queries[closest], rows[closest]
+
+        # Exact similarity of the remaining pairs; the first of each query's run after sorting is its best
+        sims = np.einsum("ij,ij->i", self._base.vectors[rows], vectors[queries])
+        order = np.lexsort((-sims, queries))
+        first = order[np.r_[True, queries[order][1:] != queries[order][:-1]]] if len(order) else order
+
+        better = sims[first] > best_sims[queries[first]]
+        best_sims[queries[first][better]] = sims[first][better]
+        best_ids[queries[first][better]] = self._base.ids[rows[first][better]]
+
+        return best_ids, best_sims
+
+
+    def save(self, path: str):
+        """Write every live entry to `path` atomically, in the layout `load` memory-maps."""
+        self._merge()
+        base = self._base
+
+        if self._deleted:
+            base = base.select(np.flatnonzero(~self._deleted_mask(base.ids)))
+
+        arrays = {"vectors": base.vectors, "codes": base.codes, "ids": base.ids, "tags": base.tags, "keys": base.keys, "order": base.order}
+        header = {
+            "dimensions": self.dimensions, "tables": self.tables, "bits": self.bits, "seed": self.seed,
+            "count": len(base.ids), "arrays": {}
+        }
+        offset = INDEX_HEADER_SIZE
+
+        for name, array in arrays.items():
+            header["arrays"][name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+            offset += array.nbytes
+
+        encoded = json.dumps(header).encode("utf-8")
+
+        if len(INDEX_MAGIC) + 4 + len(encoded) > INDEX_HEADER_SIZE:
+            raise ValueError("Semantic index header does not fit its reserved space.")
+
+        temporary = f"{path}.{os.getpid()}.tmp"
+
+        with open(temporary, "wb") as file:
+            file.write(INDEX_MAGIC + len(encoded).to_bytes(4, "little") + encoded)
+            file.write(b"\0" * (INDEX_HEADER_SIZE - file.tell()))
+
+            for array in arrays.values():
+                file.write(np.ascontiguousarray(array).tobytes())
+
+        # Workers that already mapped the old file keep reading it until they reload
+        os.replace(temporary, path)
+        self._base, self._deleted = base, set()
+
+
+    @classmethod
+    def load(cls, path: str, merge_size: int = 4096) -> "LSHIndex":
+        """
+        Open an index written by `save`. The arrays are memory-mapped read-only, so loading costs the
+        same at any size and the pages are shared by every worker that maps the file (until the worker's
+        first merge copies the base into its own memory).
+        """
+        with open(path, "rb") as file:
+            prefix = file.read(len(INDEX_MAGIC) + 4)
+
+            if prefix[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+                raise ValueError(f"{path} is not a semantic cache index.")
+
+            header = json.loads(file.read(int.from_bytes(prefix[len(INDEX_MAGIC):], "little")))
+
+        index = cls(header["dimensions"], tables=header["tables"], bits=header["bits"], seed=header["seed"], merge_size=merge_size)
+        arrays = {}
+
+        for name, spec in header["arrays"].items():
+            shape = tuple(spec["shape"])
+
+            # np.memmap cannot map zero bytes
+            if 0 in shape:
+                arrays[name] = np.empty(shape, dtype=spec["dtype"])
+
+            else:
+                # A plain ndarray view of the mapping: indexing a np.memmap subclass costs far more per call
+                arrays[name] = np.asarray(np.memmap(path, dtype=spec["dtype"], mode="r", offset=spec["offset"], shape=shape))
+
+        index._base = _Segment(**arrays)
+        return index
+
+
+    def _merge(self):
+        """Fold the tail into the base, inserting its keys in order rather than re-sorting the base."""
+        if not len(self._tail.ids):
+            return
+
+        base, tail = self._base, self._tail
+        tail_keys = tail.codes.ravel(order="F")
+        tail_order = np.argsort(tail_keys, kind="stable")
+        positions = np.searchsorted(base.keys, tail_keys[tail_order], side="right")
+
+        # Column-major ravel: entry i of table t is at t * len(tail) + i
+        tail_rows = (tail_order % len(tail.ids)).astype(np.int32) + len(base.ids)
+
+        self._base = _Segment(
+            vectors=np.concatenate([base.vectors, tail.vectors]),
+            codes=np.concatenate([base.codes, tail.codes]),
+            ids=np.concatenate([base.ids, tail.ids]),
+            tags=np.concatenate([base.tags, tail.tags]),
+            keys=np.insert(base.keys, positions, tail_keys[tail_order]),
+            order=np.insert(base.order, positions, tail_rows)
+        )
+        self._tail = _Segment.empty(self.dimensions, self.tables)
+
+
+    def _deleted_mask(self, ids: np.ndarray) -> np.ndarray:
+        if not self._deleted:
+            return np.zeros(len(ids), dtype=bool)
+
+        return np.isin(ids, np.fromiter(self._deleted, dtype=np.int64))
+
+
+class _Segment:
+    """
+    Entry arrays of one LSH index segment. `codes` holds each entry's bucket key per table; in a base
+    segment `keys` is every (table, entry) key in sorted order and `order` the entry row of each.
+    """
+
+    def __init__(self, vectors, codes, ids, tags, keys, order):
+        self.vectors = vectors
+        self.codes = codes
+        self.ids = ids
+        self.tags = tags
+        self.keys = keys
+        self.order = order
+
+
+    @classmethod
+    def empty(cls, dimensions: int, tables: int) -> "_Segment":
+        return cls(
+            vectors=np.empty((0, dimensions), dtype=np.float32),
+            codes=np.empty((0, tables), dtype=np.uint32),
+            ids=np.empty(0, dtype=np.int64),
+            tags=np.empty(0, dtype=np.uint64),
+            keys=np.empty(0, dtype=np.uint32),
+            order=np.empty(0, dtype=np.int32)
+        )
+
+
+    def append(self, vectors, codes, ids, tags) -> "_Segment":
+        """A new segment with the entries added; tail segments are unsorted, so `keys` and `order` stay empty."""
+        return _Segment(
+            vectors=np.concatenate([self.vectors, vectors.astype(np.float32)]),
+            codes=np.concatenate([self.codes, codes]),
+            ids=np.concatenate([self.ids, np.asarray(ids, dtype=np.int64)]),
+            tags=np.concatenate([self.tags, np.asarray(tags, dtype=np.uint64)]),
+            keys=self.keys,
+            order=self.order
+        )
+
+
+    def select(self, rows: np.ndarray) -> "_Segment":
+        """A base segment of the given rows, sorted into bucket order."""
+        codes = np.asarray(self.codes[rows])
+        keys = codes.ravel(order="F")
+        order = np.argsort(keys, kind="stable")
+
+        return _Segment(
+            vectors=np.asarray(self.vectors[rows]),
+            codes=codes,
+            ids=np.asarray(self.ids[rows]),
+            tags=np.asarray(self.tags[rows]),
+            keys=keys[order],
+            order=(order % max(1, len(rows))).astype(np.int32)
+        )
+
+
+class SemanticCache:
+    """
+    Serves the stored response of an earlier, near-identical prompt (cosine similarity of the prompt
+    embeddings at least `threshold`) instead of generating a new one.
+    Entries point at GeneratedText rows, so an edited or deleted text is never served.
+    """
+
+    # Lookups read the response from the database
+    blocking = True
+
+    def __init__(self, index: LSHIndex = None, vectorizer: HashingVectorizer = None, threshold: float = 0.9,
+                 path: str = None, max_entries: int = 100000):
+        self.index = index
+        self.vectorizer = vectorizer
+        self.threshold = threshold
+        self.path = path
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.full = 0
+
+        self._lock = threading.Lock()
+
+
+    @property
+    def enabled(self) -> bool:
+        return self.index is not None
+
+
+    @staticmethod
+    def tag(params: dict) -> int:
+        """64-bit digest of the model parameters; only responses generated with the same ones are served."""
+        digest = hashlib.blake2b(json.dumps(params, sort_keys=True).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little")
+
+
+    def get(self, prompt: str, params: dict) -> Optional[str]:
+        """
+        Look up the stored response of a near-identical earlier prompt.
+        :return: The response, or None on a miss or when the cache is disabled.
+        """
+        return self.get_many([prompt], params)[0]
+
+
+    def get_many(self, prompts: list, params: dict) -> list:
+        """
+        Batched `get`: every prompt is embedded and searched in one vectorized pass, and the matched
+        responses are read with one query.
+        :return: One response or None per prompt, in order.
+        """
+        if not self.enabled or not prompts:
+            return [None] * len(prompts)
+
+        try:
+            vectors = self.vectorizer.transform(prompts)
+
+            with self._lock:
+                ids, sims = self.index.search(vectors, np.full(len(prompts), self.tag(params), dtype=np.uint64))
+
+            matched = [int(text_id) if sim >= self.threshold else None for text_id, sim in zip(ids, sims)]
+            responses = _load_responses([text_id for text_id in matched if text_id is not None])
+
+        except Exception as e:
+            # A broken cache must never fail a generation
+            logging.warning(f"Semantic cache lookup failed: {e}")
+            return [None] * len(prompts)
+
+        results = []
+
+        for text_id in matched:
+            response = responses.get(text_id)
+
+            if text_id is not None and response is None:
+                # The text was deleted since it was indexed
+                self.discard(text_id)
+
+            self.hits += response is not None
+            self.misses += response is None
+            results.append(response)
+
+        return results
+
+
+    def add(self, prompt: str, params: dict, text_id: int):
+        """Index a stored text under its prompt, unless a near-identical prompt is already indexed."""
+        self.add_many([(prompt, text_id)], params)
+
+
+    def add_many(self, items: list, params: dict):
+        """
+        Index several stored texts.
+        :param items: List of (prompt, text id) tuples.
+        """
+        if not self.enabled or not items:
+            return
+
+        try:
+            vectors = self.vectorizer.transform([prompt for prompt, _ in items])
+            tags = np.full(len(items), self.tag(params), dtype=np.uint64)
+
+            with self._lock:
+                _, sims = self.index.search(vectors, tags)
+                new = np.flatnonzero((sims < DUPLICATE_SIMILARITY) & vectors.any(axis=1))
+                room = max(0, self.max_entries - len(self.index))
+
+                self.full += max(0, len(new) - room)
+                new = new[:room]
+
+                if len(new):
+                    self.index.add(vectors[new], np.array([items[row][1] for row in new], dtype=np.int64), tags[new])
+
+        except Exception as e:
+            logging.warning(f"Semantic cache insert failed: {e}")
+
+
+    def discard(self, text_id: int):
+        """Stop serving a text, e.g. after its response was edited or it was deleted."""
+        if self.enabled:
+            with self._lock:
+                self.index.discard(text_id)
+
+
+    def save(self, path: str = None):
+        """Persist the index so workers started later map it instead of starting empty."""
+        with self._lock:
+            self.index.save(path or self.path)
+
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        if self.enabled:
+            with self._lock:
+                self.index = LSHIndex(self.index.dimensions, tables=self.index.tables, bits=self.index.bits, seed=self.index.seed, merge_size=self.index.merge_size)
+
+        self.hits = 0
+        self.misses = 0
+        self.full = 0
+
+
+    def stats(self) -> dict:
+        if not self.enabled:
+            return {"backend": None}
+
+        lookups = self.hits + self.misses
+
+        return {
+            "backend": "semantic",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.index),
+            "rejected_full": self.full,
+            "threshold": self.threshold
+        }
+
+
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
+
+
+    @classmethod
+    def from_config(cls) -> "SemanticCache":
+        """Build the cache from Config, mapping the saved index at SEMANTIC_CACHE_PATH when there is one."""
+        if not Config.SEMANTIC_CACHE_ENABLED:
+            return cls()
+
+        path = Config.SEMANTIC_CACHE_PATH or None
+        vectorizer = HashingVectorizer(Config.SEMANTIC_CACHE_DIMENSIONS)
+
+        if path and os.path.exists(path):
+            index = LSHIndex.load(path)
+
+            if index.dimensions != vectorizer.dimensions:
+                raise EnvironmentError(f"{path} holds {index.dimensions}-dimensional vectors; SEMANTIC_CACHE_DIMENSIONS is {vectorizer.dimensions}.")
+
+        else:
+            index = LSHIndex(vectorizer.dimensions)
+
+        return cls(index, vectorizer, threshold=Config.SEMANTIC_CACHE_THRESHOLD, path=path, max_entries=Config.SEMANTIC_CACHE_MAX_ENTRIES)
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _load_responses(text_ids: list) -> dict:
+    """
+    Responses of the given texts, by id. Uses its own connection rather than the thread's scoped session:
+    lookups also run on batch and event-loop worker threads, which never release a session.
+    """
+    if not text_ids:
+        return {}
+
+    with engine.connect() as connection:
+        return dict(connection.execute(select(GeneratedText.id, GeneratedText.response).where(GeneratedText.id.in_(text_ids))).all())
+
+
+def build_index(path: str, params: dict, batch_size: int = 10000) -> int:
+    """
+    Index every stored text and save the result to `path`.
+    :return: The number of entries indexed.
+    """
+    cache = SemanticCache(LSHIndex(Config.SEMANTIC_CACHE_DIMENSIONS), HashingVectorizer(Config.SEMANTIC_CACHE_DIMENSIONS), max_entries=Config.SEMANTIC_CACHE_MAX_ENTRIES)
+
+    with engine.connect() as connection:
+        rows = connection.execution_options(yield_per=batch_size).execute(select(GeneratedText.prompt, GeneratedText.id).order_by(GeneratedText.id))
+
+        for batch in rows.partitions():
+            cache.add_many([tuple(row) for row in batch], params)
+
+    cache.save(path)
+    return len(cache.index)
+
+
+semantic_cache = SemanticCache.from_config()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=semantic_cache._reset_after_fork)
+
@@ -0,0 +1,494 @@
+import os
+import time
+import random
+import asyncio
+import openai
+import threading
+import email.utils
+from typing import Optional
+from collections import deque
+from app.config import Config, logging
+from app.utils.profiler import phase
+from app.utils.errors import ServiceUnavailableError
+from app.utils.metrics import upstream_request_duration
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limit on concurrent upstream calls.
+
+    Every call that completes without an overload signal raises the limit by 1/limit (about
+    +1 per limit's worth of successes); a 429, 5xx, timeout or connection failure multiplies
+    it by `backoff_ratio`. Callers over the limit wait up to `queue_timeout` for a slot.
+    """
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int, backoff_ratio: float = 0.5, queue_timeout: float = 10.0):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.queue_timeout = queue_timeout
+        self.limit = float(min(max(initial, min_limit), max_limit))
+
+        self.in_flight = 0
+        self.rejected = 0
+        self.decreases = 0
+
+        self._condition = threading.Condition()
+
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a slot; False when none freed up within the timeout."""
+        deadline = time.monotonic() + (self.queue_timeout if timeout is None else timeout)
+
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0:
+                    self.rejected += 1
+                    return False
+
+                self._condition.wait(remaining)
+
+            self.in_flight += 1
+            return True
+
+
+    def try_acquire(self) -> bool:
+        with self._condition:
+            if self.in_flight >= int(self.limit):
+                return False
+
+            self.in_flight += 1
+            return True
+
+
+    def release(self, overloaded: Optional[bool]):
+        """Free a slot and adapt the limit to how the call went; None (the call never finished) leaves it alone."""
+        with self._condition:
+            self.in_flight -= 1
+
+            if overloaded:
+                self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                self.decreases += 1
+
+            elif overloaded is not None:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+            self._condition.notify_all()
+
+
+    def stats(self) -> dict:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "rejected": self.rejected,
+            "decreases": self.decreases
+        }
+
+
+    def _reset_after_fork(self):
+        """Child-side fork hook: the parent's in-flight calls do not exist here."""
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+
+class CircuitBreaker:
+    """
+    Fails fast once upstream calls keep failing.
+
+    Closed: calls pass and outcomes are kept for `window_seconds`. When at least `min_calls`
+    outcomes are recorded and the failure rate reaches `failure_threshold`, the breaker opens.
+    Open: calls are rejected immediately for `open_seconds`.
+    Half-open: up to `half_open_calls` probe calls pass; one success closes the breaker, one failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: float, min_calls: int, window_seconds: float, open_seconds: float, half_open_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+
+        self.state = CLOSED
+        self.opened = 0
+        self.short_circuited = 0
+
+        self._outcomes = deque()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; admitted half-open probes are counted."""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self.short_circuited += 1
+                    return False
+
+                self.state = HALF_OPEN
+                self._probes = 0
+
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_calls:
+                    self.short_circuited += 1
+                    return False
+
+                self._probes += 1
+
+            return True
+
+
+    def cancel(self):
+        """Return an admitted call that never reached the upstream, so it does not use up a half-open probe."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes:
+                self._probes -= 1
+
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets probe calls through."""
+        return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+
+    def record(self, success: bool):
+        now = time.monotonic()
+
+        with self._lock:
+            # Late results of calls admitted before the breaker opened
+            if self.state == OPEN:
+                return
+
+            if self.state == HALF_OPEN:
+                if success:
+                    self._close()
+
+                else:
+                    self._open(now)
+
+                return
+
+            self._outcomes.append((now, success))
+            self._failures += not success
+
+            while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+                self._failures -= not self._outcomes.popleft()[1]
+
+            if len(self._outcomes) >= self.min_calls and self._failures / len(self._outcomes) >= self.failure_threshold:
+                self._open(now)
+
+
+    def reset(self):
+        with self._lock:
+            self._close()
+            self.opened = 0
+            self.short_circuited = 0
+
+
+    def stats(self) -> dict:
+        calls = len(self._outcomes)
+
+        return {
+            "state": self.state,
+            "window_calls": calls,
+            "window_failure_rate": round(self._failures / calls, 4) if calls else 0.0,
+            "opened": self.opened,
+            "short_circuited": self.short_circuited,
+            "retry_after": round(self.retry_after(), 3) if self.state == OPEN else 0.0
+        }
+
+
+    def _open(self, now: float):
+        if self.state != OPEN:
+            logging.warning("Upstream circuit breaker opened.")
+
+        self.state = OPEN
+        self.opened += 1
+        self._opened_at = now
+        self._outcomes.clear()
+        self._failures = 0
+
+
+    def _close(self):
+        self.state = CLOSED
+        self._outcomes.clear()
+        self._failures = 0
+        self._probes = 0
+
+
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
+
+
+def is_overload(error: Exception) -> bool:
+    """Errors that mean the upstream is saturated or unreachable, as opposed to a bad request."""
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True
+
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def parse_retry_after(error: Exception) -> Optional[float]:
+    """Seconds the upstream asked us to wait, from `retry-after-ms` or `Retry-After` (seconds or HTTP date)."""
+    response = getattr(error, "response", None)
+
+    if response is None:
+        return None
+
+    milliseconds = response.headers.get("retry-after-ms")
+
+    if milliseconds:
+        try:
+            return float(milliseconds) / 1000
+
+        except ValueError:
+            pass
+
+    value = response.headers.get("retry-after")
+
+    if not value:
+        return None
+
+    try:
+        return float(value)
+
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+
+    except (TypeError, ValueError):
+        return None
+
+
+class UpstreamGuard:
+    """
+    Wraps every OpenAI call: circuit breaker, adaptive concurrency limit and retries.
+
+    Overload errors are retried up to `max_retries` times with full-jitter exponential
+    backoff, or after the upstream's Retry-After when it sends one. A Retry-After longer
+    than `backoff_max` is not waited out; the error is raised straight away. Each attempt
+    passes through the breaker and holds a limiter slot only while it is in progress.
+    """
+
+    def __init__(self, limiter: AdaptiveConcurrencyLimiter, breaker: CircuitBreaker, max_retries: int, backoff_base: float, backoff_max: float):
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+        # Swappable in tests
+        self.sleep = time.sleep
+        self.async_sleep = asyncio.sleep
+
+
+    def call(self, fn):
+        """
+        Run `fn` (one upstream request) under the breaker, limiter and retry policy.
+        :return: Whatever `fn` returns.
+        :raises ServiceUnavailableError: If the breaker is open or no limiter slot frees up in time.
+        """
+        attempt = 0
+
+        # Retries and backoff sleeps count towards the upstream phase of a profiled request
+        with phase("upstream"):
+            while True:
+                self._admit(self.limiter.acquire)
+                started = time.perf_counter()
+
+                try:
+                    result = fn()
+
+                except Exception as e:
+                    delay = self._finish(e, attempt, started)
+
+                    if delay is None:
+                        raise
+
+                    self.sleep(delay)
+                    attempt += 1
+                    continue
+
+                except BaseException:
+                    self._abandon()
+                    raise
+
+                self._finish(None, attempt, started)
+                return result
+
+
+    async def call_async(self, fn):
+        """Async variant of `call`; `fn` returns an awaitable."""
+        attempt = 0
+
+        with phase("upstream"):
+            while True:
+                self._admit(None)
+
+                # The limiter's lock is only held briefly; poll for a slot without blocking the loop
+                deadline = time.monotonic() + self.limiter.queue_timeout
+
+                while not self.limiter.try_acquire():
+                    if time.monotonic() >= deadline:
+                        self.limiter.rejected += 1
+                        self.breaker.cancel()
+                        raise self._saturated_error()
+
+                    try:
+                        await self.async_sleep(0.005)
+
+                    except BaseException:
+                        # Cancelled while queued: no slot is held, but the breaker admitted the call
+                        self.breaker.cancel()
+                        raise
+
+                started = time.perf_counter()
+
+                try:
+                    result = await fn()
+
+                except Exception as e:
+                    delay = self._finish(e, attempt, started)
+
+                    if delay is None:
+                        raise
+
+                    await self.async_sleep(delay)
+                    attempt += 1
+                    continue
+
+                except BaseException:
+                    self._abandon()
+                    raise
+
+                self._finish(None, attempt, started)
+                return result
+
+
+    def reset(self):
+        """Close the breaker and zero the counters."""
+        self.breaker.reset()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "breaker": self.breaker.stats(),
+            "concurrency": self.limiter.stats()
+        }
+
+
+    def _admit(self, acquire):
+        if not self.breaker.allow():
+            raise ServiceUnavailableError(
+                "OpenAI API is currently unavailable. Please try again later.",
+                verboseMessage="Upstream circuit breaker is open.",
+                retry_after=self.breaker.retry_after()
+            )
+
+        if acquire is not None and not acquire():
+            # Not the upstream's fault; give back a half-open probe without judging it
+            self.breaker.cancel()
+            raise self._saturated_error()
+
+
+    def _abandon(self):
+        """
+        Release the slot of an attempt that was cancelled or interrupted (CancelledError, KeyboardInterrupt).
+        Its outcome says nothing about the upstream, so neither the limit nor the breaker judges it.
+        """
+        self.limiter.release(None)
+        self.breaker.cancel()
+
+
+    def _finish(self, error: Optional[Exception], attempt: int, started: float) -> Optional[float]:
+        """
+        Record an attempt's outcome and release its slot.
+        :return: Seconds to wait before retrying, or None when the call is done.
+        """
+        overloaded = error is not None and is_overload(error)
+        upstream_request_duration.observe(time.perf_counter() - started, "overload" if overloaded else "error" if error else "ok")
+
+        self.limiter.release(overloaded)
+        self.breaker.record(not overloaded)
+        self.calls += 1
+
+        if error is None:
+            return None
+
+        if not overloaded or attempt >= self.max_retries:
+            self.failures += 1
+            return None
+
+        delay = parse_retry_after(error)
+
+        if delay is None:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+        elif delay > self.backoff_max:
+            self.failures += 1
+            return None
+
+        self.retries += 1
+        return delay
+
+
+    def _saturated_error(self) -> ServiceUnavailableError:
+        return ServiceUnavailableError(
+            "OpenAI API is currently unavailable. Please try again later.",
+            verboseMessage="Too many upstream calls in progress.",
+            retry_after=1
+        )
+
+
+    def _reset_after_fork(self):
+        self.limiter._reset_after_fork()
+        self.breaker._reset_after_fork()
+
+
+    @classmethod
+    def from_config(cls) -> "UpstreamGuard":
+        return cls(
+            AdaptiveConcurrencyLimiter(
+                initial=Config.UPSTREAM_CONCURRENCY_INITIAL,
+                min_limit=Config.UPSTREAM_CONCURRENCY_MIN,
+                max_limit=Config.UPSTREAM_CONCURRENCY_MAX,
+                queue_timeout=Config.UPSTREAM_QUEUE_TIMEOUT
+            ),
+            CircuitBreaker(
+                failure_threshold=Config.UPSTREAM_BREAKER_FAILURE_RATE,
+                min_calls=Config.UPSTREAM_BREAKER_MIN_CALLS,
+                window_seconds=Config.UPSTREAM_BREAKER_WINDOW_SECONDS,
+                open_seconds=Config.UPSTREAM_BREAKER_OPEN_SECONDS,
+                half_open_calls=Config.UPSTREAM_BREAKER_HALF_OPEN_CALLS
+            ),
+            max_retries=Config.UPSTREAM_MAX_RETRIES,
+            backoff_base=Config.UPSTREAM_BACKOFF_BASE,
+            backoff_max=Config.UPSTREAM_BACKOFF_MAX
+        )
+
+
+upstream_guard = UpstreamGuard.from_config()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=upstream_guard._reset_after_fork)
@@ -0,0 +1,117 @@
+import time
+import threading
+from typing import Optional
+from app.config import Config
+from app.models.user import User
+from collections import OrderedDict
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+
+class UserLookupCache:
+    """
+    Per-process LRU cache of username -> (user id, password hash) with a TTL.
+
+    Entries are invalidated when a User row is updated or deleted through the ORM, both at
+    flush and again after commit, so a concurrent miss cannot re-cache the old row.
+    Changes made by other processes or by bulk UPDATE statements are only picked up when
+    the entry expires, so keep the TTL short.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def get(self, username: str) -> Optional[tuple]:
+        """
+        :return: Tuple of (user id, password hash), or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(username)
+
+            if entry is None or entry[2] <= time.monotonic():
+                self._entries.pop(username, None)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(username)
+            self.hits += 1
+            return entry[0], entry[1]
+
+
+    def set(self, username: str, user_id: int, password_hash: str):
+        with self._lock:
+            self._entries[username] = (user_id, password_hash, time.monotonic() + self.ttl)
+            self._entries.move_to_end(username)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+    def invalidate(self, username: str):
+        with self._lock:
+            self._entries.pop(username, None)
+
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+class DisabledUserLookupCache(UserLookupCache):
+    """Stand-in used when USER_CACHE_ENABLED is false: every lookup misses."""
+
+    def __init__(self):
+        super().__init__(ttl=0, max_entries=0)
+
+
+    def set(self, username: str, user_id: int, password_hash: str):
+        pass
+
+
+user_cache = UserLookupCache(
+    ttl=Config.USER_CACHE_TTL_SECONDS,
+    max_entries=Config.USER_CACHE_MAX_ENTRIES
+) if Config.USER_CACHE_ENABLED else DisabledUserLookupCache()
+
+# Session.info key collecting usernames to invalidate again once the transaction commits
+_PENDING_KEY = "user_cache_invalidations"
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    usernames = {target.username, *inspect(target).attrs.username.history.deleted}
+
+    for username in usernames:
+        user_cache.invalidate(username)
+
+    session = object_session(target)
+
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).update(usernames)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for username in session.info.pop(_PENDING_KEY, ()):
+        user_cache.invalidate(username)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_invalidations(session):
+    session.info.pop(_PENDING_KEY, None)
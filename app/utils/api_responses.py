@@ -1,14 +1,16 @@
-from flask import jsonify
+from app.utils.profiler import phase
+from flask import jsonify, current_app, Response, stream_with_context
 
 def build_success_response(message, status=200, data=None):
     """Build a standardized success response."""
 
-    response = jsonify({
-        'success': True,
-        'message': message,
-        'status_code': status,
-        'data': data or {}
-    })
+    with phase("serialize"):
+        response = jsonify({
+            'success': True,
+            'message': message,
+            'status_code': status,
+            'data': data or {}
+        })
 
     # Set the status code using the response object
     response.status_code = status
@@ -18,12 +20,49 @@ def build_success_response(message, status=200, data=None):
 def build_error_response(message, status=400, data=None):
     """Build a standardized error response."""
 
-    response = jsonify({
-        'success': False,
-        'error_message': message,
-        'status_code': status,
-        'data': data or {}
-    })
+    with phase("serialize"):
+        response = jsonify({
+            'success': False,
+            'error_message': message,
+            'status_code': status,
+            'data': data or {}
+        })
 
     response.status_code = status
-    return response
\ No newline at end of file
+    return response
+
+
+def format_sse_event(data, event=None):
+    """Format a single Server-Sent Event carrying a JSON payload."""
+
+    message = f"data: {current_app.json.dumps(data)}\n\n"
+
+    if event:
+        message = f"event: {event}\n{message}"
+
+    return message
+
+
+def build_event_stream_response(events):
+    """Build a streaming `text/event-stream` response from an iterator of formatted events."""
+
+    return Response(
+        stream_with_context(events),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop reverse proxies from buffering the stream
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+def build_ndjson_response(chunks, filename=None):
+    """Build a streaming `application/x-ndjson` response from an iterator of newline-terminated JSON lines."""
+
+    headers = {"X-Accel-Buffering": "no"}
+
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    return Response(stream_with_context(chunks), mimetype="application/x-ndjson", headers=headers)
@@ -0,0 +1,240 @@
+import os
+import gzip
+import hashlib
+import threading
+from flask import request
+from app.config import Config
+from collections import OrderedDict
+
+try:
+    import brotli
+
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+
+except ImportError:
+    zstandard = None
+
+GZIP = "gzip"
+BROTLI = "br"
+ZSTD = "zstd"
+
+COMPRESSIBLE_MIMETYPES = ("application/json",)
+
+
+class CompressedCache:
+    """
+    LRU of compressed bodies keyed by (encoding, 128-bit digest of the body), capped at `max_bytes` of
+    compressed data. Identical bodies (repeat GETs of the same text or page) are compressed once per
+    encoding. Keying on a digest rather than the body means only compressed bytes are held, so the cap
+    is the cache's real memory use (plus a small per-entry overhead).
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+
+            if value is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+
+    def set(self, key, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+
+        with self._lock:
+            existing = self._entries.pop(key, None)
+
+            if existing is not None:
+                self.size -= len(existing)
+
+            self._entries[key] = value
+            self.size += len(value)
+
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "bytes": self.size, "hits": self.hits, "misses": self.misses}
+
+
+class ResponseCompressor:
+    """
+    Compresses JSON responses of at least `min_size` bytes with the best encoding the client accepts.
+    Levels default to fast settings (gzip 5, brotli 1, zstd 3): most of the size win for a fraction
+    of the CPU of the maximum levels. brotli and zstd come with requirements.txt; without their
+    packages, only gzip is offered.
+    """
+
+    def __init__(self, min_size: int = 1024, encodings=(ZSTD, BROTLI, GZIP), gzip_level: int = 5, brotli_quality: int = 1,
+                 zstd_level: int = 3, cache_max_bytes: int = 16 * 1024 * 1024):
+        self.enabled = True
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.zstd_level = zstd_level
+        self.cache = CompressedCache(cache_max_bytes)
+
+        available = {GZIP: True, BROTLI: brotli is not None, ZSTD: zstandard is not None}
+
+        # Server preference order, used to break ties between equally weighted client encodings
+        self.encodings = [encoding for encoding in encodings if available.get(encoding)]
+
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.responses = {encoding: 0 for encoding in self.encodings}
+
+        # ZstdCompressor objects must not be shared between threads
+        self._local = threading.local()
+
+
+    @classmethod
+    def from_config(cls) -> "ResponseCompressor":
+        compressor = cls(
+            min_size=Config.COMPRESSION_MIN_SIZE,
+            encodings=[encoding.strip() for encoding in Config.COMPRESSION_ENCODINGS.split(",") if encoding.strip()],
+            gzip_level=Config.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=Config.COMPRESSION_BROTLI_QUALITY,
+            zstd_level=Config.COMPRESSION_ZSTD_LEVEL,
+            cache_max_bytes=Config.COMPRESSION_CACHE_MAX_BYTES
+        )
+        compressor.enabled = Config.COMPRESSION_ENABLED
+
+        return compressor
+
+
+    def negotiate(self, accept_encodings) -> str:
+        """
+        Pick an encoding from a parsed Accept-Encoding header.
+        :return: The encoding with the highest client weight (server order breaks ties), or None.
+        """
+        best, best_quality = None, 0
+
+        for encoding in self.encodings:
+            quality = accept_encodings[encoding]
+
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+
+        return best
+
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        if encoding == ZSTD:
+            compressor = getattr(self._local, "zstd", None)
+
+            if compressor is None:
+                compressor = self._local.zstd = zstandard.ZstdCompressor(level=self.zstd_level)
+
+            return compressor.compress(data)
+
+        if encoding == BROTLI:
+            return brotli.compress(data, quality=self.brotli_quality)
+
+        # mtime=0 keeps output identical for identical bodies
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+
+    def compress_cached(self, data: bytes, encoding: str) -> bytes:
+        """Compress `data`, reusing the stored result for a body seen before."""
+        key = (encoding, hashlib.blake2b(data, digest_size=16).digest())
+        compressed = self.cache.get(key)
+
+        if compressed is None:
+            compressed = self.compress(data, encoding)
+            self.cache.set(key, compressed)
+
+        return compressed
+
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "encodings": self.encodings,
+            "responses": dict(self.responses),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "cache": self.cache.stats()
+        }
+
+
+    def clear(self):
+        self.cache.clear()
+
+
+    def _reset_after_fork(self):
+        self._local = threading.local()
+        self.cache._lock = threading.Lock()
+
+
+response_compressor = ResponseCompressor.from_config()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=response_compressor._reset_after_fork)
+
+
+def compress_responses(app):
+    """Compress eligible responses in an `after_request` hook. Only GET responses go through the cache."""
+
+    @app.after_request
+    def _compress_response(response):
+        if not response_compressor.enabled or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+
+        if response.direct_passthrough or response.is_streamed or "Content-Encoding" in response.headers:
+            return response
+
+        response.vary.add("Accept-Encoding")
+
+        data = response.get_data()
+
+        if len(data) < response_compressor.min_size:
+            return response
+
+        encoding = response_compressor.negotiate(request.accept_encodings)
+
+        if encoding is None:
+            return response
+
+        if request.method == "GET":
+            compressed = response_compressor.compress_cached(data, encoding)
+
+        else:
+            compressed = response_compressor.compress(data, encoding)
+
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+
+        response_compressor.responses[encoding] += 1
+        response_compressor.bytes_in += len(data)
+        response_compressor.bytes_out += len(compressed)
+
+        return response
@@ -6,6 +6,7 @@ operationForbiddenErrorMessage= "Operation forbidden",
 notFoundErrorMessage="No user record found with this email! Please signup first.",
 unauthorizedErrorMessage = "Unauthorized access."
 badRequestErrorMessage = "Bad request. Check your input parameters."
+tooManyRequestsErrorMessage = "Too many requests. Please slow down."
 
 errorTypes = {
     "HTTP_ERROR": 'HTTP_ERROR',
@@ -26,6 +27,7 @@ statusCodes = {
     "400":400,
     "401":401,
     "422":422,
+    "429":429,
     "403":403,
     "404":404,
     "500":500,
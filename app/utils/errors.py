@@ -1,5 +1,6 @@
 from .constants import *
 from app.config import logging
+from app.utils.metrics import app_errors
 
 
 class BaseError(Exception):
@@ -9,7 +10,9 @@ class BaseError(Exception):
         self.errorType = errorType or errorTypes['INTERNAL_SERVER_ERROR']
         self.httpCode = httpCode or statusCodes['500']
 
-        logging.error(self.message)
+        # Logged once here; handle_exception does not log BaseErrors again. Client errors are warnings
+        app_errors.inc(self.errorType)
+        logging.log(logging.ERROR if self.httpCode >= 500 else logging.WARNING, self.message)
 
 
 class UnprocessableEntityError(BaseError):
@@ -63,10 +66,13 @@ class BadRequestError(BaseError):
 
 
 class ServiceUnavailableError(BaseError):
-    def __init__(self, message: str, verboseMessage=None):
+    def __init__(self, message: str, verboseMessage=None, retry_after=None):
         super().__init__(
             message=message or serviceUnavailableErrorMessage,
             verboseMessage=verboseMessage,
             httpCode=statusCodes["503"],
             errorType=errorTypes["SERVICE_UNAVAILABLE"],
-        )
\ No newline at end of file
+        )
+
+        # Seconds after which the client may retry, sent as Retry-After when set
+        self.retry_after = retry_after
\ No newline at end of file
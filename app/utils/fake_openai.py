@@ -0,0 +1,406 @@
+"""
+OpenAI-compatible fake upstream for tests, benchmarks and offline development.
+
+Serves `POST /v1/chat/completions`, streamed and not, with configurable latency, token throughput
+and injected 429/5xx errors. Replies are deterministic: the same prompt always gets the same reply.
+Either run it standalone and point OPENAI_BASE_URL at it:
+
+    python -m app.utils.fake_openai --port 8090 --latency lognormal:0.2,0.5 --tokens-per-second 80 --error-rate 429=0.02,503=0.01
+    OPENAI_BASE_URL=http://127.0.0.1:8090/v1 python run.py
+
+or set OPENAI_FAKE_UPSTREAM=true to have each process start one in a background thread
+(configured by the OPENAI_FAKE_* settings) and send every OpenAI call to it.
+"""
+import os
+import json
+import math
+import time
+import random
+import hashlib
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Vocabulary of generated replies
+REPLY_WORDS = (
+    "the a model answer light keeper harbour night storm ship signal tower wind sea stone again because "
+    "through before would could never always water island long quiet morning kept watch lamp oil stairs "
+    "voice letter winter summer sailor careful bright dark answered"
+).split()
+
+
+def sampler(spec, rng: random.Random = None):
+    """
+    Turn a number, a zero-argument callable or a distribution spec into a zero-argument sampler.
+    Specs are `const:X`, `uniform:A,B`, `exp:MEAN` or `lognormal:MEDIAN,SIGMA`; a bare number is constant.
+    :return: The sampler, or None for None and empty specs.
+    :raises ValueError: If the spec names an unknown distribution.
+    """
+    if spec is None or spec == "":
+        return None
+
+    if callable(spec):
+        return spec
+
+    if isinstance(spec, (int, float)):
+        return lambda: spec
+
+    name, _, params = spec.partition(":")
+    rng = rng or random.Random()
+
+    if not params:
+        value = float(name)
+        return lambda: value
+
+    values = [float(value) for value in params.split(",")]
+    samplers = {
+        "const": lambda: values[0],
+        "uniform": lambda: rng.uniform(values[0], values[1]),
+        "exp": lambda: rng.expovariate(1 / values[0]),
+        "lognormal": lambda: values[0] * math.exp(rng.gauss(0, values[1])),
+    }
+
+    if name not in samplers:
+        raise ValueError(f"Unknown distribution {spec!r}; use const, uniform, exp or lognormal.")
+
+    return samplers[name]
+
+
+def parse_error_rate(spec) -> dict:
+    """`429=0.02,503=0.01` (or a dict) -> {429: 0.02, 503: 0.01}: the share of requests answered with each status."""
+    if not spec:
+        return {}
+
+    if isinstance(spec, dict):
+        return {int(status): float(rate) for status, rate in spec.items()}
+
+    return {int(status): float(rate) for status, rate in (item.split("=") for item in spec.split(","))}
+
+
+class _FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible `/v1/chat/completions` handler."""
+
+    protocol_version = "HTTP/1.1"
+
+    # Buffer writes so headers and body leave in one segment (avoids Nagle/delayed-ACK stalls)
+    wbufsize = -1
+
+    def setup(self):
+        super().setup()
+        self.server.fake.connection_count += 1
+
+
+    def log_message(self, format, *args):
+        pass
+
+
+    def do_POST(self):
+        fake = self.server.fake
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+            return
+
+        payload = json.loads(body or b"{}")
+        fake.request_count += 1
+        latency, tokens_per_second, failure = fake.draw()
+
+        if latency:
+            time.sleep(latency)
+
+        if failure:
+            status, retry_after = failure
+            error_type = "rate_limit_exceeded" if status == 429 else "server_error"
+            headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+
+            self._send_json(status, {"error": {"message": f"Injected {status}", "type": error_type}}, headers)
+            return
+
+        prompt = payload["messages"][-1]["content"]
+        content = fake.reply(prompt)
+
+        if payload.get("stream"):
+            self._send_stream(payload, prompt, content, tokens_per_second)
+            return
+
+        # A non-streamed completion arrives once every token is generated
+        if tokens_per_second:
+            time.sleep(len(content.split()) / tokens_per_second)
+
+        self._send_json(200, {
+            "id": f"chatcmpl-{fake.request_count}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "gpt-4o"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": _usage(prompt, content)
+        })
+
+
+    def _send_stream(self, payload, prompt, content, tokens_per_second=None):
+        """Emit the reply as SSE `chat.completion.chunk` deltas, one word per chunk."""
+        fake = self.server.fake
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        words = content.split(" ")
+        deltas = [{"role": "assistant", "content": ""}]
+        deltas += [{"content": word if i == 0 else " " + word} for i, word in enumerate(words)]
+
+        for i, delta in enumerate(deltas):
+            self._write_event(payload, fake, [{"index": 0, "delta": delta, "finish_reason": "stop" if i == len(deltas) - 1 else None}])
+            fake.chunk_count += 1
+
+            if fake.chunk_delay:
+                time.sleep(fake.chunk_delay)
+
+            if tokens_per_second and i:
+                time.sleep(1 / tokens_per_second)
+
+        # As the API does with stream_options={"include_usage": true}: a last chunk with usage and no choices
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            self._write_event(payload, fake, [], usage=_usage(prompt, content))
+
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+
+    def _write_event(self, payload, fake, choices, usage=None):
+        chunk = {
+            "id": f"chatcmpl-{fake.request_count}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": payload.get("model", "gpt-4o"),
+            "choices": choices
+        }
+
+        if usage:
+            chunk["usage"] = usage
+
+        self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _usage(prompt: str, content: str) -> dict:
+    """Token counts, one token per word."""
+    prompt_tokens, completion_tokens = len(prompt.split()), len(content.split())
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+
+class FakeOpenAIServer:
+    """
+    Local stand-in for the OpenAI API, served from a background thread.
+    Point the client at `base_url` to exercise the real HTTP path offline.
+
+    `latency` (seconds before answering) and `tokens_per_second` (reply generation speed) are numbers,
+    zero-argument callables or distribution specs (see `sampler`), drawn per request. `error_rate` maps
+    statuses to the share of requests that get them; `fail_next` scripts exact failures instead.
+    Samples and injected errors come from a generator seeded with `seed`, so a run is repeatable. The
+    reply is `reply(prompt)` when given, `reply_words` words derived from the seed and prompt when set
+    (a number or distribution spec), and otherwise an echo of the prompt.
+    """
+
+    def __init__(self, latency=0.0, chunk_delay: float = 0.0, reply=None, tokens_per_second=None, error_rate=None,
+                 retry_after: float = 1, reply_words=None, seed: int = 0, host: str = "127.0.0.1", port: int = 0):
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = parse_error_rate(error_rate)
+        self.retry_after = retry_after
+        self.reply_words = reply_words
+        self.reply = reply or (self.generated_reply if reply_words else lambda prompt: f"Echo: {prompt}")
+
+        self.request_count = 0
+        self.connection_count = 0
+        self.chunk_count = 0
+
+        self._failures = deque()
+        self._failures_lock = threading.Lock()
+
+        # Deep accept backlog so load tests do not see refused connections
+        ThreadingHTTPServer.request_queue_size = 1024
+        self._server = ThreadingHTTPServer((host, port), _FakeOpenAIHandler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread = None
+
+
+    @property
+    def latency(self):
+        return self._latency
+
+
+    @latency.setter
+    def latency(self, value):
+        self._latency = sampler(value, self._rng)
+
+
+    @property
+    def tokens_per_second(self):
+        return self._tokens_per_second
+
+
+    @tokens_per_second.setter
+    def tokens_per_second(self, value):
+        self._tokens_per_second = sampler(value, self._rng)
+
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1"
+
+
+    def draw(self) -> tuple:
+        """
+        Everything random about one request, drawn together under a lock.
+        :return: Tuple of (latency, tokens per second, failure); failure is None or (status, retry_after).
+        """
+        failure = self.next_failure()
+
+        with self._rng_lock:
+            latency = self._latency() if self._latency else 0
+            tokens_per_second = self._tokens_per_second() if self._tokens_per_second else None
+
+            if failure is None and self.error_rate:
+                roll = self._rng.random()
+
+                for status, rate in self.error_rate.items():
+                    if roll < rate:
+                        failure = (status, self.retry_after if status == 429 else None)
+                        break
+
+                    roll -= rate
+
+        return latency, tokens_per_second, failure
+
+
+    def generated_reply(self, prompt: str) -> str:
+        """`reply_words` words picked by a generator seeded with the server seed and the prompt."""
+        digest = hashlib.blake2b(f"{self.seed}:{prompt}".encode("utf-8"), digest_size=8).digest()
+        rng = random.Random(int.from_bytes(digest, "little"))
+        count = max(1, int(sampler(self.reply_words, rng)()))
+
+        return " ".join(rng.choice(REPLY_WORDS) for _ in range(count)).capitalize() + "."
+
+
+    def fail_next(self, status: int, times: int = 1, retry_after=None):
+        """Answer the next `times` completion requests with an error status, optionally with Retry-After."""
+        with self._failures_lock:
+            self._failures.extend([(status, retry_after)] * times)
+
+
+    def next_failure(self):
+        with self._failures_lock:
+            return self._failures.popleft() if self._failures else None
+
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+    def __enter__(self):
+        return self.start()
+
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+    @classmethod
+    def from_config(cls) -> "FakeOpenAIServer":
+        from app.config import Config
+
+        return cls(
+            latency=Config.OPENAI_FAKE_LATENCY,
+            tokens_per_second=Config.OPENAI_FAKE_TOKENS_PER_SECOND,
+            error_rate=Config.OPENAI_FAKE_ERROR_RATE,
+            reply_words=Config.OPENAI_FAKE_REPLY_WORDS,
+            seed=Config.OPENAI_FAKE_SEED
+        )
+
+
+_local_server = None
+_local_server_pid = None
+_local_server_lock = threading.Lock()
+
+
+def local_base_url() -> str:
+    """
+    Base URL of this process's built-in fake upstream (OPENAI_FAKE_UPSTREAM), started on first use.
+    Each forked worker starts its own: the parent's serving thread does not survive the fork.
+    """
+    global _local_server, _local_server_pid
+
+    if _local_server is None or _local_server_pid != os.getpid():
+        with _local_server_lock:
+            if _local_server is None or _local_server_pid != os.getpid():
+                _local_server = FakeOpenAIServer.from_config().start()
+                _local_server_pid = os.getpid()
+
+    return _local_server.base_url
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve a fake OpenAI chat completions API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", default="0", help="Seconds before answering: a number or a distribution spec.")
+    parser.add_argument("--tokens-per-second", default=None, help="Reply generation speed: a number or a distribution spec.")
+    parser.add_argument("--reply-words", default=None, help="Words per reply (number or spec); default echoes the prompt.")
+    parser.add_argument("--error-rate", default=None, help="Injected errors, e.g. 429=0.02,503=0.01.")
+    parser.add_argument("--retry-after", type=float, default=1, help="Retry-After seconds sent with injected 429s.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(
+        latency=args.latency, tokens_per_second=args.tokens_per_second, reply_words=args.reply_words,
+        error_rate=args.error_rate, retry_after=args.retry_after, seed=args.seed, host=args.host, port=args.port
+    )
+
+    print(f"fake OpenAI API at {server.base_url}")
+
+    try:
+        server._server.serve_forever()
+
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,124 @@
+import json
+import uuid
+import base64
+import decimal
+import datetime
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+
+except ImportError:
+    orjson = None
+
+
+def _default(value):
+    """Types neither encoder handles natively."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(value).decode("ascii")
+
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+
+    if hasattr(value, "__html__"):
+        return str(value.__html__())
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+def _http_date(value):
+    """
+    The HTTP date Flask's provider writes (werkzeug's `http_date`; naive datetimes are UTC),
+    formatted directly: `http_date` costs several microseconds per value, which dominated list pages.
+    """
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc)
+
+        clock = f"{value.hour:02d}:{value.minute:02d}:{value.second:02d}"
+
+    else:
+        clock = "00:00:00"
+
+    return f"{_WEEKDAYS[value.weekday()]}, {value.day:02d} {_MONTHS[value.month - 1]} {value.year:04d} {clock} GMT"
+
+
+def _rfc3339(value):
+    """RFC 3339 string for a date or time, as orjson writes it; naive datetimes are UTC."""
+    if isinstance(value, datetime.datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+
+    return value.isoformat()
+
+
+def _default_dates(value, rfc3339_dates: bool):
+    """Types only the stdlib encoder lacks, and dates when orjson passes them through."""
+    if isinstance(value, (datetime.date, datetime.time)):
+        # Flask's provider writes HTTP dates (naive datetimes are UTC); it has no format for times
+        if rfc3339_dates or isinstance(value, datetime.time):
+            return _rfc3339(value)
+
+        return _http_date(value)
+
+    if isinstance(value, uuid.UUID):
+        return str(value)
+
+    return _default(value)
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    Compact JSON provider backed by orjson (stdlib `json` when orjson is not installed).
+    - datetimes are HTTP dates, as with Flask's provider, or RFC 3339 strings with `rfc3339_dates`
+      (naive values are UTC either way);
+    - bytes are base64 strings, Decimals are strings;
+    - keys are not sorted and output is never indented, in debug mode too.
+    """
+
+    mimetype = "application/json"
+
+    # Write datetimes as RFC 3339 (orjson's native format) instead of HTTP dates; set from Config.JSON_DATETIME_FORMAT
+    rfc3339_dates = False
+
+    # Integer keys appear in marshmallow errors for list fields
+    options = (orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def dumps_bytes(self, obj) -> bytes:
+        """Serialize `obj` to UTF-8 JSON."""
+        rfc3339_dates = self.rfc3339_dates
+
+        def default(value):
+            return _default_dates(value, rfc3339_dates)
+
+        if orjson:
+            if rfc3339_dates:
+                return orjson.dumps(obj, default=_default, option=self.options)
+
+            return orjson.dumps(obj, default=default, option=self.options | orjson.OPT_PASSTHROUGH_DATETIME)
+
+        return json.dumps(obj, default=default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+    def dumps(self, obj, **kwargs) -> str:
+        # Formatting options (indent, sort_keys, ...) are only supported by the stdlib encoder
+        if kwargs:
+            kwargs.setdefault("default", lambda value: _default_dates(value, self.rfc3339_dates))
+            return json.dumps(obj, **kwargs)
+
+        return self.dumps_bytes(obj).decode("utf-8")
+
+
+    def loads(self, s, **kwargs):
+        if orjson and not kwargs:
+            return orjson.loads(s)
+
+        return json.loads(s, **kwargs)
+
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
@@ -1,12 +1,18 @@
 import jwt
 from app.config import Config
+from flask_jwt_extended import JWTManager
+from app.utils.profiler import phase
 from app.utils.errors import UnauthorizedError
+from app.utils.token_cache import VerifiedTokenCache
 from datetime import datetime, timedelta, timezone
 
 
 class JWTHandler:
     """Handles JWT token creation, validation, and decoding."""
 
+    # Payloads verified by `_verify`; repeat calls with the same token skip HMAC verification
+    verified_tokens = VerifiedTokenCache(max_entries=Config.JWT_CACHE_MAX_ENTRIES)
+
     @staticmethod
     def generate_token(user_id: int) -> str:
         """
@@ -32,25 +38,13 @@ class JWTHandler:
         :return: Decoded payload.
         :raises UnauthorizedError: If token is invalid or expired.
         """
-        try:
-            decoded_token = jwt.decode(
-                token, 
-                Config.JWT_SECRET_KEY, 
-                algorithm="HS256",
-                options={"require_exp": True}
-            )
+        decoded_token = JWTHandler._verify(token)
 
-            if "sub" not in decoded_token:
-                raise UnauthorizedError("Missing claim: sub")
+        if "sub" not in decoded_token:
+            raise UnauthorizedError("Missing claim: sub")
+
+        return decoded_token
 
-            return decoded_token
-        
-        except jwt.ExpiredSignatureError:
-            raise UnauthorizedError("Token has expired.")
-        
-        except jwt.InvalidTokenError:
-            raise UnauthorizedError("Invalid authentication token.")
-        
 
     @staticmethod
     def get_user_id(token: str) -> int:
@@ -61,18 +55,70 @@ class JWTHandler:
         :return: The user ID from the token payload.
         :raises UnauthorizedError: If token is invalid or expired.
         """
+        return JWTHandler._verify(token)["identity"]
+
+
+    @staticmethod
+    def _verify(token: str) -> dict:
+        """
+        Verify a token's signature and expiry, consulting the verified-token cache first.
+        :raises UnauthorizedError: If token is invalid or expired.
+        """
+        if Config.JWT_CACHE_ENABLED:
+            cached = JWTHandler.verified_tokens.get(token)
+
+            if cached is not None:
+                return cached
+
         try:
-            data = jwt.decode(
+            decoded_token = jwt.decode(
                 token,
                 Config.JWT_SECRET_KEY,
-                algorithm=["HS256"],
-                options={"require_exp": True},
+                algorithms=["HS256"],
+                options={"require": ["exp"]}
             )
 
-            return data["identity"]
-
         except jwt.ExpiredSignatureError:
             raise UnauthorizedError("Token has expired.")
 
         except jwt.InvalidTokenError:
-            raise UnauthorizedError("Invalid authentication token.")
\ No newline at end of file
+            raise UnauthorizedError("Invalid authentication token.")
+
+        if Config.JWT_CACHE_ENABLED:
+            JWTHandler.verified_tokens.set(token, decoded_token)
+
+        return decoded_token
+
+
+class CachingJWTManager(JWTManager):
+    """
+    JWTManager that caches verified access tokens for `jwt_required`.
+    Tokens checked with a CSRF value or with `allow_expired` always take the full decode path.
+    Blocklist and user lookup callbacks still run on every request, after decoding.
+    """
+
+    def __init__(self, app=None, add_context_processor: bool = False):
+        self.verified_tokens = VerifiedTokenCache(max_entries=Config.JWT_CACHE_MAX_ENTRIES)
+        super().__init__(app, add_context_processor)
+
+
+    def _decode_jwt_from_config(self, encoded_token: str, csrf_value=None, allow_expired: bool = False) -> dict:
+        with phase("auth"):
+            return self._decode_cached(encoded_token, csrf_value, allow_expired)
+
+
+    def _decode_cached(self, encoded_token: str, csrf_value=None, allow_expired: bool = False) -> dict:
+        cacheable = Config.JWT_CACHE_ENABLED and csrf_value is None and not allow_expired
+
+        if cacheable:
+            cached = self.verified_tokens.get(encoded_token)
+
+            if cached is not None:
+                return cached
+
+        decoded_token = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        if cacheable:
+            self.verified_tokens.set(encoded_token, decoded_token)
+
+        return decoded_token
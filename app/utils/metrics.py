@@ -0,0 +1,311 @@
+import time
+import bisect
+import threading
+from flask import request
+from sqlalchemy import event
+from app.config import Config
+from typing import Callable, Sequence
+from sqlalchemy.pool import QueuePool
+
+# Latency buckets in seconds; the tail covers slow LLM completions
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+DB_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ""
+
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+        self._values = {}
+        self._lock = threading.Lock()
+
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+
+    def value(self, *labelvalues) -> float:
+        return self._values.get(labelvalues, 0)
+
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+
+        for labelvalues, value in items:
+            yield self.name + "_total", _format_labels(self.labelnames, labelvalues), value
+
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed buckets, rendered like a Prometheus histogram.
+    `observe` is one bisect and two additions under a lock.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float], labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+
+        # labelvalues -> [per-bucket counts (+Inf last), sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+
+    def observe(self, value: float, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            series = self._series.get(labelvalues)
+
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+
+            series[0][index] += 1
+            series[1] += value
+
+
+    def count(self, *labelvalues) -> int:
+        series = self._series.get(labelvalues)
+        return sum(series[0]) if series else 0
+
+
+    def samples(self):
+        with self._lock:
+            items = [(labelvalues, list(counts), total) for labelvalues, (counts, total) in self._series.items()]
+
+        names = self.labelnames + ("le",)
+
+        for labelvalues, counts, total in items:
+            cumulative = 0
+
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield self.name + "_bucket", _format_labels(names, labelvalues + (_format_value(bound),)), cumulative
+
+            yield self.name + "_sum", _format_labels(self.labelnames, labelvalues), total
+            yield self.name + "_count", _format_labels(self.labelnames, labelvalues), cumulative
+
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class CallbackMetric:
+    """
+    Gauge or counter read from a callback at scrape time, for state other components already track.
+    The callback returns a number, or a list of (label values, number) pairs.
+    """
+
+    def __init__(self, name: str, help: str, fn: Callable, kind: str = "gauge", labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+
+        self._fn = fn
+
+
+    def samples(self):
+        value = self._fn()
+        name = self.name + "_total" if self.kind == "counter" else self.name
+
+        if isinstance(value, (list, tuple)):
+            for labelvalues, sample in value:
+                yield name, _format_labels(self.labelnames, labelvalues), sample
+
+        else:
+            yield name, "", value
+
+
+    def clear(self):
+        pass
+
+
+class MetricsRegistry:
+    """
+    Per-process metric registry rendered in the Prometheus text format.
+    Each worker process keeps its own values; scrape every worker (or run one worker per
+    container) and aggregate in Prometheus.
+    """
+
+    def __init__(self):
+        # Hooks and listeners check this flag, so instrumentation can be switched off at runtime
+        self.enabled = Config.METRICS_ENABLED
+
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float], labelnames: Sequence[str] = ()) -> Histogram:
+        return self._register(Histogram(name, help, buckets, labelnames))
+
+
+    def callback(self, name: str, help: str, fn: Callable, kind: str = "gauge", labelnames: Sequence[str] = ()) -> CallbackMetric:
+        return self._register(CallbackMetric(name, help, fn, kind, labelnames))
+
+
+    def render(self) -> str:
+        lines = []
+
+        for metric in list(self._metrics.values()):
+            # Counter samples carry the _total suffix, and so must their family name
+            family = metric.name + "_total" if metric.kind == "counter" else metric.name
+
+            lines.append(f"# HELP {family} {metric.help}")
+            lines.append(f"# TYPE {family} {metric.kind}")
+
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+    def clear(self):
+        """Reset every recorded value; callback metrics keep reading their sources."""
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+
+    def _register(self, metric):
+        with self._lock:
+            # Re-registering returns the existing metric, so modules can declare metrics at import time
+            return self._metrics.setdefault(metric.name, metric)
+
+
+metrics = MetricsRegistry()
+
+http_request_duration = metrics.histogram(
+    "http_request_duration_seconds", "Time from request start to response headers, by endpoint.", REQUEST_BUCKETS, ("endpoint", "method")
+)
+http_requests = metrics.counter("http_requests", "Requests served, by endpoint and status.", ("endpoint", "method", "status"))
+app_errors = metrics.counter("app_errors", "Application errors raised, by errorType.", ("type",))
+
+upstream_request_duration = metrics.histogram(
+    "upstream_request_duration_seconds", "Duration of each OpenAI request attempt, by outcome.", REQUEST_BUCKETS, ("outcome",)
+)
+upstream_tokens = metrics.histogram("upstream_tokens", "Tokens per OpenAI completion.", TOKEN_BUCKETS, ("kind",))
+
+db_query_duration = metrics.histogram("db_query_duration_seconds", "SQL statement execution time, by statement type.", DB_BUCKETS, ("operation",))
+db_pool_wait = metrics.histogram("db_pool_wait_seconds", "Time spent waiting to check out a pooled connection.", DB_BUCKETS)
+
+_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip()[:6].upper()
+    return keyword if keyword in _OPERATIONS else "OTHER"
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        if not metrics.enabled:
+            return super()._do_get()
+
+        started = time.perf_counter()
+
+        try:
+            return super()._do_get()
+
+        finally:
+            db_pool_wait.observe(time.perf_counter() - started)
+
+
+def instrument_engine(engine):
+    """Time every statement an engine executes. For async engines pass `async_engine.sync_engine`."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        # The execution context lives for one statement, so a failed statement leaves nothing behind
+        if metrics.enabled and context is not None:
+            context.metrics_start = time.perf_counter()
+
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _observe_query(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "metrics_start", None)
+
+        if started is not None:
+            db_query_duration.observe(time.perf_counter() - started, _operation(statement))
+
+
+REQUEST_START_KEY = "metrics.request_start"
+
+
+def stamp_request(environ: dict):
+    """Mark the start of a request in its WSGI environ; `instrument_app` observes it when the response is ready."""
+    if metrics.enabled:
+        environ[REQUEST_START_KEY] = time.perf_counter()
+
+
+class _RequestTimer:
+    """
+    WSGI middleware that stamps each request's start time.
+    Cheaper than a `before_request` hook, which Flask dispatches through `ensure_sync` on every request.
+    """
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+
+    def __call__(self, environ, start_response):
+        stamp_request(environ)
+        return self.wsgi_app(environ, start_response)
+
+
+def instrument_app(app):
+    """Time every request and count responses by endpoint and status. Unmatched URLs share one label."""
+    app.wsgi_app = _RequestTimer(app.wsgi_app)
+
+    @app.after_request
+    def _observe_request(response):
+        started = request.environ.pop(REQUEST_START_KEY, None)
+
+        if started is not None:
+            labels = (request.endpoint or "unmatched", request.method)
+            http_request_duration.observe(time.perf_counter() - started, *labels)
+            http_requests.inc(*labels, response.status_code)
+
+        return response
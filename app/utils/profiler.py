@@ -0,0 +1,337 @@
+import os
+import sys
+import hmac
+import time
+import uuid
+import random
+import threading
+from sqlalchemy import event
+from app.config import Config
+from contextvars import ContextVar
+from collections import OrderedDict
+from flask import request, after_this_request
+
+# Request header that forces profiling; its value must equal PROFILER_ADMIN_TOKEN
+PROFILE_HEADER = "X-Admin-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Profile of the request running in the current thread (or asyncio task), if it is sampled
+_current = ContextVar("profile", default=None)
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    __slots__ = ("profile", "name", "started")
+
+    def __init__(self, profile, name: str):
+        self.profile = profile
+        self.name = name
+
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+
+    def __exit__(self, *exc):
+        self.profile.add_phase(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def phase(name: str):
+    """
+    Time a block as one phase (auth, validate, upstream, db, serialize) of the current request's profile.
+    Costs one ContextVar lookup when the request is not being profiled.
+    """
+    profile = _current.get()
+    return _NULL_PHASE if profile is None else _Phase(profile, name)
+
+
+class Profile:
+    """Collapsed stacks and phase timings captured for one request."""
+
+    def __init__(self, endpoint: str, method: str, path: str, reason: str):
+        self.id = uuid.uuid4().hex
+        self.endpoint = endpoint
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.started_at = time.time()
+        self.status = None
+        self.duration = None
+        self.samples = 0
+
+        # "outer;inner" stack -> sample count, in the collapsed format flamegraph.pl and speedscope read
+        self.stacks = {}
+        self.phases = {}
+
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+
+    def add_phase(self, name: str, seconds: float):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+
+    def add_sample(self, stack: str):
+        with self._lock:
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            self.samples += 1
+
+
+    def finish(self, status: int):
+        self.status = status
+        self.duration = time.perf_counter() - self._started
+
+
+    def collapsed(self) -> str:
+        with self._lock:
+            items = sorted(self.stacks.items(), key=lambda item: -item[1])
+
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+
+    def summary(self) -> dict:
+        with self._lock:
+            phases = {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()}
+
+        if self.duration is not None:
+            # Time outside every instrumented phase: routing, hooks, rate limiting, response handling
+            phases["other"] = round(max(0.0, self.duration * 1000 - sum(phases.values())), 3)
+
+        return {
+            "id": self.id,
+            "endpoint": self.endpoint,
+            "method": self.method,
+            "path": self.path,
+            "reason": self.reason,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "samples": self.samples,
+            "phases_ms": phases
+        }
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for individual requests.
+    One daemon thread wakes every `interval` seconds while any request is being profiled and
+    records the stack of each profiled request's thread from `sys._current_frames()`, so
+    unprofiled requests pay nothing and profiled ones are never traced call by call.
+    Under the ASGI server async views share the event loop thread, so their stacks include
+    whatever other task was running; their phase timings are exact.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, interval: float = 0.005, max_profiles: int = 100, max_depth: int = 64, admin_token: str = None):
+        self.enabled = True
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_profiles = max_profiles
+        self.max_depth = max_depth
+        self.admin_token = admin_token
+
+        # thread id -> profile of the request it is serving
+        self._active = {}
+        self._profiles = OrderedDict()
+        self._labels = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+
+    @classmethod
+    def from_config(cls) -> "SamplingProfiler":
+        profiler = cls(
+            sample_rate=Config.PROFILER_SAMPLE_RATE,
+            interval=Config.PROFILER_INTERVAL,
+            max_profiles=Config.PROFILER_MAX_PROFILES,
+            admin_token=Config.PROFILER_ADMIN_TOKEN
+        )
+        profiler.enabled = Config.PROFILER_ENABLED
+
+        return profiler
+
+
+    def is_admin(self, token: str) -> bool:
+        return bool(self.admin_token) and bool(token) and hmac.compare_digest(token, self.admin_token)
+
+
+    def should_profile(self, token: str = None):
+        """
+        Decide whether to profile a request.
+        :return: "admin" or "sampled" when it should be profiled, otherwise None.
+        """
+        if not self.enabled:
+            return None
+
+        if token and self.is_admin(token):
+            return "admin"
+
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+
+        return None
+
+
+    def start(self, profile: Profile):
+        """Profile the calling thread until `stop`; returns the ContextVar token `stop` needs."""
+        with self._lock:
+            self._active[threading.get_ident()] = profile
+
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+        self._wake.set()
+        return _current.set(profile)
+
+
+    def stop(self, profile: Profile, token, status: int):
+        _current.reset(token)
+        profile.finish(status)
+
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+            self._profiles[profile.id] = profile
+
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+
+    def get(self, profile_id: str):
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+
+    def profiles(self) -> list:
+        """Stored profiles, newest first."""
+        with self._lock:
+            return list(reversed(self._profiles.values()))
+
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+    def _run(self):
+        while True:
+            with self._lock:
+                targets = list(self._active.items())
+
+                # Cleared under the lock, so a `start` racing with this check still wakes the thread
+                if not targets:
+                    self._wake.clear()
+
+            if not targets:
+                self._wake.wait()
+                continue
+
+            self._sample(targets)
+            time.sleep(self.interval)
+
+
+    def _sample(self, targets):
+        frames = sys._current_frames()
+
+        try:
+            for thread_id, profile in targets:
+                frame = frames.get(thread_id)
+
+                if frame is not None:
+                    profile.add_sample(self._collapse(frame))
+
+        finally:
+            # The dict also holds this very frame, whose locals hold the dict: clear it, or the cycle
+            # keeps every sampled frame (and the request objects in its locals) alive until the next GC
+            frames.clear()
+
+
+    def _collapse(self, frame) -> str:
+        labels = []
+
+        while frame is not None and len(labels) < self.max_depth:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+
+        labels.reverse()
+        return ";".join(labels)
+
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+
+        if label is None:
+            # module.function reads better in a flame graph than a full path
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            label = self._labels[code] = f"{module}.{code.co_name}"
+
+        return label
+
+
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._active = {}
+        self._thread = None
+
+
+profiler = SamplingProfiler.from_config()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=profiler._reset_after_fork)
+
+
+def profile_engine(engine):
+    """Add statement time to the `db` phase of profiled requests. For async engines pass `async_engine.sync_engine`."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_phase(conn, cursor, statement, parameters, context, executemany):
+        db_phase = phase("db")
+
+        if db_phase is not _NULL_PHASE and context is not None:
+            context.profile_phase = db_phase.__enter__()
+
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end_phase(conn, cursor, statement, parameters, context, executemany):
+        db_phase = getattr(context, "profile_phase", None)
+
+        if db_phase is not None:
+            db_phase.__exit__(None, None, None)
+
+
+def profile_app(app, skip_blueprints=("profiler",)):
+    """Profile requests chosen by `profiler.should_profile`; the response carries the profile id."""
+
+    @app.before_request
+    def _start_profile():
+        if not profiler.enabled or request.blueprint in skip_blueprints:
+            return
+
+        reason = profiler.should_profile(request.headers.get(PROFILE_HEADER))
+
+        if reason is None:
+            return
+
+        profile = Profile(request.endpoint or "unmatched", request.method, request.path, reason)
+        token = profiler.start(profile)
+
+        @after_this_request
+        def _stop_profile(response):
+            profiler.stop(profile, token, response.status_code)
+            response.headers[PROFILE_ID_HEADER] = profile.id
+            return response
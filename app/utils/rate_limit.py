@@ -0,0 +1,133 @@
+import math
+import asyncio
+import functools
+from flask import request
+from flask_jwt_extended import get_jwt_identity
+from app.utils.api_responses import build_error_response
+from app.services.rate_limiter import rate_limiter, estimate_tokens
+from app.utils.constants import statusCodes, tooManyRequestsErrorMessage
+
+
+def weigh_prompt():
+    """Cost of a single-prompt request: (requests, estimated tokens)."""
+    data = request.get_json(silent=True)
+    prompt = data.get("prompt") if isinstance(data, dict) else None
+
+    return 1, estimate_tokens(prompt if isinstance(prompt, str) else None)
+
+
+def weigh_request():
+    """Cost of a request that calls no model: one request and no tokens. Leaves the body unread."""
+    return 1, 0
+
+
+def weigh_batch():
+    """Cost of a batch request: every prompt counts as one request."""
+    items = request.get_json(silent=True)
+
+    if not isinstance(items, list) or not items:
+        return 1, estimate_tokens(None)
+
+    prompts = [item.get("prompt") if isinstance(item, dict) else None for item in items]
+    return len(prompts), sum(estimate_tokens(prompt if isinstance(prompt, str) else None) for prompt in prompts)
+
+
+def build_rate_limited_response(retry_after: float):
+    """429 response telling the client how many whole seconds to wait."""
+    response = build_error_response(tooManyRequestsErrorMessage, status=statusCodes["429"])
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+
+    return response
+
+
+def rate_limited(weigh=weigh_prompt, concurrency: bool = True):
+    """
+    Apply the per-user rate limits to a view; place it below `@jwt_required()`.
+    :param weigh: Callable returning the request's (requests, estimated tokens).
+    :param concurrency: Also hold one of the user's in-flight slots while the view runs.
+        For streamed responses the slot is released when the stream is closed.
+    """
+
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(*args, **kwargs):
+                if not rate_limiter.enabled:
+                    return await view(*args, **kwargs)
+
+                user_id = get_jwt_identity()
+                requests, tokens = weigh()
+
+                # A shared backend is a network round trip; keep it off the event loop
+                if rate_limiter.backend.blocking:
+                    retry_after = await asyncio.to_thread(_admit, user_id, requests, tokens, concurrency)
+
+                else:
+                    retry_after = _admit(user_id, requests, tokens, concurrency)
+
+                if retry_after is not None:
+                    return build_rate_limited_response(retry_after)
+
+                try:
+                    return await view(*args, **kwargs)
+
+                finally:
+                    if concurrency:
+                        if rate_limiter.backend.blocking:
+                            await asyncio.to_thread(rate_limiter.leave, user_id)
+
+                        else:
+                            rate_limiter.leave(user_id)
+
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not rate_limiter.enabled:
+                return view(*args, **kwargs)
+
+            user_id = get_jwt_identity()
+            retry_after = _admit(user_id, *weigh(), concurrency)
+
+            if retry_after is not None:
+                return build_rate_limited_response(retry_after)
+
+            streamed = False
+
+            try:
+                response = view(*args, **kwargs)
+
+                if concurrency and getattr(response, "is_streamed", False):
+                    response.call_on_close(lambda: rate_limiter.leave(user_id))
+                    streamed = True
+
+                return response
+
+            finally:
+                if concurrency and not streamed:
+                    rate_limiter.leave(user_id)
+
+        return wrapper
+
+    return decorator
+
+
+def _admit(user_id, requests: int, tokens: int, concurrency: bool):
+    """
+    Take an in-flight slot, if asked, and then the request's cost. The slot is checked first,
+    so a request turned away for concurrency does not spend the user's rate budget.
+    :return: None when admitted, otherwise the seconds the client should wait.
+    """
+    if concurrency and not rate_limiter.enter(user_id):
+        # Slots free up when a generation finishes; there is no schedule to report
+        return 1
+
+    retry_after = rate_limiter.acquire(user_id, requests, tokens)
+
+    if retry_after:
+        if concurrency:
+            rate_limiter.leave(user_id)
+
+        return retry_after
+
+    return None
@@ -0,0 +1,129 @@
+import asyncio
+import weakref
+import threading
+
+# Result a cancelled leader hands its followers, telling them to take the call over
+_LEADER_CANCELLED = object()
+
+
+class _Call:
+    """An in-flight call that followers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls that share a key.
+
+    The first caller for a key (the leader) runs the function; callers that arrive
+    while it is in flight block until it finishes and receive the same result or exception.
+    Nothing is remembered once the call completes, so this never serves stale data.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+
+    def do(self, key: str, fn):
+        """
+        Run `fn` once per key among concurrent callers.
+        :param key: Identifies calls that are interchangeable.
+        :param fn: Zero-argument callable to run.
+        :return: Tuple of (result, shared) where shared is True for followers.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+
+            if call is not None:
+                leader = False
+
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+
+            if call.error is not None:
+                raise call.error
+
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+
+        except BaseException as e:
+            call.error = e
+            raise
+
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+            call.done.set()
+
+
+    def in_flight(self) -> int:
+        """Number of distinct keys currently being computed."""
+        return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines; calls are only shared within one event loop.
+    Cancelling the leader does not cancel its followers: one of them runs the call instead.
+    """
+
+    def __init__(self):
+        # Futures are bound to their loop, so each loop tracks its own in-flight calls
+        self._futures = weakref.WeakKeyDictionary()
+
+
+    async def do(self, key: str, fn):
+        """
+        Await `fn()` once per key among concurrent callers.
+        :param key: Identifies calls that are interchangeable.
+        :param fn: Zero-argument coroutine function to await.
+        :return: Tuple of (result, shared) where shared is True for followers.
+        """
+        loop = asyncio.get_running_loop()
+        futures = self._futures.setdefault(loop, {})
+
+        while (future := futures.get(key)) is not None:
+            # Shield so a cancelled follower does not cancel the leader's call
+            result = await asyncio.shield(future)
+
+            if result is not _LEADER_CANCELLED:
+                return result, True
+
+        future = futures[key] = loop.create_future()
+
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result, False
+
+        except asyncio.CancelledError:
+            # Only this caller was cancelled; the first follower to wake becomes the new leader
+            future.set_result(_LEADER_CANCELLED)
+            raise
+
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when no follower is waiting on it
+            future.exception()
+            raise
+
+        finally:
+            del futures[key]
+
+
+    def in_flight(self) -> int:
+        """Number of distinct keys currently being computed across all loops."""
+        return sum(len(futures) for futures in list(self._futures.values()))
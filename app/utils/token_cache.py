@@ -0,0 +1,76 @@
+import time
+import hashlib
+import threading
+from typing import Optional
+from collections import OrderedDict
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of already-verified JWT payloads, keyed by a digest of the token.
+
+    An entry lives until the token's `exp`, so a cached token is never accepted for longer
+    than a full verification would accept it. Tokens without `exp`, or not yet valid (`nbf`),
+    are never cached. Only a digest is kept, never the token itself.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def get(self, token: str) -> Optional[dict]:
+        """
+        :return: A copy of the verified payload, or None on a miss or once the token has expired.
+        """
+        key = self._digest(token)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[1] <= time.time():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            # Callers may annotate the payload; never hand out the shared copy
+            return dict(entry[0])
+
+
+    def set(self, token: str, payload: dict):
+        expires_at = payload.get("exp")
+        now = time.time()
+
+        if not isinstance(expires_at, (int, float)) or expires_at <= now or payload.get("nbf", 0) > now:
+            return
+
+        with self._lock:
+            self._entries[self._digest(token)] = (dict(payload), expires_at)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
@@ -0,0 +1,117 @@
+"""
+Requests per second for the sync (WSGI, thread-per-request) and async (ASGI) serving modes.
+
+Both servers run in subprocesses against the same fake OpenAI upstream, which adds
+artificial latency to every completion. The sync server gets a fixed thread pool, so its
+throughput is capped at roughly threads / latency; the async server is limited by I/O and
+CPU only. On small machines use a higher latency so upstream waiting dominates.
+
+    python -m benchmarks.bench_asgi --latency 0.5 --concurrency 200 --requests 2000 --threads 16
+"""
+import os
+import sys
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+from benchmarks.common import drive, free_port, percentile, SCRATCH_DIR, BENCHMARK_ENV, wait_until_ready, benchmark_headers
+
+
+def serve(mode, port, threads):
+    """Run one server in this process (invoked in a subprocess by `main`)."""
+    import logging
+
+    # Per-request access and client logs would dominate the measurement
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    if mode == "sync":
+        from app import app
+        from app.database import init_db
+        from concurrent.futures import ThreadPoolExecutor
+        from werkzeug.serving import BaseWSGIServer
+
+        class PooledWSGIServer(BaseWSGIServer):
+            """Werkzeug server with a bounded thread pool, like a `gthread` worker."""
+
+            pool = ThreadPoolExecutor(max_workers=threads)
+
+            def process_request(self, request, client_address):
+                self.pool.submit(self._handle, request, client_address)
+
+            def _handle(self, request, client_address):
+                try:
+                    self.finish_request(request, client_address)
+
+                except Exception:
+                    self.handle_error(request, client_address)
+
+                finally:
+                    self.shutdown_request(request)
+
+        init_db()
+        PooledWSGIServer("127.0.0.1", port, app).serve_forever()
+
+    else:
+        import uvicorn
+        from app.asgi import asgi_app
+
+        uvicorn.run(asgi_app, host="127.0.0.1", port=port, log_level="warning", lifespan="on")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake upstream latency in seconds.")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=16, help="Thread pool size of the sync server.")
+    parser.add_argument("--serve", choices=["sync", "async"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.threads)
+        return
+
+    from app.utils.fake_openai import FakeOpenAIServer
+
+    with tempfile.TemporaryDirectory(dir=SCRATCH_DIR) as workdir, FakeOpenAIServer(latency=args.latency) as upstream:
+        env = dict(os.environ, **BENCHMARK_ENV)
+        env.update({
+            "DATABASE_URL": f"sqlite:///{workdir}/bench.db",
+            "OPENAI_BASE_URL": upstream.base_url,
+            "OPENAI_MAX_CONNECTIONS": str(args.concurrency),
+            "OPENAI_MAX_KEEPALIVE_CONNECTIONS": str(args.concurrency),
+            # Every prompt is unique anyway; keep the cache out of the measurement
+            "RESPONSE_CACHE_ENABLED": "false",
+        })
+        os.environ.update(env)
+
+        headers = benchmark_headers()
+
+        print(f"upstream latency={args.latency}s concurrency={args.concurrency} requests={args.requests} sync threads={args.threads}")
+
+        for mode in ("sync", "async"):
+            port = free_port()
+            server = subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.bench_asgi", "--serve", mode, "--port", str(port), "--threads", str(args.threads)],
+                env=env
+            )
+
+            try:
+                wait_until_ready(port)
+                rps, latencies, errors = asyncio.run(drive(port, headers, args.concurrency, args.requests))
+
+            finally:
+                server.terminate()
+                server.wait()
+
+            print(
+                f"  {mode:<6} rps={rps:8.1f}  p50_ms={percentile(latencies, 50) * 1000:8.1f}  "
+                f"p99_ms={percentile(latencies, 99) * 1000:8.1f}  errors={errors}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Wire size and CPU cost of response compression on representative payloads.
+
+Payloads are the JSON envelopes the API returns, encoded with the app's JSON provider, with
+English-like generated text (seeded, so runs are comparable):
+
+- "text": one stored generation of 5000 characters (the UpdateGeneratedTextSchema maximum);
+- "history page": 20 full rows, the default page size;
+- "summary page": 100 rows of id, timestamp and prompt preview;
+- "batch": 10 generations of 1500 characters.
+
+Each encoding is timed at a fast level, the app default and its maximum. The last table
+shows what a precompressed cache hit costs instead (body hash and compare plus LRU lookup).
+
+    python -m benchmarks.bench_compression --iterations 200
+"""
+import time
+import random
+import argparse
+import datetime
+
+from benchmarks.common import print_table
+
+WORDS = (
+    "the model response story light keeper harbour night storm ship signal tower wind sea stone "
+    "again because through before would could never always water island long quiet morning "
+    "kept watch lamp oil stairs voice letter winter summer sailor careful bright dark answered"
+).split()
+
+
+def prose(rng, length):
+    words = []
+    size = 0
+
+    while size < length:
+        word = rng.choice(WORDS)
+        words.append(word + ("." if rng.random() < 0.08 else ""))
+        size += len(word) + 1
+
+    return " ".join(words)[:length]
+
+
+def row(rng, index, length):
+    return {
+        "id": index,
+        "user_id": 7,
+        "prompt": prose(rng, 120),
+        "response": prose(rng, length),
+        "timestamp": datetime.datetime(2025, 3, 1, 12, 0) + datetime.timedelta(minutes=index)
+    }
+
+
+def envelope(data):
+    return {"success": True, "message": "Generated texts retrieved successfully!", "status_code": 200, "data": data}
+
+
+def build_payloads(app):
+    rng = random.Random(7)
+    items = {
+        "text": envelope(row(rng, 1, 5000)),
+        "history page": envelope({"items": [row(rng, i, 5000) for i in range(20)], "next_cursor": "WyIyMDI1LTAzLTAxIiwgMjBd"}),
+        "summary page": envelope({"items": [{"id": i, "timestamp": datetime.datetime(2025, 3, 1), "prompt_preview": prose(rng, 100)} for i in range(100)]}),
+        "batch": envelope({"items": [{"success": True, "status_code": 201, "data": row(rng, i, 1500)} for i in range(10)]}),
+    }
+
+    return {label: app.json.dumps(payload).encode("utf-8") for label, payload in items.items()}
+
+
+def time_us(fn, iterations):
+    start = time.perf_counter()
+
+    for _ in range(iterations):
+        fn()
+
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    from app import app
+    from app.utils.compression import ResponseCompressor, GZIP, BROTLI, ZSTD
+
+    levels = {GZIP: (1, 5, 9), BROTLI: (1, 4, 11), ZSTD: (1, 3, 19)}
+    payloads = build_payloads(app)
+    rows = {}
+
+    for label, body in payloads.items():
+        rows[f"{label} (identity)"] = {"bytes": len(body)}
+
+        for encoding in ResponseCompressor().encodings:
+            for level in levels[encoding]:
+                compressor = ResponseCompressor(gzip_level=level, brotli_quality=level, zstd_level=level)
+
+                # Maximum levels are slow; fewer iterations keep the run short
+                iterations = max(5, args.iterations // (10 if level in (9, 11, 19) else 1))
+                us = time_us(lambda: compressor.compress(body, encoding), iterations)
+                size = len(compressor.compress(body, encoding))
+
+                rows[f"{label} {encoding}-{level}"] = {
+                    "bytes": size,
+                    "ratio_pct": round(size / len(body) * 100, 1),
+                    "compress_us": round(us, 1),
+                    "mb_per_s": round(len(body) / us, 1)
+                }
+
+    print_table("compressed size and cost (app defaults: gzip-5, br-1, zstd-3)", rows)
+
+    compressor = ResponseCompressor()
+    hits = {}
+
+    for label, body in payloads.items():
+        compressor.compress_cached(body, GZIP)
+        # A fresh copy per call: every response body is a new object, so its hash is never precomputed
+        hits[label] = {"cache_hit_us": round(time_us(lambda: compressor.compress_cached(bytes(bytearray(body)), GZIP), args.iterations * 10), 2)}
+
+    print_table("precompressed cache hit (gzip-5)", hits)
+
+
+if __name__ == "__main__":
+    main()
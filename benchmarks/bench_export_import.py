@@ -0,0 +1,145 @@
+"""
+NDJSON export and import: throughput and peak memory for a large history.
+
+Seeds `--rows` generated texts (default 1M) for one user in a scratch SQLite database, then, through
+the Flask test client:
+
+- export: GET /api/generate-text/export, consuming the stream chunk by chunk;
+- buffered: the same rows fetched with one query and encoded as one JSON document, which is
+  what a non-streaming endpoint would do (the baseline for memory);
+- import: POST /api/generate-text/import of the exported file, read from disk as a stream,
+  for a second user.
+
+Peak RSS is sampled every 10 ms while each step runs and reported above the RSS at its start.
+
+    python -m benchmarks.bench_export_import --rows 1000000
+"""
+import os
+import time
+import argparse
+import datetime
+import tempfile
+import threading
+
+from benchmarks.common import print_table, SCRATCH_DIR
+
+BATCH_SIZE = 20000
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE
+
+
+class PeakRSS:
+    """Samples RSS on a background thread while the block runs."""
+
+    def __enter__(self):
+        self.start = self.peak = rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_bytes())
+
+    def _sample(self):
+        while not self._stop.wait(0.01):
+            self.peak = max(self.peak, rss_bytes())
+
+    @property
+    def growth_mb(self):
+        return round((self.peak - self.start) / 2 ** 20, 1)
+
+
+def seed(engine, rows, response_length):
+    from sqlalchemy import insert
+    from app.models.user import User
+    from app.models.generated_text import GeneratedText
+
+    started = time.perf_counter()
+    base = datetime.datetime(2025, 1, 1)
+    response = ("The keeper climbed the stairs and lit the lamp. " * (response_length // 48 + 1))[:response_length]
+
+    with engine.begin() as connection:
+        connection.execute(insert(User), [{"id": 1, "username": "exporter", "password_hash": "-"}, {"id": 2, "username": "importer", "password_hash": "-"}])
+
+        for start in range(0, rows, BATCH_SIZE):
+            connection.execute(insert(GeneratedText), [
+                {"user_id": 1, "prompt": f"Write about lighthouse number {i}.", "response": response, "timestamp": base + datetime.timedelta(seconds=i)}
+                for i in range(start, min(start + BATCH_SIZE, rows))
+            ])
+
+    print(f"seeded {rows} rows in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--response-length", type=int, default=400)
+    parser.add_argument("--skip-buffered", action="store_true", help="Skip the buffered baseline, which needs memory for every row.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=SCRATCH_DIR) as workdir:
+        os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+        os.environ["IMPORT_MAX_ROWS"] = str(args.rows)
+
+        from sqlalchemy import select
+        from flask_jwt_extended import create_access_token
+        from app import app
+        from app.database import engine, init_db
+        from app.models.generated_text import GeneratedText
+
+        init_db()
+        seed(engine, args.rows, args.response_length)
+
+        with app.app_context():
+            exporter = {"Authorization": f"Bearer {create_access_token(identity='1')}"}
+            importer = {"Authorization": f"Bearer {create_access_token(identity='2')}"}
+
+        client = app.test_client()
+        path = os.path.join(workdir, "export.ndjson")
+        rows = {}
+
+        with PeakRSS() as rss, open(path, "wb") as file:
+            started = time.perf_counter()
+            response = client.get("/api/generate-text/export", headers=exporter)
+
+            for chunk in response.response:
+                file.write(chunk)
+
+            response.close()
+            elapsed = time.perf_counter() - started
+
+        size = os.path.getsize(path)
+        rows["export (ndjson stream)"] = {"seconds": round(elapsed, 2), "rows_per_s": round(args.rows / elapsed), "mb_per_s": round(size / 2 ** 20 / elapsed, 1), "rss_growth_mb": rss.growth_mb}
+
+        if not args.skip_buffered:
+            with PeakRSS() as rss, engine.connect() as connection:
+                started = time.perf_counter()
+                query = select(GeneratedText.id, GeneratedText.prompt, GeneratedText.response, GeneratedText.timestamp).where(GeneratedText.user_id == 1)
+                body = app.json.dumps([row._asdict() for row in connection.execute(query)])
+                elapsed = time.perf_counter() - started
+                del body
+
+            rows["export (buffered json)"] = {"seconds": round(elapsed, 2), "rows_per_s": round(args.rows / elapsed), "mb_per_s": round(size / 2 ** 20 / elapsed, 1), "rss_growth_mb": rss.growth_mb}
+
+        with PeakRSS() as rss, open(path, "rb") as file:
+            started = time.perf_counter()
+            response = client.post("/api/generate-text/import", input_stream=file, content_length=size, content_type="application/x-ndjson", headers=importer)
+            elapsed = time.perf_counter() - started
+
+        assert response.status_code == 201, response.json
+        rows["import (ndjson stream)"] = {"seconds": round(elapsed, 2), "rows_per_s": round(args.rows / elapsed), "mb_per_s": round(size / 2 ** 20 / elapsed, 1), "rss_growth_mb": rss.growth_mb}
+
+        engine.dispose()
+
+    print_table(f"{args.rows} rows, {size / 2 ** 20:.0f} MB of NDJSON", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+JSON response serialization cost by payload size.
+
+Builds the envelope `build_success_response` returns for a GeneratedText row (datetime
+timestamp, response text of the given size) and times `app.json.response(...)` with Flask's
+default provider against FastJSONProvider, with HTTP dates (the default) and with RFC 3339
+dates, inside an app context. The "list of 20" rows serialize a history page of twenty such rows.
+
+    python -m benchmarks.bench_json --iterations 2000
+"""
+import json
+import time
+import argparse
+import datetime
+
+from benchmarks.common import print_table
+
+SIZES = {"1 KB": 1024, "16 KB": 16 * 1024, "256 KB": 256 * 1024}
+
+
+def per_call_us(fn, iterations):
+    start = time.perf_counter()
+
+    for _ in range(iterations):
+        fn()
+
+    return round((time.perf_counter() - start) / iterations * 1e6, 2)
+
+
+def text_row(size):
+    return {
+        "id": 1,
+        "user_id": 1,
+        "prompt": "Write a long story about a lighthouse keeper.",
+        # Newlines and quotes make the encoder escape, as real completions do
+        "response": ('He said "keep the light burning".\n' * (size // 34 + 1))[:size],
+        "timestamp": datetime.datetime(2025, 3, 1, 12, 30, 15)
+    }
+
+
+def envelope(data):
+    return {"success": True, "message": "Generated text retrieved successfully!", "status_code": 200, "data": data}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    from app import app
+    from flask.json.provider import DefaultJSONProvider
+    from app.utils.json_provider import FastJSONProvider
+
+    providers = {"flask": DefaultJSONProvider(app), "fast": FastJSONProvider(app), "fast_rfc3339": FastJSONProvider(app)}
+    providers["fast_rfc3339"].rfc3339_dates = True
+    rows = {}
+
+    with app.app_context():
+        payloads = {label: envelope(text_row(size)) for label, size in SIZES.items()}
+        payloads["list of 20 x 1 KB"] = envelope({"items": [text_row(1024) for _ in range(20)], "next_cursor": None})
+
+        for label, payload in payloads.items():
+            # Fewer iterations for big payloads keep every row around the same wall time
+            iterations = max(50, args.iterations * 1024 // len(json.dumps(payload, default=str)))
+            flask_us = per_call_us(lambda: providers["flask"].response(payload), iterations)
+            fast_us = per_call_us(lambda: providers["fast"].response(payload), iterations)
+            rfc3339_us = per_call_us(lambda: providers["fast_rfc3339"].response(payload), iterations)
+
+            rows[label] = {"flask_us": flask_us, "fast_us": fast_us, "fast_rfc3339_us": rfc3339_us, "speedup": round(flask_us / fast_us, 1)}
+
+        print_table("response serialization (us per response)", rows)
+
+
+if __name__ == "__main__":
+    main()
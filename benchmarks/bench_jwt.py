@@ -0,0 +1,52 @@
+"""
+Per-request authentication overhead of `jwt_required`, with the verified-token cache on and off.
+
+Times `verify_jwt_in_request` inside a request context for a client reusing one token,
+which is all `@jwt_required()` does before the view runs.
+
+    python -m benchmarks.bench_jwt --iterations 20000
+"""
+import argparse
+
+from benchmarks.common import timed, summarize, print_table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    from app import app, jwt
+    from app.config import Config
+    from flask_jwt_extended import create_access_token, verify_jwt_in_request
+
+    with app.app_context():
+        token = create_access_token(identity="1")
+
+    environ = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+    rows = {}
+
+    for enabled in (False, True):
+        Config.JWT_CACHE_ENABLED = enabled
+        jwt.verified_tokens.clear()
+
+        def authenticate():
+            with app.test_request_context("/api/generate-text/", environ_base=environ):
+                verify_jwt_in_request()
+
+        # Warm-up also fills the cache when enabled
+        timed(authenticate, 100)
+        rows[f"cache {'on' if enabled else 'off'}"] = summarize(timed(authenticate, args.iterations))
+
+    # The request context itself, to separate framework cost from token verification
+    def context_only():
+        with app.test_request_context("/api/generate-text/", environ_base=environ):
+            pass
+
+    rows["request context only"] = summarize(timed(context_only, args.iterations))
+
+    print_table(f"verify_jwt_in_request, one reused token ({args.iterations} calls)", rows)
+
+
+if __name__ == "__main__":
+    main()
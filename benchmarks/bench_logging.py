@@ -0,0 +1,137 @@
+"""
+Logging cost on request threads during an error storm.
+
+`--threads` threads each report `--errors` failures, the way a request does when OpenAI is
+down, into a sink that takes `--sink-latency` seconds per write (a pipe to a log collector
+or a slow terminal). Pipelines compared:
+
+- "sync text, logged twice": the previous setup, colored text written on the request
+  thread, with BaseError and handle_exception both logging;
+- "sync json": one JSON record per error, written on the request thread;
+- "async json": request threads enqueue, the listener thread writes;
+- "async json + rate limit": as above, identical errors limited to 10 per minute.
+
+Reported per pipeline: request-thread time per error, errors per second across threads,
+records written, and how long the listener needed to drain the queue afterwards.
+
+    python -m benchmarks.bench_logging --threads 8 --errors 2000 --sink-latency 0.00005
+"""
+import time
+import logging
+import argparse
+import threading
+
+from benchmarks.common import print_table
+
+
+class SlowSink:
+    """Text stream whose writes block for a fixed time, like a pipe whose reader lags."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.writes = 0
+
+
+    def write(self, text):
+        self.writes += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+
+    def flush(self):
+        pass
+
+
+def build_pipeline(kind, sink, queue_size):
+    from colorlog import ColoredFormatter
+    from app.log_pipeline import LogPipeline, JsonFormatter, RequestIdFilter, ErrorRateLimitFilter
+
+    output = logging.StreamHandler(sink)
+
+    if kind.startswith("sync text"):
+        output.setFormatter(ColoredFormatter("%(log_color)s%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+
+    else:
+        output.setFormatter(JsonFormatter())
+
+    burst = 10 if "rate limit" in kind else 0
+    filters = [RequestIdFilter(), ErrorRateLimitFilter(burst=burst, window=60)]
+
+    return LogPipeline(output, kind.startswith("async"), queue_size, filters)
+
+
+def storm(kind, threads, errors, sink_latency, queue_size):
+    from app.log_pipeline import request_id_var
+
+    sink = SlowSink(sink_latency)
+    pipeline = build_pipeline(kind, sink, queue_size)
+
+    logger = logging.getLogger(f"bench.{kind}")
+    logger.handlers = [pipeline.handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+
+    records_per_error = 2 if "twice" in kind else 1
+    barrier = threading.Barrier(threads + 1)
+    busy = []
+
+    def worker(index):
+        barrier.wait()
+        start = time.perf_counter()
+
+        for i in range(errors):
+            request_id_var.set(f"{index}-{i}")
+
+            logger.error("OpenAI API is currently unavailable. Please try again later.")
+
+            if records_per_error == 2:
+                logger.error("Unhandled exception: OpenAI API is currently unavailable. Please try again later.")
+
+        busy.append(time.perf_counter() - start)
+
+    pipeline.start()
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+
+    for thread in workers:
+        thread.start()
+
+    barrier.wait()
+    start = time.perf_counter()
+
+    for thread in workers:
+        thread.join()
+
+    elapsed = time.perf_counter() - start
+    pipeline.stop()
+    drained = time.perf_counter() - start - elapsed
+
+    total = threads * errors
+
+    return {
+        "us_per_error": round(sum(busy) / total * 1e6, 2),
+        "errors_per_s": round(total / elapsed),
+        "written": sink.writes,
+        "dropped": pipeline.stats()["dropped"],
+        "drain_s": round(drained, 3) if pipeline.use_queue else 0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--errors", type=int, default=2000, help="Errors reported by each thread.")
+    parser.add_argument("--sink-latency", type=float, default=0.00005, help="Seconds each write to the sink blocks.")
+    parser.add_argument("--queue-size", type=int, default=100000)
+    args = parser.parse_args()
+
+    rows = {}
+
+    for kind in ("sync text, logged twice", "sync json", "async json", "async json + rate limit"):
+        rows[kind] = storm(kind, args.threads, args.errors, args.sink_latency, args.queue_size)
+
+    print_table(f"error storm: {args.threads} threads x {args.errors} errors, {args.sink_latency * 1e6:.0f} us per write", rows)
+
+
+if __name__ == "__main__":
+    main()
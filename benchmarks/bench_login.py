@@ -0,0 +1,81 @@
+"""
+Login throughput with a cold and a warm user lookup cache.
+
+Seeds `--users` users in SQLite, then runs `AuthService.authenticate_user` for random
+users. "cold" clears the cache before every login, so each one queries the database;
+"warm" serves the username lookup from the cache. The password hashes are cheap pbkdf2
+(one iteration) so the lookup is not hidden behind hashing cost; with the production hash
+method, hashing dominates login time and the cache mainly relieves database load.
+
+    python -m benchmarks.bench_login --users 100000 --logins 5000
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+
+from benchmarks.common import summarize, print_table, SCRATCH_DIR
+
+PASSWORD = "benchmark-password"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--logins", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=SCRATCH_DIR) as workdir:
+        os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+
+        from app import app
+        from sqlalchemy import insert
+        from app.models.user import User
+        from app.database import engine, init_db, db_session
+        from app.services.user_cache import user_cache
+        from app.services.auth_service import AuthService
+        from werkzeug.security import generate_password_hash
+
+        init_db()
+        password_hash = generate_password_hash(PASSWORD, method="pbkdf2:sha256:1")
+
+        with engine.begin() as connection:
+            connection.execute(insert(User), [
+                {"username": f"user{i}", "password_hash": password_hash} for i in range(args.users)
+            ])
+
+        usernames = [f"user{random.randrange(args.users)}" for _ in range(args.logins)]
+        rows = {}
+
+        with app.app_context():
+            for mode in ("cold", "warm"):
+                samples = []
+                user_cache.clear()
+
+                # Prime the cache so the warm run measures hits only
+                if mode == "warm":
+                    for username in set(usernames):
+                        AuthService.authenticate_user(username, PASSWORD)
+
+                started = time.perf_counter()
+
+                for username in usernames:
+                    if mode == "cold":
+                        user_cache.clear()
+
+                    start = time.perf_counter()
+                    AuthService.authenticate_user(username, PASSWORD)
+                    samples.append(time.perf_counter() - start)
+
+                elapsed = time.perf_counter() - started
+                rows[mode] = {"logins_per_s": round(len(usernames) / elapsed, 1), **summarize(samples)}
+
+        db_session.remove()
+        engine.dispose()
+
+    print_table(f"login of random users ({args.users} seeded, {args.logins} logins)", rows)
+
+
+if __name__ == "__main__":
+    main()
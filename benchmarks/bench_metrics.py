@@ -0,0 +1,121 @@
+"""
+Cost of the metrics instrumentation, per request and as a share of request time.
+
+Serves requests in-process through the Flask test client, switching instrumentation off
+and on for alternate requests so drift affects both equally, and compares medians:
+
+- "get text": JWT check plus one indexed SELECT, the cheapest authenticated route
+  (route timer, request counter, query timer, pool checkout timer);
+- "generate": a generation against a local fake OpenAI server with `--latency` seconds
+  of upstream delay (adds the upstream attempt and token histograms).
+
+The "primitives" table times the individual recording calls.
+
+    python -m benchmarks.bench_metrics --requests 20000 --latency 0.05
+"""
+import os
+import time
+import argparse
+import tempfile
+import statistics
+
+from benchmarks.common import timed, benchmark_headers, print_table, SCRATCH_DIR
+
+
+def per_call_us(fn, iterations):
+    start = time.perf_counter()
+
+    for _ in range(iterations):
+        fn()
+
+    return round((time.perf_counter() - start) / iterations * 1e6, 3)
+
+
+def compare(label, fn, requests, rows):
+    """
+    Median request time with metrics off and on, and the relative overhead.
+    Instrumentation is toggled on every request, so both sides see the same noise.
+    """
+    from app.utils.metrics import metrics
+
+    samples = {False: [], True: []}
+
+    for i in range(requests):
+        enabled = bool(i % 2)
+        metrics.enabled = enabled
+
+        start = time.perf_counter()
+        fn()
+        samples[enabled].append(time.perf_counter() - start)
+
+    off, on = statistics.median(samples[False]), statistics.median(samples[True])
+
+    rows[label] = {
+        "off_us": round(off * 1e6, 1),
+        "on_us": round(on * 1e6, 1),
+        "overhead_us": round((on - off) * 1e6, 1),
+        "overhead_pct": round((on - off) / off * 100, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake upstream latency in seconds.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=SCRATCH_DIR) as workdir:
+        os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+        os.environ["RATE_LIMIT_ENABLED"] = "false"
+        os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+
+        from app import app
+        from app.config import Config
+        from app.models.user import User
+        from app.utils.fake_openai import FakeOpenAIServer
+        from app.database import init_db, db_session, engine
+        from app.models.generated_text import GeneratedText
+        from app.services.openai_client import OpenAIClientRegistry
+        from app.utils.metrics import http_request_duration, http_requests
+
+        init_db()
+        db_session.add(User(id=1, username="bench", password_hash="-"))
+        db_session.add(GeneratedText(id=1, user_id=1, prompt="Benchmark prompt.", response="Benchmark response."))
+        db_session.commit()
+        db_session.remove()
+
+        client = app.test_client()
+        headers = benchmark_headers()
+        rows = {}
+
+        def get_text():
+            client.get("/api/generate-text/1", headers=headers)
+
+        # Warm-up: first requests compile the URL map and fill the JWT cache
+        timed(get_text, 200)
+        compare("get text", get_text, args.requests, rows)
+
+        with FakeOpenAIServer(latency=args.latency) as server:
+            Config.OPENAI_BASE_URL = server.base_url
+            OpenAIClientRegistry.reset()
+
+            def generate():
+                client.post("/api/generate-text/", json={"prompt": "Tell me a joke."}, headers=headers)
+
+            # Each generation waits on the upstream, so fewer requests give the same precision
+            compare(f"generate ({args.latency * 1000:.0f} ms upstream)", generate, max(100, args.requests // 20), rows)
+
+        print_table("metrics instrumentation overhead", rows)
+
+        primitives = {
+            "histogram.observe": {"us_per_call": per_call_us(lambda: http_request_duration.observe(0.01, "text.generate_text", "POST"), 200000)},
+            "counter.inc": {"us_per_call": per_call_us(lambda: http_requests.inc("text.generate_text", "POST", 201), 200000)},
+        }
+        print_table("recording primitives", primitives)
+
+        db_session.remove()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Cold vs warm OpenAI client latency against a local stub server.
+
+cold: a new `OpenAI` client (and HTTPX pool) per call, as before the registry.
+warm: the pooled client from `OpenAIClientRegistry`.
+
+    python -m benchmarks.bench_openai_client --iterations 500
+"""
+import argparse
+
+from benchmarks.common import print_table, summarize, timed
+from openai import OpenAI
+from app.config import Config
+from app.utils.fake_openai import FakeOpenAIServer
+from app.services.openai_client import OpenAIClientRegistry
+
+MESSAGES = [{"role": "user", "content": "Write a haiku about connection pools."}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial upstream latency in seconds.")
+    args = parser.parse_args()
+
+    with FakeOpenAIServer(latency=args.latency) as server:
+        Config.OPENAI_BASE_URL = server.base_url
+
+        def cold():
+            client = OpenAI(api_key=Config.OPENAI_API_KEY, base_url=server.base_url)
+            client.chat.completions.create(model=Config.OPENAI_MODEL, messages=MESSAGES)
+            client.close()
+
+        def warm():
+            client = OpenAIClientRegistry.get_client()
+            client.chat.completions.create(model=Config.OPENAI_MODEL, messages=MESSAGES)
+
+        # Prime imports and the pooled connection before measuring
+        cold()
+        warm()
+
+        connections_before = server.connection_count
+        cold_samples = timed(cold, args.iterations)
+        cold_connections = server.connection_count - connections_before
+
+        connections_before = server.connection_count
+        warm_samples = timed(warm, args.iterations)
+        warm_connections = server.connection_count - connections_before
+
+    print_table(f"OpenAI client latency ({args.iterations} calls)", {
+        f"cold ({cold_connections} conns)": summarize(cold_samples),
+        f"warm ({warm_connections} conns)": summarize(warm_samples),
+    })
+
+
+if __name__ == "__main__":
+    main()
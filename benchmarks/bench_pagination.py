@@ -0,0 +1,107 @@
+"""
+Page latency of the history listing at increasing depths: keyset cursor vs OFFSET.
+
+Seeds a SQLite table with `--rows` generated texts spread over `--users` users, then
+fetches one page at several depths into the first user's history. Keyset pages seek
+straight to the cursor through the (user_id, timestamp, id) index, so their latency stays
+flat; OFFSET pages walk and discard every skipped row.
+
+    python -m benchmarks.bench_pagination --rows 1000000 --users 4
+"""
+import os
+import time
+import argparse
+import datetime
+import tempfile
+
+from benchmarks.common import timed, summarize, print_table, SCRATCH_DIR
+
+
+def seed(engine, rows, users, response_bytes):
+    from sqlalchemy import insert
+    from app.models.user import User
+    from app.models.generated_text import GeneratedText
+
+    started = time.perf_counter()
+    base = datetime.datetime(2025, 1, 1)
+    response = "x" * response_bytes
+
+    with engine.begin() as connection:
+        connection.execute(insert(User), [{"id": i + 1, "username": f"user{i + 1}", "password_hash": "-"} for i in range(users)])
+
+        for start in range(0, rows, 50000):
+            connection.execute(insert(GeneratedText), [
+                {
+                    "user_id": i % users + 1,
+                    "prompt": f"Benchmark prompt number {i}",
+                    "response": response,
+                    "timestamp": base + datetime.timedelta(seconds=i)
+                }
+                for i in range(start, min(start + 50000, rows))
+            ])
+
+    print(f"seeded {rows} rows for {users} users in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=20, help="Page size.")
+    parser.add_argument("--response-bytes", type=int, default=256)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=SCRATCH_DIR) as workdir:
+        os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+
+        from sqlalchemy import select
+        from app.database import engine, init_db, db_session
+        from app.models.generated_text import GeneratedText
+        from app.services.generated_text_service import GeneratedTextService
+
+        init_db()
+        seed(engine, args.rows, args.users, args.response_bytes)
+
+        per_user = args.rows // args.users
+        depths = [depth for depth in (0, 1000, 10000, 100000, per_user - args.limit) if 0 <= depth <= per_user - args.limit]
+        newest_first = (GeneratedText.timestamp.desc(), GeneratedText.id.desc())
+        rows = {}
+
+        for depth in sorted(set(depths)):
+            cursor = None
+
+            if depth:
+                # Cursor of the row just above the page, as a client would hold after paging down
+                last = db_session.execute(
+                    select(GeneratedText.timestamp, GeneratedText.id)
+                    .where(GeneratedText.user_id == 1)
+                    .order_by(*newest_first)
+                    .offset(depth - 1)
+                    .limit(1)
+                ).one()
+                cursor = GeneratedTextService._encode_cursor(last.timestamp, last.id)
+
+            def keyset():
+                GeneratedTextService.list_texts(1, limit=args.limit, cursor=cursor)
+
+            def offset():
+                db_session.execute(
+                    select(GeneratedText.id, GeneratedText.user_id, GeneratedText.prompt, GeneratedText.response, GeneratedText.timestamp)
+                    .where(GeneratedText.user_id == 1)
+                    .order_by(*newest_first)
+                    .offset(depth)
+                    .limit(args.limit)
+                ).all()
+
+            rows[f"keyset depth={depth}"] = summarize(timed(keyset, args.iterations))
+            rows[f"offset depth={depth}"] = summarize(timed(offset, args.iterations))
+
+        db_session.remove()
+        engine.dispose()
+
+    print_table(f"page of {args.limit} from user 1 ({per_user} rows)", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Cost of the request profiler.
+
+Serves requests in-process through the Flask test client, cycling through three modes on
+consecutive requests so drift affects all of them equally, and compares medians:
+
+- "off": PROFILER_ENABLED=false, the hook returns at once;
+- "idle": enabled at a zero sample rate, the cost every unsampled request pays;
+- "profiled": every request sampled (stack sampler thread, phase timers, profile storage).
+
+Routes: "get text" (JWT check plus one indexed SELECT) and "generate" against a local fake
+OpenAI server with `--latency` seconds of upstream delay. The last profile of each route is
+printed with its phase breakdown.
+
+    python -m benchmarks.bench_profiler --requests 6000 --latency 0.05
+"""
+import os
+import time
+import argparse
+import tempfile
+import statistics
+
+from benchmarks.common import timed, benchmark_headers, print_table, SCRATCH_DIR
+
+MODES = ("off", "idle", "profiled")
+
+
+def compare(label, fn, requests, rows):
+    """Median request time in each mode and the overhead relative to "off"."""
+    from app.utils.profiler import profiler
+
+    samples = {mode: [] for mode in MODES}
+
+    for i in range(requests):
+        mode = MODES[i % len(MODES)]
+        profiler.enabled = mode != "off"
+        profiler.sample_rate = 1.0 if mode == "profiled" else 0.0
+
+        start = time.perf_counter()
+        fn()
+        samples[mode].append(time.perf_counter() - start)
+
+    medians = {mode: statistics.median(values) for mode, values in samples.items()}
+    off = medians["off"]
+
+    rows[label] = {"off_us": round(off * 1e6, 1)}
+
+    for mode in ("idle", "profiled"):
+        rows[label][f"{mode}_us"] = round(medians[mode] * 1e6, 1)
+        rows[label][f"{mode}_pct"] = round((medians[mode] - off) / off * 100, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=6000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake upstream latency in seconds.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=SCRATCH_DIR) as workdir:
+        os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+        os.environ["RATE_LIMIT_ENABLED"] = "false"
+        os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+
+        from app import app
+        from app.config import Config
+        from app.models.user import User
+        from app.utils.profiler import profiler
+        from app.utils.fake_openai import FakeOpenAIServer
+        from app.database import init_db, db_session, engine
+        from app.models.generated_text import GeneratedText
+        from app.services.openai_client import OpenAIClientRegistry
+
+        init_db()
+        db_session.add(User(id=1, username="bench", password_hash="-"))
+        db_session.add(GeneratedText(id=1, user_id=1, prompt="Benchmark prompt.", response="Benchmark response."))
+        db_session.commit()
+        db_session.remove()
+
+        client = app.test_client()
+        headers = benchmark_headers()
+        rows = {}
+        breakdowns = {}
+
+        def get_text():
+            client.get("/api/generate-text/1", headers=headers)
+
+        # Warm-up: first requests compile the URL map and fill the JWT cache
+        timed(get_text, 200)
+        compare("get text", get_text, args.requests, rows)
+        breakdowns["get text"] = profiler.profiles()[0].summary()["phases_ms"]
+
+        with FakeOpenAIServer(latency=args.latency) as server:
+            Config.OPENAI_BASE_URL = server.base_url
+            OpenAIClientRegistry.reset()
+
+            def generate():
+                client.post("/api/generate-text/", json={"prompt": "Tell me a joke."}, headers=headers)
+
+            # Each generation waits on the upstream, so fewer requests give the same precision
+            label = f"generate ({args.latency * 1000:.0f} ms upstream)"
+            compare(label, generate, max(150, args.requests // 20), rows)
+            breakdowns[label] = profiler.profiles()[0].summary()["phases_ms"]
+
+        print_table("profiler overhead", rows)
+        print_table("phase breakdown of the last profile (ms)", breakdowns)
+
+        db_session.remove()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Per-request cost of the rate limiter's in-memory backend.
+
+Times the two calls a generation request makes before its view runs: `acquire` against
+the requests/s and tokens/min buckets, and the `enter`/`leave` pair for the in-flight cap.
+"hot user" reuses one user's buckets; "many users" spreads calls over `--users` users so
+the bucket table is large; "rejected" measures a user that is over the limit. Budgets
+are set high enough that only the rejected row is ever refused.
+
+    python -m benchmarks.bench_rate_limiter --iterations 200000 --users 50000
+"""
+import time
+import random
+import argparse
+
+from benchmarks.common import print_table
+
+
+def per_call(fn, iterations):
+    """Mean cost of one call in microseconds; calls are too fast to time individually."""
+    start = time.perf_counter()
+
+    for _ in range(iterations):
+        fn()
+
+    return round((time.perf_counter() - start) / iterations * 1e6, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=50000)
+    args = parser.parse_args()
+
+    from app.services.rate_limiter import RateLimiter, MemoryRateLimitBackend
+
+    limiter = RateLimiter(MemoryRateLimitBackend(), requests_per_second=1e9, burst=10**9, tokens_per_minute=10**12, max_in_flight=10**9)
+    users = iter([str(random.randrange(args.users)) for _ in range(args.iterations)])
+    rows = {}
+
+    rows["acquire, hot user"] = {"us_per_call": per_call(lambda: limiter.acquire("1", 1, 600), args.iterations)}
+    rows["acquire, many users"] = {"us_per_call": per_call(lambda: limiter.acquire(next(users), 1, 600), args.iterations)}
+
+    def enter_and_leave():
+        limiter.enter("1")
+        limiter.leave("1")
+
+    rows["enter + leave"] = {"us_per_call": per_call(enter_and_leave, args.iterations)}
+
+    refusing = RateLimiter(MemoryRateLimitBackend(), requests_per_second=0.001, burst=1)
+    refusing.acquire("1")
+
+    rows["acquire, rejected"] = {"us_per_call": per_call(lambda: refusing.acquire("1"), args.iterations)}
+
+    print_table(f"rate limiter, memory backend ({args.iterations} calls, {limiter.stats()['buckets']} buckets)", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Search latency: the full-text index behind /api/generate-text/search vs a naive ILIKE scan.
+
+Seeds `--rows` generated texts (default 1M) whose words follow a Zipf distribution over a
+`--vocabulary` of synthetic words, so there are very common and very rare terms as in real
+text. One user in ten owns a tenth of all rows ("heavy" user); the rest are spread over the
+other users ("typical" user). Each query is timed for both users:
+
+- fts: GeneratedTextService.search_texts (FTS5 on SQLite, tsvector/GIN on Postgres), ranked, with snippets;
+- ilike: every term matched with ILIKE '%term%' against prompt or response of the user's rows, newest first.
+
+    python -m benchmarks.bench_search --rows 1000000
+    python -m benchmarks.bench_search --database-url postgresql://postgres:pw@localhost/bench
+"""
+import os
+import time
+import random
+import argparse
+import datetime
+import tempfile
+import itertools
+
+from benchmarks.common import timed, summarize, print_table, SCRATCH_DIR
+
+BATCH_SIZE = 20000
+
+
+def vocabulary(rng, size):
+    """Pronounceable synthetic words; index 0 is the most frequent."""
+    consonants, vowels = "bcdfghklmnprstvz", "aeiou"
+    words = set()
+
+    while len(words) < size:
+        length = rng.randint(2, 4)
+        words.add("".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(length)))
+
+    return sorted(words, key=lambda word: rng.random())
+
+
+def seed(engine, rows, users, words_per_response, vocabulary_size):
+    from sqlalchemy import insert
+    from app.models.user import User
+    from app.models.generated_text import GeneratedText
+
+    started = time.perf_counter()
+    rng = random.Random(21)
+    words = vocabulary(rng, vocabulary_size)
+
+    # Zipf's law: the k-th most common word appears with frequency proportional to 1/k
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    base = datetime.datetime(2025, 1, 1)
+
+    def text(count):
+        return " ".join(rng.choices(words, cum_weights=cum_weights, k=count))
+
+    with engine.begin() as connection:
+        connection.execute(insert(User), [{"id": i + 1, "username": f"user{i + 1}", "password_hash": "-"} for i in range(users)])
+
+        for start in range(0, rows, BATCH_SIZE):
+            connection.execute(insert(GeneratedText), [
+                {
+                    # Every tenth row belongs to the heavy user
+                    "user_id": 1 if i % 10 == 0 else i % (users - 1) + 2,
+                    "prompt": text(12),
+                    "response": text(words_per_response),
+                    "timestamp": base + datetime.timedelta(seconds=i)
+                }
+                for i in range(start, min(start + BATCH_SIZE, rows))
+            ])
+
+    print(f"seeded {rows} rows for {users} users in {time.perf_counter() - started:.1f}s")
+
+    return words
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--words-per-response", type=int, default=60)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--database-url", help="Benchmark this (empty) database instead of a scratch SQLite file.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=SCRATCH_DIR) as workdir:
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{workdir}/bench.db"
+
+        from sqlalchemy import select, or_, func
+        from app.database import engine, init_db, db_session
+        from app.models.generated_text import GeneratedText
+        from app.services.generated_text_service import GeneratedTextService
+
+        init_db()
+        words = seed(engine, args.rows, args.users, args.words_per_response, args.vocabulary)
+
+        if engine.dialect.name == "postgresql":
+            with engine.begin() as connection:
+                connection.exec_driver_sql("ANALYZE generated_texts")
+
+        queries = {
+            "common term": words[5],
+            "rare term": words[args.vocabulary // 2],
+            "two terms": f"{words[50]} {words[300]}",
+        }
+
+        def ilike(user_id, query):
+            terms = [or_(GeneratedText.prompt.ilike(f"%{term}%"), GeneratedText.response.ilike(f"%{term}%")) for term in query.split()]
+
+            return db_session.execute(
+                select(GeneratedText.id, GeneratedText.timestamp, func.substr(GeneratedText.response, 1, 200))
+                .where(GeneratedText.user_id == user_id, *terms)
+                .order_by(GeneratedText.timestamp.desc())
+                .limit(args.limit)
+            ).all()
+
+        rows = {}
+
+        for (label, query), (user_label, user_id) in itertools.product(queries.items(), (("heavy", 1), ("typical", 2))):
+            hits = len(GeneratedTextService.search_texts(user_id, query, args.limit)["items"])
+
+            rows[f"{label} {user_label} fts"] = {"hits": hits, **summarize(timed(lambda: GeneratedTextService.search_texts(user_id, query, args.limit), args.iterations))}
+            rows[f"{label} {user_label} ilike"] = {"hits": len(ilike(user_id, query)), **summarize(timed(lambda: ilike(user_id, query), max(3, args.iterations // 4)))}
+
+        db_session.remove()
+        engine.dispose()
+
+    print_table(f"top {args.limit} matches, {args.rows} rows on {engine.dialect.name}", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Semantic cache: how often reworded prompts hit, and what a lookup costs as the index grows.
+
+Hit rate: `--subjects` base prompts built from templates ("Write a poem about {subject}.") are
+indexed, then queried with rewordings of each (filler words, case, punctuation, a typo) and with
+prompts on subjects that were never indexed. A rewording that hits is a saved upstream call; a
+new subject that hits would be a wrong answer. Both are reported per similarity threshold.
+
+Latency: `--entries` synthetic prompts are indexed, then lookups are timed one at a time (as
+/api/generate-text does), in batches of `--batch` (as /batch does), and against an exact scan of
+every vector (no index). The last table shows the cost of saving the index and mapping it back.
+
+    python -m benchmarks.bench_semantic_cache --entries 100000
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+
+import numpy as np
+
+from benchmarks.common import timed, summarize, print_table, SCRATCH_DIR
+
+TEMPLATES = (
+    "Write a short poem about {}.",
+    "Summarize the history of {}.",
+    "Explain {} to a ten year old.",
+    "Give me three fun facts about {}.",
+    "Write a product description for {}.",
+)
+
+SUBJECTS = (
+    "the sea", "lighthouses", "volcanoes", "the desert", "glaciers", "rainforests", "coffee", "green tea",
+    "bicycles", "railways", "jazz", "chess", "honeybees", "octopuses", "saturn", "the moon", "photosynthesis",
+    "gravity", "electricity", "sourdough bread", "cheese", "the alps", "origami", "tornadoes", "coral reefs",
+    "penguins", "wolves", "the violin", "typewriters", "submarines", "the compass", "kites", "marathons",
+    "the printing press", "the silk road", "the nile", "vaccines",
+)
+
+
+def subjects(rng, count):
+    """The named subjects, then made-up words so any count works."""
+    names = list(SUBJECTS)
+
+    while len(names) < count:
+        names.append("".join(rng.choice("bcdfghklmnprstvz") + rng.choice("aeiou") for _ in range(rng.randint(2, 4))))
+
+    return names[:count]
+
+
+def rewordings(rng, prompt):
+    """Edits a user makes when asking the same thing again."""
+    stripped = prompt.rstrip(".")
+    position = rng.randrange(1, len(stripped) - 1)
+
+    return {
+        "lowercase, no period": stripped.lower(),
+        "please": f"Please {prompt[0].lower()}{prompt[1:]}",
+        "can you": f"Can you {prompt[0].lower()}{stripped[1:]}?",
+        "extra spaces": "  ".join(prompt.split(" ")),
+        "typo": stripped[:position] + stripped[position + 1] + stripped[position] + stripped[position + 2:],
+    }
+
+
+def hit_rates(args):
+    from app.services.semantic_cache import HashingVectorizer, LSHIndex
+
+    rng = random.Random(22)
+    vectorizer = HashingVectorizer(args.dimensions)
+    names = subjects(rng, args.subjects * 2)
+    indexed = [template.format(subject) for subject in names[:args.subjects] for template in TEMPLATES]
+    unseen = [template.format(subject) for subject in names[args.subjects:] for template in TEMPLATES]
+
+    index = LSHIndex(args.dimensions)
+    index.add(vectorizer.transform(indexed), np.arange(len(indexed)), np.zeros(len(indexed), dtype=np.uint64))
+
+    queries = {}
+
+    for prompt_id, prompt in enumerate(indexed):
+        for label, variant in rewordings(rng, prompt).items():
+            queries.setdefault(label, []).append((variant, prompt_id))
+
+    queries["new subject"] = [(prompt, -1) for prompt in unseen]
+    rows = {}
+
+    for label, pairs in queries.items():
+        ids, sims = index.search(vectorizer.transform([prompt for prompt, _ in pairs]), np.zeros(len(pairs), dtype=np.uint64))
+        expected = np.array([prompt_id for _, prompt_id in pairs])
+        row = {"n": len(pairs)}
+
+        for threshold in (0.85, 0.9, 0.95):
+            hit = sims >= threshold
+            # For rewordings a hit must be the prompt they came from; for new subjects every hit is wrong
+            row[f"hit@{threshold}"] = round(float(np.mean(hit & (ids == expected) if label != "new subject" else hit)) * 100, 1)
+
+        rows[label] = row
+
+    print_table(f"hit rate % ({len(indexed)} indexed prompts; 'new subject' hits are false positives)", rows)
+
+
+def latency(args):
+    from app.services.semantic_cache import HashingVectorizer, LSHIndex
+
+    rng = random.Random(7)
+    vectorizer = HashingVectorizer(args.dimensions)
+    words = subjects(rng, 5000)
+
+    def prompt():
+        return rng.choice(TEMPLATES).format(" ".join(rng.choices(words, k=rng.randint(1, 4))))
+
+    started = time.perf_counter()
+    vectors = np.concatenate([vectorizer.transform([prompt() for _ in range(10000)]) for _ in range(0, args.entries, 10000)])[:args.entries]
+    index = LSHIndex(args.dimensions)
+    index.add(vectors, np.arange(len(vectors)), np.zeros(len(vectors), dtype=np.uint64))
+    print(f"embedded and indexed {len(vectors)} prompts in {time.perf_counter() - started:.1f}s")
+
+    queries = [prompt() for _ in range(args.batch * 20)]
+    query_vectors = vectorizer.transform(queries)
+    tag = np.zeros(1, dtype=np.uint64)
+    single = iter(range(len(queries)))
+    batches = iter(range(0, len(queries), args.batch))
+
+    def lookup():
+        row = next(single)
+        index.search(vectorizer.transform([queries[row]]), tag)
+
+    def lookup_batch():
+        start = next(batches)
+        index.search(vectorizer.transform(queries[start:start + args.batch]), np.zeros(args.batch, dtype=np.uint64))
+
+    def exact_scan():
+        (vectors @ query_vectors[rng.randrange(len(queries))]).argmax()
+
+    rows = {
+        "embed only": summarize(timed(lambda: vectorizer.transform([queries[rng.randrange(len(queries))]]), 200)),
+        "lsh single": summarize(timed(lookup, len(queries))),
+        f"lsh batch of {args.batch}": summarize(timed(lookup_batch, 20)),
+        "exact scan": summarize(timed(exact_scan, 50)),
+    }
+
+    print_table(f"lookup latency, {len(vectors)} entries", rows)
+
+    with tempfile.TemporaryDirectory(dir=SCRATCH_DIR) as workdir:
+        path = os.path.join(workdir, "semantic.idx")
+        save = summarize(timed(lambda: index.save(path), 3))
+        load = summarize(timed(lambda: LSHIndex.load(path), 20))
+        loaded = LSHIndex.load(path)
+        first = summarize(timed(lambda: loaded.search(query_vectors[:1], tag), 1))
+
+        print_table("persistence", {
+            "save": {**save, "file_mb": round(os.path.getsize(path) / 2 ** 20, 1)},
+            "load (memory map)": load,
+            "first lookup after load": first,
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--subjects", type=int, default=200)
+    parser.add_argument("--dimensions", type=int, default=512)
+    parser.add_argument("--batch", type=int, default=32)
+    args = parser.parse_args()
+
+    hit_rates(args)
+    latency(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Requests per second of the production Gunicorn server as the worker count grows.
+
+Each run starts `gunicorn wsgi:app` with gunicorn.conf.py, changing only APP_WORKERS,
+against a fake OpenAI upstream that adds artificial latency to every completion.
+Throughput is bounded by workers * threads / latency while the host has spare CPU and
+levels off once every core is busy, so compare results with the `cpus` figure printed first.
+
+    python -m benchmarks.bench_workers --workers 1 2 4 8 --threads 4 --latency 0.2
+"""
+import os
+import sys
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+from benchmarks.common import drive, free_port, percentile, SCRATCH_DIR, BENCHMARK_ENV, wait_until_ready, benchmark_headers
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=4, help="Threads per worker.")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake upstream latency in seconds.")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    from app.utils.fake_openai import FakeOpenAIServer
+
+    print(f"cpus={os.cpu_count()} threads/worker={args.threads} upstream latency={args.latency}s concurrency={args.concurrency}")
+
+    with tempfile.TemporaryDirectory(dir=SCRATCH_DIR) as workdir, FakeOpenAIServer(latency=args.latency) as upstream:
+        env = dict(os.environ, **BENCHMARK_ENV)
+        env.update({
+            "DATABASE_URL": f"sqlite:///{workdir}/bench.db",
+            "OPENAI_BASE_URL": upstream.base_url,
+            "APP_THREADS": str(args.threads),
+            # Every prompt is unique anyway; keep the cache out of the measurement
+            "RESPONSE_CACHE_ENABLED": "false",
+        })
+        os.environ.update(env)
+        headers = benchmark_headers()
+
+        for workers in args.workers:
+            port = free_port()
+            env.update({"APP_WORKERS": str(workers), "APP_PORT": str(port), "APP_HOST": "127.0.0.1"})
+
+            server = subprocess.Popen(
+                [sys.executable, "-m", "gunicorn", "--access-logfile", "/dev/null", "--log-level", "warning", "wsgi:app"],
+                cwd=ROOT,
+                env=env,
+                # Per-request application logs would dominate the measurement
+                stderr=subprocess.DEVNULL
+            )
+
+            try:
+                wait_until_ready(port)
+                rps, latencies, errors = asyncio.run(drive(port, headers, args.concurrency, args.requests))
+
+            finally:
+                server.terminate()
+                server.wait()
+
+            print(
+                f"  workers={workers:<3} rps={rps:8.1f}  p50_ms={percentile(latencies, 50) * 1000:8.1f}  "
+                f"p99_ms={percentile(latencies, 99) * 1000:8.1f}  errors={errors}"
+            )
+
+
+if __name__ == "__main__":
+    main()
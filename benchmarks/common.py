@@ -0,0 +1,127 @@
+import os
+import sys
+import time
+import socket
+import asyncio
+import logging
+import statistics
+
+# Allow `python benchmarks/<name>.py` as well as `python -m benchmarks.<name>`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Benchmarks run offline against local fakes, so fill in any config the app requires
+BENCHMARK_ENV = {
+    "APP_PORT": "8080",
+    "APP_HOST": "127.0.0.1",
+    "APP_NAME": "AI Text Generator (benchmark)",
+    "APP_ENV": "benchmark",
+    "JWT_SECRET_KEY": "benchmark-secret-key-with-32-bytes!",
+    "JWT_EXPIRY_IN_SECONDS": "3600",
+    "OPENAI_API_KEY": "sk-benchmark",
+    "DATABASE_URL": "sqlite:///benchmark.db",
+}
+
+for name, value in BENCHMARK_ENV.items():
+    os.environ.setdefault(name, value)
+
+# Keep benchmark SQLite files in memory-backed storage so fsync latency does not dominate
+SCRATCH_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# Per-request client logs would dominate the timings
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Latency summary in milliseconds."""
+    return {
+        "n": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+def timed(fn, iterations):
+    """Call `fn` repeatedly and return per-call wall times in seconds."""
+    samples = []
+
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+
+    return samples
+
+
+def print_table(title, rows):
+    """Print `{label: summary}` rows as an aligned table."""
+    print(f"\n{title}")
+
+    for label, summary in rows.items():
+        stats = "  ".join(f"{key}={value}" for key, value in summary.items())
+        print(f"  {label:<24} {stats}")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(port, timeout=30):
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+
+        except OSError:
+            time.sleep(0.1)
+
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def benchmark_headers():
+    """Authorization header with a token the benchmark servers accept."""
+    from app import app
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        return {"Authorization": f"Bearer {create_access_token(identity='1')}"}
+
+
+async def drive(port, headers, concurrency, total):
+    """Send `total` generate requests with `concurrency` in flight; return (rps, latencies, errors)."""
+    import httpx
+
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=120) as client:
+        async def worker():
+            nonlocal errors
+
+            for i in counter:
+                start = time.perf_counter()
+                response = await client.post("/api/generate-text/", json={"prompt": f"Benchmark prompt number {i}"}, headers=headers)
+                latencies.append(time.perf_counter() - start)
+
+                if response.status_code != 201:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return total / elapsed, latencies, errors
@@ -0,0 +1,438 @@
+"""
+Replay a JSONL trace of API calls against the app at an open-loop arrival rate, and report
+throughput and latency per route.
+
+A trace has one call per line. `session` names a virtual user: its `register` and `login` create
+the account and token its later calls use, and the ids of texts it generates are remembered so
+`get`, `update` and `delete` can refer to them by position (`"text": -1` is the latest).
+
+    {"session": "s1", "op": "register"}
+    {"session": "s1", "op": "login"}
+    {"session": "s1", "op": "generate", "prompt": "Write a haiku about tea."}
+    {"session": "s1", "op": "list", "limit": 20}
+    {"session": "s1", "op": "get", "text": -1}
+    {"session": "s1", "op": "update", "text": -1, "response": "An edited response."}
+    {"session": "s1", "op": "search", "q": "tea"}
+    {"session": "s1", "op": "delete", "text": 0}
+
+Calls are sent at Poisson arrivals of `--rate` per second (or at each line's `at` offset with
+`--timing trace`) whether or not earlier calls have finished, so a slow server builds a queue
+instead of slowing the load down. Only a session's own calls wait for each other. Latency is
+measured from when a call was due: its arrival time, or when the session's previous call
+finished if that was later. Calls whose prerequisite failed are counted as skipped.
+
+Unless `--url` is given, the app is started in a subprocess (Gunicorn, or uvicorn for the ASGI
+mode) on a scratch SQLite database, against the built-in fake OpenAI upstream (app/utils/fake_openai.py)
+seeded with `--seed`, whose latency, reply length and token rate are drawn from distributions:
+`const:X`, `uniform:A,B`, `exp:MEAN` or `lognormal:MEDIAN,SIGMA`.
+
+    python -m benchmarks.replay --generate trace.jsonl --sessions 100 --ops 20
+    python -m benchmarks.replay benchmarks/traces/sample.jsonl --rate 20 --latency lognormal:0.3,0.5 --output head.json
+    python -m benchmarks.replay benchmarks/traces/sample.jsonl --rate 20 --compare head.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+
+from benchmarks.common import free_port, percentile, print_table, SCRATCH_DIR, BENCHMARK_ENV, wait_until_ready
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = "replay-password"
+
+# op -> (method, route label); the label is the route pattern, so every text id reports together
+ROUTES = {
+    "register": ("POST", "/api/auth/register"),
+    "login": ("POST", "/api/auth/login"),
+    "generate": ("POST", "/api/generate-text/"),
+    "list": ("GET", "/api/generate-text/"),
+    "search": ("GET", "/api/generate-text/search"),
+    "get": ("GET", "/api/generate-text/{id}"),
+    "update": ("PUT", "/api/generate-text/{id}"),
+    "delete": ("DELETE", "/api/generate-text/{id}"),
+}
+
+# Call mix of generated traces, after each session's register and login
+GENERATED_MIX = {"generate": 35, "list": 20, "get": 20, "search": 10, "update": 10, "delete": 5}
+
+WORDS = (
+    "lighthouse keeper harbour storm ship signal tower sea stone island morning lamp winter summer "
+    "sailor garden river mountain forest city train letter poem story recipe tea coffee bread"
+).split()
+
+
+def generate_trace(path, sessions, ops, rate, seed):
+    """
+    Write a synthetic trace: every session registers and logs in, then makes `ops` calls from GENERATED_MIX.
+    Lines carry `at` offsets of Poisson arrivals at `rate` per second, for `--timing trace`.
+    """
+    rng = random.Random(seed)
+    names, weights = list(GENERATED_MIX), list(GENERATED_MIX.values())
+    streams = []
+
+    for session in range(sessions):
+        calls = [{"session": f"s{session}", "op": "register"}, {"session": f"s{session}", "op": "login"}]
+
+        for op in rng.choices(names, weights=weights, k=ops):
+            call = {"session": f"s{session}", "op": op}
+
+            if op == "generate":
+                call["prompt"] = f"Write a {rng.choice(('poem', 'story', 'note'))} about {' and '.join(rng.sample(WORDS, 2))}."
+
+            elif op == "list":
+                call["limit"] = rng.choice((10, 20, 50))
+
+            elif op == "search":
+                call["q"] = rng.choice(WORDS)
+
+            elif op in ("get", "update", "delete"):
+                call["text"] = rng.choice((-1, 0))
+
+                if op == "update":
+                    call["response"] = f"Edited: {' '.join(rng.sample(WORDS, 6))}."
+
+            calls.append(call)
+
+        streams.append(calls)
+
+    # Interleave sessions as real users overlap, keeping each session's own order
+    offset = 0.0
+
+    with open(path, "w") as file:
+        while streams:
+            calls = rng.choice(streams)
+            file.write(json.dumps({"at": round(offset, 3), **calls.pop(0)}) + "\n")
+            offset += rng.expovariate(rate)
+
+            if not calls:
+                streams.remove(calls)
+
+
+def load_trace(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+class Session:
+    """A virtual user's credentials, stored text ids and the completion of its latest call."""
+
+    def __init__(self, username):
+        self.username = username
+        self.headers = None
+        self.texts = []
+        self.last = None
+
+
+class Replay:
+    def __init__(self, client, trace, run_id):
+        self.client = client
+        self.trace = trace
+        self.run_id = run_id
+        self.sessions = {}
+        self.results = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+
+    async def run(self, schedule):
+        """Start every call at its scheduled offset (seconds), independent of earlier calls finishing."""
+        started = time.perf_counter()
+        tasks = []
+
+        for call, offset in zip(self.trace, schedule):
+            session = self.sessions.setdefault(call["session"], Session(f"{self.run_id}-{call['session']}"))
+            previous = session.last
+            session.last = asyncio.ensure_future(self.call(call, session, previous, started + offset))
+            tasks.append(session.last)
+
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - started
+
+
+    async def call(self, call, session, previous, due):
+        """Send one call once it is due and the session's previous call is done. :return: Its completion time."""
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+
+        # Open loop: the clock starts when the call was due, not when it was sent, so time spent
+        # queued behind a slow server or a busy client counts
+        if previous is not None:
+            due = max(due, await previous)
+
+        op = call["op"]
+        method, route = ROUTES[op]
+        request = self.build(call, session)
+
+        if request is None:
+            self.results.append({"route": f"{method} {route}", "status": None, "latency": None})
+            return time.perf_counter()
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        try:
+            response = await self.client.request(method, request.pop("url"), headers=session.headers, **request)
+            status = response.status_code
+
+        except Exception:
+            response, status = None, 0
+
+        finally:
+            self.in_flight -= 1
+
+        self.results.append({"route": f"{method} {route}", "status": status, "latency": time.perf_counter() - due})
+
+        if response is not None and 200 <= status < 300:
+            self.record(op, call, session, response)
+
+        return time.perf_counter()
+
+
+    def build(self, call, session):
+        """Request arguments for a call, or None when its prerequisite (a login or a stored text) is missing."""
+        op = call["op"]
+
+        if op in ("register", "login"):
+            return {"url": ROUTES[op][1], "json": {"username": session.username, "password": PASSWORD}}
+
+        if session.headers is None:
+            return None
+
+        if op == "generate":
+            return {"url": "/api/generate-text/", "json": {"prompt": call["prompt"]}}
+
+        if op == "list":
+            return {"url": "/api/generate-text/", "params": {"limit": call.get("limit", 20)}}
+
+        if op == "search":
+            return {"url": "/api/generate-text/search", "params": {"q": call["q"]}}
+
+        if not session.texts:
+            return None
+
+        text_id = session.texts[call.get("text", -1) % len(session.texts)]
+        request = {"url": f"/api/generate-text/{text_id}"}
+
+        if op == "update":
+            request["json"] = {"response": call["response"]}
+
+        elif op == "delete":
+            session.texts.remove(text_id)
+
+        return request
+
+
+    def record(self, op, call, session, response):
+        if op == "login":
+            session.headers = {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+        elif op == "generate":
+            session.texts.append(response.json()["data"]["id"])
+
+
+def latency_percentiles(latencies):
+    """p50, p95 and p99 of latencies in seconds, as milliseconds; None when there are none."""
+    return {f"p{p}_ms": round(percentile(latencies, p) * 1000, 2) if latencies else None for p in (50, 95, 99)}
+
+
+def summarize_routes(results, elapsed):
+    by_route = {}
+
+    for result in results:
+        by_route.setdefault(result["route"], []).append(result)
+
+    routes = {}
+
+    for label, calls in sorted(by_route.items()):
+        statuses = [result["status"] for result in calls]
+        ok = sum(1 for status in statuses if status and 200 <= status < 300)
+
+        routes[label] = {
+            "count": len(calls),
+            "ok": ok,
+            "errors": sum(1 for status in statuses if status is not None and not 200 <= status < 300),
+            "skipped": sum(1 for status in statuses if status is None),
+            "throughput_rps": round(ok / elapsed, 2),
+            **latency_percentiles([result["latency"] for result in calls if result["latency"] is not None]),
+        }
+
+    return routes
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline_path):
+    """Print each route's p50 and p99 next to a saved report's, with the change in percent."""
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+
+    def change(new, old):
+        return f"{(new - old) / old * 100:+.1f}%" if new is not None and old else "n/a"
+
+    rows = {}
+
+    for label, stats in report["routes"].items():
+        old = baseline["routes"].get(label)
+
+        if old:
+            rows[label] = {
+                "p50_ms": f"{old['p50_ms']} -> {stats['p50_ms']} ({change(stats['p50_ms'], old['p50_ms'])})",
+                "p99_ms": f"{old['p99_ms']} -> {stats['p99_ms']} ({change(stats['p99_ms'], old['p99_ms'])})",
+                "rps": f"{old['throughput_rps']} -> {stats['throughput_rps']}",
+            }
+
+    print_table(f"compared with {baseline['meta'].get('commit')} ({baseline_path})", rows)
+
+
+def start_server(args, workdir, upstream_url):
+    """Start the app in a subprocess; return (process, base url)."""
+    port = free_port()
+    env = dict(os.environ, **BENCHMARK_ENV)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{workdir}/replay.db",
+        "OPENAI_BASE_URL": upstream_url,
+        "APP_HOST": "127.0.0.1",
+        "APP_PORT": str(port),
+        "APP_WORKERS": str(args.workers),
+        "APP_THREADS": str(args.threads),
+        # A handful of virtual users would otherwise be throttled by the per-user limits
+        "RATE_LIMIT_ENABLED": "true" if args.rate_limit else "false",
+        "LOG_LEVEL": "WARNING",
+    })
+
+    if args.server == "gunicorn":
+        command = [sys.executable, "-m", "gunicorn", "--access-logfile", "/dev/null", "--log-level", "warning", "wsgi:app"]
+
+    else:
+        command = [sys.executable, "-m", "uvicorn", "app.asgi:asgi_app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning", "--lifespan", "on"]
+
+    # Per-request application logs would dominate the measurement
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stderr=subprocess.DEVNULL)
+    wait_until_ready(port)
+
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def replay(args, trace, base_url):
+    import httpx
+
+    rng = random.Random(args.seed)
+
+    if args.timing == "trace":
+        schedule = [call.get("at", 0) / args.speedup for call in trace]
+
+    else:
+        # Poisson process: exponential gaps between arrivals
+        schedule = []
+        offset = 0.0
+
+        for _ in trace:
+            schedule.append(offset)
+            offset += rng.expovariate(args.rate)
+
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        runner = Replay(client, trace, run_id=f"replay{os.getpid()}{int(time.time())}")
+        elapsed = await runner.run(schedule)
+
+    return runner, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", nargs="?", default=os.path.join(ROOT, "benchmarks", "traces", "sample.jsonl"))
+    parser.add_argument("--generate", metavar="PATH", help="Write a synthetic trace to PATH and exit.")
+    parser.add_argument("--sessions", type=int, default=50, help="Sessions in a generated trace.")
+    parser.add_argument("--ops", type=int, default=20, help="Calls per session in a generated trace, after register and login.")
+    parser.add_argument("--rate", type=float, default=20.0, help="Mean arrivals per second (Poisson).")
+    parser.add_argument("--timing", choices=["poisson", "trace"], default="poisson", help="Use Poisson arrivals or each line's `at` offset.")
+    parser.add_argument("--speedup", type=float, default=1.0, help="Divide trace offsets by this with --timing trace.")
+    parser.add_argument("--url", help="Replay against a running server instead of starting one (and its fake upstream).")
+    parser.add_argument("--server", choices=["gunicorn", "uvicorn"], default="gunicorn")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--rate-limit", action="store_true", help="Keep the per-user rate limits on.")
+    parser.add_argument("--latency", default="lognormal:0.2,0.5", help="Upstream time to first token, seconds.")
+    parser.add_argument("--token-rate", default="uniform:50,150", help="Upstream tokens per second.")
+    parser.add_argument("--reply-words", default="uniform:20,200", help="Words per upstream reply.")
+    parser.add_argument("--max-connections", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=24)
+    parser.add_argument("--output", metavar="PATH", help="Write the report as JSON.")
+    parser.add_argument("--compare", metavar="PATH", help="Compare with a report written by --output.")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_trace(args.generate, args.sessions, args.ops, args.rate, args.seed)
+        print(f"wrote {args.sessions * (args.ops + 2)} calls to {args.generate}")
+        return
+
+    trace = load_trace(args.trace)
+
+    with tempfile.TemporaryDirectory(dir=SCRATCH_DIR) as workdir:
+        if args.url:
+            runner, elapsed = asyncio.run(replay(args, trace, args.url))
+
+        else:
+            from app.utils.fake_openai import FakeOpenAIServer
+
+            # Seeded, so a run draws the same upstream behaviour as the run it is compared with
+            upstream = FakeOpenAIServer(latency=args.latency, tokens_per_second=args.token_rate, reply_words=args.reply_words or 50, seed=args.seed)
+
+            with upstream:
+                server, base_url = start_server(args, workdir, upstream.base_url)
+
+                try:
+                    runner, elapsed = asyncio.run(replay(args, trace, base_url))
+
+                finally:
+                    server.terminate()
+                    server.wait()
+
+    routes = summarize_routes(runner.results, elapsed)
+    latencies = [result["latency"] for result in runner.results if result["latency"] is not None]
+    completed = sum(stats["ok"] for stats in routes.values())
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "trace": args.trace,
+            "calls": len(trace),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "total": {
+            "seconds": round(elapsed, 2),
+            "offered_rps": args.rate if args.timing == "poisson" else None,
+            "throughput_rps": round(completed / elapsed, 2),
+            "max_in_flight": runner.max_in_flight,
+            **latency_percentiles(latencies),
+        },
+        "routes": routes,
+    }
+
+    print_table(f"{len(trace)} calls in {elapsed:.1f}s, commit {report['meta']['commit']}", {**routes, "total": report["total"]})
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
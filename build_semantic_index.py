@@ -0,0 +1,21 @@
+"""
+Build the semantic cache index from the stored generated texts.
+
+    python build_semantic_index.py --path /var/lib/textgen/semantic.idx
+
+Workers map the file at startup when SEMANTIC_CACHE_PATH points at it.
+"""
+import argparse
+from app.config import Config
+from app.services.openai_service import OpenAIService
+from app.services.semantic_cache import build_index
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the semantic cache index from the stored generated texts.")
+    parser.add_argument("--path", default=Config.SEMANTIC_CACHE_PATH, help="Index file to write (default: SEMANTIC_CACHE_PATH).")
+    args = parser.parse_args()
+
+    if not args.path:
+        parser.error("set SEMANTIC_CACHE_PATH or pass --path")
+
+    print(f"indexed {build_index(args.path, OpenAIService.generation_params())} texts into {args.path}")
@@ -0,0 +1,48 @@
+"""
+Gunicorn settings for production.
+
+    gunicorn wsgi:app
+
+Gunicorn reads this file automatically from the working directory. Every value comes
+from Config, so deployments are tuned through the environment (see .env.example).
+"""
+from app.config import Config, logging
+
+bind = f"{Config.APP_HOST}:{Config.APP_PORT}"
+
+# Processes for CPU parallelism, threads to overlap requests waiting on OpenAI and the database
+workers = Config.APP_WORKERS
+threads = Config.APP_THREADS
+worker_class = "gthread"
+
+# Generations can take as long as the OpenAI read timeout; in-flight requests get
+# `graceful_timeout` seconds to finish on SIGTERM or a worker restart
+timeout = Config.APP_WORKER_TIMEOUT
+graceful_timeout = Config.APP_GRACEFUL_TIMEOUT
+keepalive = 5
+
+# Recycle workers to bound memory growth; jitter keeps them from restarting together
+max_requests = Config.APP_MAX_REQUESTS
+max_requests_jitter = Config.APP_MAX_REQUESTS_JITTER
+
+# Import the app once in the master so workers share its memory copy-on-write
+preload_app = Config.APP_PRELOAD
+
+accesslog = "-"
+
+
+def on_starting(server):
+    """Create the database tables once, in the master, before any worker is forked."""
+
+    # In-memory jobs are only visible to the worker that queued them
+    if Config.JOB_QUEUE_BACKEND == "memory" and server.cfg.workers > 1:
+        raise EnvironmentError("JOB_QUEUE_BACKEND=memory needs a single worker; use JOB_QUEUE_BACKEND=database or APP_WORKERS=1.")
+
+    from app.database import init_db
+    init_db()
+
+
+def post_fork(server, worker):
+    # The database engine and OpenAI client registry drop inherited connections in their
+    # own os.register_at_fork hooks, so nothing needs closing here
+    logging.info(f"Worker {worker.pid} started")
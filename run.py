@@ -1,7 +1,16 @@
+import sys
 from app import app
 from app.config import Config
 from app.database import init_db
 
 if __name__ == "__main__":
-    init_db()
-    app.run(host=Config.APP_HOST, port=Config.APP_PORT, debug=True)
\ No newline at end of file
+    if Config.APP_ENV == "development":
+        init_db()
+        app.run(host=Config.APP_HOST, port=Config.APP_PORT, debug=True)
+
+    else:
+        # Werkzeug's debug server is single-process; serve everything else with Gunicorn
+        from gunicorn.app.wsgiapp import run
+
+        sys.argv = ["gunicorn", "--config", "gunicorn.conf.py", "wsgi:app"]
+        run()
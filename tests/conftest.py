@@ -1,9 +1,19 @@
 import pytest
+import threading
 from app import app
+from sqlalchemy import event
+from app.config import Config
 from app.database import engine
 from app.models.user import User
 from sqlalchemy.orm import sessionmaker
+from app.utils.fake_openai import FakeOpenAIServer
+from flask_jwt_extended import create_access_token
 from app.models.generated_text import GeneratedText
+from app.services.user_cache import user_cache
+from app.services.rate_limiter import rate_limiter
+from app.services.upstream_guard import upstream_guard
+from app.services.response_cache import response_cache
+from app.services.openai_client import OpenAIClientRegistry
 
 
 @pytest.fixture(scope="session")
@@ -42,4 +52,69 @@ def clean_db(db):
     db.commit()
     
     yield
-    db.rollback()  # Rollback any changes made during a test
\ No newline at end of file
+    db.rollback()  # Rollback any changes made during a test
+
+
+@pytest.fixture(scope="function", autouse=True)
+def clear_response_cache():
+    """Start every test with an empty prompt-response cache."""
+    response_cache.clear()
+
+
+@pytest.fixture(scope="function", autouse=True)
+def clear_user_cache():
+    """Start every test with an empty user lookup cache; clean_db deletes users in bulk, bypassing invalidation."""
+    user_cache.clear()
+
+
+@pytest.fixture(scope="function", autouse=True)
+def reset_rate_limiter():
+    """Give every test a fresh per-user rate-limit budget."""
+    rate_limiter.clear()
+
+
+@pytest.fixture(scope="function", autouse=True)
+def reset_upstream_guard():
+    """Start every test with a closed circuit breaker."""
+    upstream_guard.reset()
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    """Point the OpenAI client at a local fake server."""
+    with FakeOpenAIServer() as server:
+        monkeypatch.setattr(Config, "OPENAI_BASE_URL", server.base_url)
+        OpenAIClientRegistry.reset()
+
+        yield server
+
+    OpenAIClientRegistry.reset()
+
+
+@pytest.fixture
+def auth_user(db):
+    """Create a user and return its ID with a valid Authorization header."""
+    user = User(username="authuser", password_hash="hashedpassword")
+    db.add(user)
+    db.commit()
+
+    with app.app_context():
+        token = create_access_token(identity=str(user.id))
+
+    return user.id, {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def sql_statements():
+    """Record every SQL statement the test's thread sends to the database."""
+    statements = []
+    thread = threading.get_ident()
+
+    # Job queue workers started by earlier tests keep polling the same engine
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread:
+            statements.append(statement.lstrip())
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
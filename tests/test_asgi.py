@@ -0,0 +1,99 @@
+import httpx
+import pytest
+import asyncio
+from app.asgi import asgi_app
+from app.utils import rate_limit
+from app.database import dispose_async_engine
+from app.models.generated_text import GeneratedText
+from app.services.rate_limiter import RateLimiter, MemoryRateLimitBackend
+
+
+@pytest.fixture
+def asgi_request():
+    """
+    Send requests through the ASGI app on one event loop per test.
+    The loop's async engine is disposed afterwards, since tests bypass the ASGI lifespan.
+    """
+    loop = asyncio.new_event_loop()
+    transport = httpx.ASGITransport(app=asgi_app)
+
+    def send(method, path, **kwargs):
+        async def call():
+            async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+                return await client.request(method, path, **kwargs)
+
+        return loop.run_until_complete(call())
+
+    yield send
+
+    loop.run_until_complete(dispose_async_engine())
+    loop.close()
+
+
+def test_async_generate_text_keeps_response_contract(asgi_request, auth_user, fake_openai, db):
+    """Ensure the async path returns the same envelope and stores the row."""
+    user_id, headers = auth_user
+
+    response = asgi_request("POST", "/api/generate-text/", json={"prompt": "Tell me a joke."}, headers=headers)
+
+    assert response.status_code == 201
+    body = response.json()
+
+    assert set(body) == {"success", "message", "status_code", "data"}
+    assert body["message"] == "Text generated successfully."
+    assert body["data"]["response"] == "Echo: Tell me a joke."
+    assert body["data"]["cached"] is False
+
+    assert db.query(GeneratedText).filter_by(user_id=user_id).count() == 1
+
+
+def test_async_crud_lifecycle(asgi_request, auth_user, db):
+    """Ensure get, update and delete work on the async path."""
+    user_id, headers = auth_user
+
+    text = GeneratedText(user_id=user_id, prompt="Tell me a joke.", response="Old response.")
+    db.add(text)
+    db.commit()
+
+    fetched = asgi_request("GET", f"/api/generate-text/{text.id}", headers=headers)
+    assert fetched.status_code == 200
+    assert fetched.json()["data"]["response"] == "Old response."
+
+    updated = asgi_request("PUT", f"/api/generate-text/{text.id}", json={"response": "New response."}, headers=headers)
+    assert updated.status_code == 200
+    assert updated.json()["data"]["response"] == "New response."
+
+    deleted = asgi_request("DELETE", f"/api/generate-text/{text.id}", headers=headers)
+    assert deleted.status_code == 200
+
+    missing = asgi_request("GET", f"/api/generate-text/{text.id}", headers=headers)
+    assert missing.status_code == 404
+    assert missing.json()["error_message"] == "Generated text not found."
+
+
+def test_async_path_requires_jwt(asgi_request):
+    """Ensure JWT errors are handled exactly like the WSGI app."""
+    response = asgi_request("POST", "/api/generate-text/", json={"prompt": "Tell me a joke."})
+
+    assert response.status_code == 401
+
+
+def test_other_routes_fall_back_to_wsgi(asgi_request):
+    """Ensure routes without an async view are served by Flask."""
+    response = asgi_request("GET", "/api")
+
+    assert response.status_code == 200
+    assert response.json()["message"] == "Welcome to AI Text Generator api!"
+
+
+def test_async_generate_text_is_rate_limited(asgi_request, auth_user, fake_openai, monkeypatch):
+    """Ensure the async generate view applies the same per-user limits as the WSGI route."""
+    _, headers = auth_user
+    monkeypatch.setattr(rate_limit, "rate_limiter", RateLimiter(MemoryRateLimitBackend(), requests_per_second=0.5, burst=1))
+
+    first = asgi_request("POST", "/api/generate-text/", json={"prompt": "Tell me a joke."}, headers=headers)
+    second = asgi_request("POST", "/api/generate-text/", json={"prompt": "Tell me another joke."}, headers=headers)
+
+    assert first.status_code == 201
+    assert second.status_code == 429
+    assert second.headers["retry-after"] == "2"
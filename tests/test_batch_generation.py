@@ -0,0 +1,71 @@
+import pytest
+from app import app
+from app.config import Config
+from app.models.generated_text import GeneratedText
+from app.utils.errors import ServiceUnavailableError
+from app.services.openai_service import OpenAIService
+
+
+@pytest.fixture
+def client():
+    """Create a test client."""
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        yield client
+
+
+def test_batch_stores_all_items_with_one_insert(client, auth_user, fake_openai, db, sql_statements):
+    """Ensure every prompt is generated and all rows are stored with a single INSERT."""
+    user_id, headers = auth_user
+    prompts = [{"prompt": f"Tell me joke number {i}."} for i in range(5)]
+
+    response = client.post("/api/generate-text/batch", json=prompts, headers=headers)
+
+    assert response.status_code == 201
+    assert response.json["data"]["succeeded"] == 5
+
+    results = response.json["data"]["results"]
+
+    assert [result["data"]["response"] for result in results] == [f"Echo: Tell me joke number {i}." for i in range(5)]
+    assert all(result["data"]["user_id"] == user_id for result in results)
+    assert len([statement for statement in sql_statements if statement.startswith("INSERT")]) == 1
+    assert db.query(GeneratedText).count() == 5
+
+
+def test_batch_reports_per_item_errors(client, auth_user, fake_openai, monkeypatch):
+    """Ensure invalid and failed items are reported without failing the rest of the batch."""
+    _, headers = auth_user
+    generate_text = OpenAIService.generate_text
+
+    def flaky_generate_text(prompt):
+        if prompt == "Upstream fails here.":
+            raise ServiceUnavailableError("OpenAI API is currently unavailable. Please try again later.")
+
+        return generate_text(prompt)
+
+    monkeypatch.setattr(OpenAIService, "generate_text", staticmethod(flaky_generate_text))
+
+    prompts = [{"prompt": "Tell me a joke."}, {"prompt": "Hi"}, {"prompt": "Upstream fails here."}]
+    response = client.post("/api/generate-text/batch", json=prompts, headers=headers)
+
+    assert response.status_code == 207
+
+    results = response.json["data"]["results"]
+
+    assert results[0]["success"] is True
+    assert results[1]["status_code"] == 422 and "prompt" in results[1]["data"]
+    assert results[2]["status_code"] == 503
+    assert response.json["data"]["succeeded"] == 1 and response.json["data"]["failed"] == 2
+
+
+def test_batch_rejects_oversized_or_malformed_payloads(client, auth_user, monkeypatch):
+    """Ensure the batch must be a non-empty list within the size limit."""
+    _, headers = auth_user
+    monkeypatch.setattr(Config, "BATCH_MAX_ITEMS", 2)
+
+    too_many = client.post("/api/generate-text/batch", json=[{"prompt": "Tell me a joke."}] * 3, headers=headers)
+    not_a_list = client.post("/api/generate-text/batch", json={"prompt": "Tell me a joke."}, headers=headers)
+
+    assert too_many.status_code == 422
+    assert not_a_list.status_code == 422
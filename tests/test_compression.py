@@ -0,0 +1,90 @@
+import gzip
+import pytest
+from app import app
+from app.models.generated_text import GeneratedText
+from app.utils.compression import response_compressor
+
+
+@pytest.fixture
+def client():
+    """Create a test client."""
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def clear_compression_cache():
+    """Start every test with an empty compressed body cache."""
+    response_compressor.clear()
+
+
+@pytest.fixture
+def long_text(auth_user, db):
+    """Store a 5000-character generated text and return its id with auth headers."""
+    user_id, headers = auth_user
+    text = GeneratedText(user_id=user_id, prompt="Write a long story.", response="Once upon a time. " * 280)
+    db.add(text)
+    db.commit()
+
+    return text.id, headers
+
+
+def test_large_json_is_gzipped(client, long_text):
+    """Ensure large JSON responses are compressed when the client accepts gzip."""
+    text_id, headers = long_text
+
+    plain = client.get(f"/api/generate-text/{text_id}", headers=headers)
+    response = client.get(f"/api/generate-text/{text_id}", headers={**headers, "Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in plain.headers
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert int(response.headers["Content-Length"]) < len(plain.data) / 4
+    assert gzip.decompress(response.data) == plain.data
+
+
+def test_small_responses_are_not_compressed(client, auth_user):
+    """Ensure bodies under the threshold are sent as they are."""
+    response = client.get("/api", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+
+def test_client_weights_pick_the_encoding(client, long_text):
+    """Ensure q-values decide the encoding and q=0 excludes one."""
+    pytest.importorskip("brotli")
+    text_id, headers = long_text
+
+    assert client.get(f"/api/generate-text/{text_id}", headers={**headers, "Accept-Encoding": "gzip, br"}).headers["Content-Encoding"] == "br"
+    assert client.get(f"/api/generate-text/{text_id}", headers={**headers, "Accept-Encoding": "gzip;q=1.0, br;q=0.5"}).headers["Content-Encoding"] == "gzip"
+    assert "Content-Encoding" not in client.get(f"/api/generate-text/{text_id}", headers={**headers, "Accept-Encoding": "gzip;q=0"}).headers
+
+
+def test_zstd_round_trip(client, long_text):
+    """Ensure zstd-compressed bodies decode to the original."""
+    zstandard = pytest.importorskip("zstandard")
+    text_id, headers = long_text
+
+    plain = client.get(f"/api/generate-text/{text_id}", headers=headers)
+    response = client.get(f"/api/generate-text/{text_id}", headers={**headers, "Accept-Encoding": "zstd"})
+
+    assert response.headers["Content-Encoding"] == "zstd"
+    assert zstandard.ZstdDecompressor().decompress(response.data) == plain.data
+
+
+def test_repeat_gets_reuse_the_compressed_body(client, long_text):
+    """Ensure an identical body is compressed once and then served from the cache."""
+    text_id, headers = long_text
+
+    first = client.get(f"/api/generate-text/{text_id}", headers={**headers, "Accept-Encoding": "gzip"})
+    second = client.get(f"/api/generate-text/{text_id}", headers={**headers, "Accept-Encoding": "gzip"})
+
+    assert first.data == second.data
+    assert response_compressor.cache.stats()["misses"] == 1
+    assert response_compressor.cache.stats()["hits"] == 1
+
+    # Only the compressed body counts against, and is held by, the cache
+    assert response_compressor.cache.stats()["bytes"] == len(first.data)
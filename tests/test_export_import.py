@@ -0,0 +1,110 @@
+import json
+import pytest
+import datetime
+from app import app
+from app.config import Config
+from app.models.user import User
+from app.models.generated_text import GeneratedText
+
+
+@pytest.fixture
+def client():
+    """Create a test client."""
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def history(auth_user, db):
+    """Store five texts for the authenticated user and one for another user."""
+    user_id, headers = auth_user
+    other = User(username="otheruser", password_hash="hashedpassword")
+    db.add(other)
+    db.commit()
+
+    base = datetime.datetime(2025, 3, 1, 8, 0)
+    db.add_all([GeneratedText(user_id=user_id, prompt=f"Prompt {i}", response=f"Response {i}", timestamp=base + datetime.timedelta(minutes=i)) for i in range(5)])
+    db.add(GeneratedText(user_id=other.id, prompt="Not mine", response="Hidden", timestamp=base))
+    db.commit()
+
+    return headers
+
+
+def test_export_streams_the_users_texts_as_ndjson_in_batches(client, history, monkeypatch):
+    """Ensure the export is one JSON object per line, oldest first, written one fetched batch at a time."""
+    monkeypatch.setattr(Config, "EXPORT_BATCH_SIZE", 2)
+
+    response = client.get("/api/generate-text/export", headers=history)
+    chunks = list(response.response)
+    rows = [json.loads(line) for line in b"".join(chunks).splitlines()]
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert len(chunks) == 3
+    assert [row["prompt"] for row in rows] == [f"Prompt {i}" for i in range(5)]
+    assert rows[0]["timestamp"] == "2025-03-01T08:00:00+00:00"
+    assert set(rows[0]) == {"id", "prompt", "response", "timestamp"}
+
+
+def test_export_round_trips_through_import(client, history, db, sql_statements, monkeypatch):
+    """Ensure an export imports back with the same texts and timestamps, in chunked INSERTs."""
+    monkeypatch.setattr(Config, "IMPORT_BATCH_SIZE", 2)
+    exported = client.get("/api/generate-text/export", headers=history).data
+
+    response = client.post("/api/generate-text/import", data=exported + b"\n", headers=history, content_type="application/x-ndjson")
+
+    assert response.status_code == 201
+    assert response.json["data"]["imported"] == 5
+    assert sum(statement.startswith("INSERT INTO generated_texts") for statement in sql_statements) == 3
+
+    rows = [json.loads(line) for line in client.get("/api/generate-text/export", headers=history).data.splitlines()]
+    assert [row["prompt"] for row in rows] == [f"Prompt {i // 2}" for i in range(10)]
+    assert rows[0]["timestamp"] == rows[1]["timestamp"]
+
+
+def test_import_is_all_or_nothing(client, history, db, monkeypatch):
+    """Ensure an invalid line rejects the whole import, naming the line, even after earlier chunks were inserted."""
+    monkeypatch.setattr(Config, "IMPORT_BATCH_SIZE", 1)
+    body = "\n".join([
+        json.dumps({"prompt": "Kept?", "response": "Not kept."}),
+        json.dumps({"prompt": "Also kept?", "response": "Not kept.", "timestamp": "2025-03-01T10:00:00+02:00"}),
+        json.dumps({"prompt": "Bad", "response": 42}),
+    ])
+
+    response = client.post("/api/generate-text/import", data=body, headers=history)
+
+    assert response.status_code == 422
+    assert "line 3" in response.json["error_message"]
+    assert db.query(GeneratedText).count() == 6
+
+
+@pytest.mark.parametrize("body, message", [
+    (b"{not json}\n", "line 1: not valid JSON"),
+    (b'\n["a list"]\n', "line 2: expected a JSON object"),
+    (b'{"prompt": "Prompt", "response": "Response", "timestamp": "yesterday"}\n', "line 1: timestamp"),
+    (b'{"prompt": "Hi", "response": "Response"}\n', "line 1: prompt must be a string of 5 to 1000 characters"),
+    (b'{"prompt": "Prompt", "response": "' + b"r" * 5001 + b'"}\n', "line 1: response must be a string of 5 to 5000 characters"),
+])
+def test_import_rejects_malformed_lines(client, history, body, message):
+    """Ensure malformed lines are reported with their line number."""
+    response = client.post("/api/generate-text/import", data=body, headers=history)
+
+    assert response.status_code == 422
+    assert message in response.json["error_message"]
+
+
+def test_import_rejects_more_than_max_rows(client, history, db, monkeypatch):
+    """Ensure an import longer than IMPORT_MAX_ROWS is refused whole, naming the first line over the cap."""
+    monkeypatch.setattr(Config, "IMPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr(Config, "IMPORT_MAX_ROWS", 3)
+    body = "".join(json.dumps({"prompt": f"Prompt {i}", "response": f"Response {i}"}) + "\n" for i in range(4))
+
+    response = client.post("/api/generate-text/import", data=body, headers=history)
+
+    assert response.status_code == 422
+    assert "line 4: at most 3 texts" in response.json["error_message"]
+    assert db.query(GeneratedText).count() == 6
+
+    assert client.post("/api/generate-text/import", data=body.split("\n", 1)[1], headers=history).status_code == 201
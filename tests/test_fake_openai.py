@@ -0,0 +1,77 @@
+import time
+import httpx
+import pytest
+from app.config import Config
+from app.utils import fake_openai as fake_module
+from app.utils.fake_openai import FakeOpenAIServer
+from app.services.openai_service import OpenAIService
+from app.services.openai_client import OpenAIClientRegistry
+
+COMPLETION = {"model": "gpt-4o", "messages": [{"role": "user", "content": "Tell me a joke."}]}
+
+
+def test_generated_replies_are_deterministic():
+    """Ensure the same seed and prompt always get the same reply, of the requested length."""
+    with FakeOpenAIServer(reply_words=12, seed=7) as first, FakeOpenAIServer(reply_words=12, seed=7) as again, \
+            FakeOpenAIServer(reply_words="uniform:5,10", seed=8) as other:
+        assert first.reply("Tell me a joke.") == again.reply("Tell me a joke.")
+        assert first.reply("Tell me a joke.") != first.reply("Tell me a story.")
+        assert len(first.reply("Tell me a joke.").split()) == 12
+        assert 5 <= len(other.reply("Tell me a joke.").split()) <= 10
+
+
+def test_error_rate_injects_seeded_errors():
+    """Ensure injected errors follow the configured shares, repeat for a seed, and 429s carry Retry-After."""
+    runs = []
+
+    for _ in range(2):
+        with FakeOpenAIServer(error_rate="429=0.2,503=0.1", retry_after=3, seed=11) as server:
+            responses = [httpx.post(f"{server.base_url}/chat/completions", json=COMPLETION) for _ in range(200)]
+            runs.append([response.status_code for response in responses])
+
+    statuses = runs[0]
+    assert runs[0] == runs[1]
+    assert 20 <= statuses.count(429) <= 60
+    assert 5 <= statuses.count(503) <= 35
+    assert all(response.headers["Retry-After"] == "3" for response in responses if response.status_code == 429)
+
+
+def test_stream_is_paced_and_reports_usage(fake_openai):
+    """Ensure streamed chunks arrive at the token rate and the usage chunk is sent when asked for."""
+    fake_openai.tokens_per_second = 100
+    client = OpenAIClientRegistry.get_client()
+
+    started = time.perf_counter()
+    chunks = list(client.chat.completions.create(**COMPLETION, stream=True, stream_options={"include_usage": True}))
+    elapsed = time.perf_counter() - started
+
+    assert "".join(chunk.choices[0].delta.content or "" for chunk in chunks if chunk.choices) == "Echo: Tell me a joke."
+    assert chunks[-1].usage.completion_tokens == 5
+    assert elapsed >= 5 / 100
+
+
+def test_fake_upstream_setting_serves_the_app(monkeypatch):
+    """Ensure OPENAI_FAKE_UPSTREAM sends calls to a built-in fake upstream configured from Config."""
+    monkeypatch.setattr(Config, "OPENAI_FAKE_UPSTREAM", True)
+    monkeypatch.setattr(Config, "OPENAI_FAKE_REPLY_WORDS", "8")
+    monkeypatch.setattr(Config, "OPENAI_FAKE_SEED", 3)
+    monkeypatch.setattr(fake_module, "_local_server", None)
+    OpenAIClientRegistry.reset()
+
+    try:
+        text = OpenAIService.generate_text("Tell me a joke.")
+
+        assert text == fake_module._local_server.generated_reply("Tell me a joke.")
+        assert len(text.split()) == 8
+        assert fake_module._local_server.request_count == 1
+
+    finally:
+        fake_module._local_server.stop()
+        OpenAIClientRegistry.reset()
+
+
+@pytest.mark.parametrize("spec", ["lognormal", "weibull:1,2"])
+def test_sampler_rejects_unknown_specs(spec):
+    """Ensure malformed distribution specs fail loudly."""
+    with pytest.raises(ValueError):
+        fake_module.sampler(spec)
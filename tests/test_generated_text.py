@@ -1,6 +1,5 @@
 import pytest
 from app import app
-from unittest.mock import patch
 from app.models.user import User
 from flask_jwt_extended import create_access_token
 from app.models.generated_text import GeneratedText
@@ -48,16 +47,15 @@ def create_text(db_session):
 
 # 🔹 **UNIT TESTS** - Validate input handling & responses
 
-def test_generate_text_success(client, auth_header):
+def test_generate_text_success(client, auth_header, fake_openai):
     """Ensure text generation succeeds and stores response."""
-    mock_response = "This is a generated AI response."
-
-    with patch("app.services.openai_service.OpenAIService.generate_text", return_value=mock_response):
-        response = client.post(
-            "/api/generate-text/",
-            json={"prompt": "Tell me a joke."},
-            headers=auth_header
-        )
+    fake_openai.reply = lambda prompt: "This is a generated AI response."
+
+    response = client.post(
+        "/api/generate-text/",
+        json={"prompt": "Tell me a joke."},
+        headers=auth_header
+    )
 
     assert response.status_code == 201
     assert response.json["success"] is True
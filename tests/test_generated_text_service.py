@@ -0,0 +1,59 @@
+import pytest
+from app.database import db_session
+from app.models.user import User
+from app.models.generated_text import GeneratedText
+from app.utils.errors import NotFoundError, UnauthorizedError
+from app.services.generated_text_service import GeneratedTextService
+
+
+@pytest.fixture
+def stored_text(auth_user, db):
+    """Store a text owned by the authenticated user, plus a second user."""
+    user_id, _ = auth_user
+    text = GeneratedText(user_id=user_id, prompt="Tell me a joke.", response="Old response.")
+    other = User(username="otheruser", password_hash="hashedpassword")
+
+    db.add_all([text, other])
+    db.commit()
+
+    yield text.id, user_id, other.id
+
+    db_session.remove()
+
+
+def test_update_is_a_single_statement(stored_text, sql_statements):
+    """Ensure an owner's update is one UPDATE ... RETURNING with no prior SELECT."""
+    text_id, user_id, _ = stored_text
+
+    updated = GeneratedTextService.update_text(text_id, user_id, "New response.")
+
+    assert updated["response"] == "New response."
+    assert updated["prompt"] == "Tell me a joke."
+    assert [statement.split()[0] for statement in sql_statements] == ["UPDATE"]
+
+
+def test_delete_is_a_single_statement(stored_text, sql_statements, db):
+    """Ensure an owner's delete is one DELETE with no prior SELECT."""
+    text_id, user_id, _ = stored_text
+
+    GeneratedTextService.delete_text(text_id, user_id)
+
+    assert [statement.split()[0] for statement in sql_statements] == ["DELETE"]
+    assert db.query(GeneratedText).filter_by(id=text_id).count() == 0
+
+
+def test_misses_distinguish_missing_from_foreign(stored_text, db):
+    """Ensure another user's text is 403-style and a missing text is 404-style, and nothing changes."""
+    text_id, _, other_id = stored_text
+
+    with pytest.raises(UnauthorizedError):
+        GeneratedTextService.update_text(text_id, other_id, "Hijacked response.")
+
+    with pytest.raises(UnauthorizedError):
+        GeneratedTextService.delete_text(text_id, other_id)
+
+    with pytest.raises(NotFoundError):
+        GeneratedTextService.delete_text(text_id + 1000, other_id)
+
+    db.expire_all()
+    assert db.query(GeneratedText).filter_by(id=text_id).one().response == "Old response."
@@ -0,0 +1,131 @@
+import pytest
+from app import app
+from unittest.mock import patch
+from app.models.user import User
+from flask_jwt_extended import create_access_token
+from app.models.generation_job import GenerationJob
+from app.utils.errors import ServiceUnavailableError
+from app.services.job_queue import job_queue, MemoryJobBackend, DatabaseJobBackend, JobQueue, RUNNING, _new_job
+
+
+@pytest.fixture
+def client():
+    """Create a test client."""
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def clean_jobs(db, monkeypatch):
+    """Remove queued jobs left by database backend tests, and keep the app's queue workers from claiming them."""
+    monkeypatch.setattr(job_queue, "backend", MemoryJobBackend())
+    db.query(GenerationJob).delete()
+    db.commit()
+
+    yield
+
+    db.query(GenerationJob).delete()
+    db.commit()
+
+
+def test_job_runs_in_background_and_long_polls(client, auth_user, fake_openai):
+    """Ensure a queued job returns 202 and long-polling returns the stored result."""
+    user_id, headers = auth_user
+
+    queued = client.post("/api/generate-text/jobs", json={"prompt": "Tell me a joke."}, headers=headers)
+
+    assert queued.status_code == 202
+    assert queued.json["data"]["status"] == "queued"
+    assert queued.headers["Location"].endswith(f"/api/generate-text/jobs/{queued.json['data']['id']}")
+
+    finished = client.get(f"{queued.headers['Location']}?wait=5", headers=headers)
+
+    assert finished.status_code == 200
+    assert finished.json["data"]["status"] == "succeeded"
+    assert finished.json["data"]["result"]["response"] == "Echo: Tell me a joke."
+    assert finished.json["data"]["result"]["user_id"] == user_id
+
+
+def test_job_belongs_to_its_owner(client, auth_user, fake_openai, db):
+    """Ensure only the submitting user can read a job."""
+    _, headers = auth_user
+    job_id = client.post("/api/generate-text/jobs", json={"prompt": "Tell me a joke."}, headers=headers).json["data"]["id"]
+
+    other = User(username="otheruser", password_hash="hashedpassword")
+    db.add(other)
+    db.commit()
+
+    with app.app_context():
+        other_headers = {"Authorization": f"Bearer {create_access_token(identity=str(other.id))}"}
+
+    assert client.get(f"/api/generate-text/jobs/{job_id}", headers=other_headers).status_code == 403
+    assert client.get("/api/generate-text/jobs/missing", headers=headers).status_code == 404
+
+    # Let the job finish against this test's fake server rather than leak into the next test
+    assert client.get(f"/api/generate-text/jobs/{job_id}?wait=5", headers=headers).json["data"]["status"] == "succeeded"
+
+
+def test_memory_backend_claims_round_robin_across_users():
+    """Ensure one user's backlog cannot starve another user."""
+    backend = MemoryJobBackend()
+
+    for user_id, prompt in [(1, "a1"), (1, "a2"), (1, "a3"), (2, "b1")]:
+        backend.enqueue(_new_job(user_id, prompt))
+
+    claimed = [backend.claim()["prompt"] for _ in range(4)]
+
+    assert claimed == ["a1", "b1", "a2", "a3"]
+    assert backend.claim() is None
+
+
+def test_database_backend_prefers_least_loaded_user(clean_jobs):
+    """Ensure database claims favour users with fewer running jobs and never hand out a job twice."""
+    backend = DatabaseJobBackend(lease_seconds=600)
+
+    for user_id, prompt in [(1, "a1"), (1, "a2"), (2, "b1")]:
+        backend.enqueue(_new_job(user_id, prompt))
+
+    claimed = [backend.claim()["prompt"] for _ in range(3)]
+
+    assert claimed == ["a1", "b1", "a2"]
+    assert backend.claim() is None
+
+
+def test_database_backend_reclaims_expired_leases(clean_jobs):
+    """Ensure a job whose worker died is claimed again once its lease expires."""
+    backend = DatabaseJobBackend(lease_seconds=0)
+    backend.enqueue(_new_job(1, "a1"))
+
+    first = backend.claim()
+    second = backend.claim()
+
+    assert first["status"] == RUNNING
+    assert second["id"] == first["id"]
+
+
+def test_failed_job_records_error(auth_user):
+    """Ensure a generation error marks the job failed instead of killing the worker."""
+    user_id, _ = auth_user
+    queue = JobQueue(MemoryJobBackend(), workers=1, poll_interval=0.05)
+
+    with patch("app.services.generation_service.GenerationService.generate", side_effect=ServiceUnavailableError("OpenAI is down.")):
+        job = queue.wait(queue.submit(user_id, "Tell me a joke.")["id"], timeout=5)
+
+    assert job["status"] == "failed"
+    assert job["error"] == "OpenAI is down."
+
+
+def test_interrupted_job_is_not_left_running(auth_user):
+    """Ensure a job whose worker thread dies is marked failed rather than `running` forever."""
+    user_id, _ = auth_user
+    backend = MemoryJobBackend()
+    job = _new_job(user_id, "Tell me a joke.")
+    backend.enqueue(job)
+
+    with patch("app.services.generation_service.GenerationService.generate", side_effect=SystemExit):
+        with pytest.raises(SystemExit):
+            JobQueue(backend, workers=1, poll_interval=0.05)._run(backend.claim())
+
+    assert backend.get(job["id"])["status"] == "failed"
@@ -0,0 +1,103 @@
+import json
+import uuid
+import pytest
+import decimal
+import datetime
+from app import app
+from app.utils import json_provider
+from app.models.generated_text import GeneratedText
+from app.utils.json_provider import FastJSONProvider
+from flask.json.provider import DefaultJSONProvider
+
+PAYLOAD = {
+    "timestamp": datetime.datetime(2025, 3, 1, 12, 30, 15, 250000),
+    "aware": datetime.datetime(2025, 3, 1, 12, 30, tzinfo=datetime.timezone.utc),
+    "day": datetime.date(2025, 3, 1),
+    "blob": b"\x00\x01binary",
+    "price": decimal.Decimal("1.50"),
+    "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "errors": {0: ["Too short."]},
+    "text": "Ünïcode ✓",
+}
+
+EXPECTED = {
+    "timestamp": "Sat, 01 Mar 2025 12:30:15 GMT",
+    "aware": "Sat, 01 Mar 2025 12:30:00 GMT",
+    "day": "Sat, 01 Mar 2025 00:00:00 GMT",
+    "blob": "AAFiaW5hcnk=",
+    "price": "1.50",
+    "id": "12345678-1234-5678-1234-567812345678",
+    "errors": {"0": ["Too short."]},
+    "text": "Ünïcode ✓",
+}
+
+EXPECTED_RFC3339 = {
+    **EXPECTED,
+    "timestamp": "2025-03-01T12:30:15.250000+00:00",
+    "aware": "2025-03-01T12:30:00+00:00",
+    "day": "2025-03-01",
+}
+
+
+def fast_provider(rfc3339_dates=False):
+    provider = FastJSONProvider(app)
+    provider.rfc3339_dates = rfc3339_dates
+    return provider
+
+
+@pytest.fixture
+def client():
+    """Create a test client."""
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.mark.parametrize("rfc3339_dates, expected", [(False, EXPECTED), (True, EXPECTED_RFC3339)])
+def test_encodes_datetimes_bytes_and_compact_output(rfc3339_dates, expected):
+    """Ensure native types are encoded, dates as HTTP dates unless RFC 3339 is opted in, with no whitespace padding."""
+    data = fast_provider(rfc3339_dates).dumps_bytes(PAYLOAD)
+
+    assert json.loads(data) == expected
+    assert data == json.dumps(json.loads(data), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+@pytest.mark.parametrize("rfc3339_dates, expected", [(False, EXPECTED), (True, EXPECTED_RFC3339)])
+def test_stdlib_fallback_matches_orjson(monkeypatch, rfc3339_dates, expected):
+    """Ensure the encoder without orjson produces the same document."""
+    monkeypatch.setattr(json_provider, "orjson", None)
+
+    assert json.loads(fast_provider(rfc3339_dates).dumps_bytes(PAYLOAD)) == expected
+
+
+def test_default_dates_match_flask():
+    """Ensure switching to the fast provider does not change the wire format of existing endpoints."""
+    payload = {key: PAYLOAD[key] for key in ("timestamp", "aware", "day", "text")}
+
+    assert json.loads(fast_provider().dumps_bytes(payload)) == json.loads(DefaultJSONProvider(app).dumps(payload))
+
+
+def test_responses_use_the_fast_provider(client, auth_user, db, monkeypatch):
+    """Ensure API responses keep HTTP dates by default and render RFC 3339 strings when opted in."""
+    user_id, headers = auth_user
+    text = GeneratedText(user_id=user_id, prompt="Prompt", response="Response", timestamp=datetime.datetime(2025, 3, 1, 8, 0))
+    db.add(text)
+    db.commit()
+
+    response = client.get(f"/api/generate-text/{text.id}", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json["data"]["timestamp"] == "Sat, 01 Mar 2025 08:00:00 GMT"
+
+    monkeypatch.setattr(app.json, "rfc3339_dates", True)
+
+    assert client.get(f"/api/generate-text/{text.id}", headers=headers).json["data"]["timestamp"] == "2025-03-01T08:00:00+00:00"
+
+
+def test_loads_rejects_malformed_json():
+    """Ensure decode errors are ValueErrors, which request parsing turns into bad requests."""
+    with pytest.raises(ValueError):
+        FastJSONProvider(app).loads("{not json")
+
+    assert FastJSONProvider(app).loads(b'{"prompt":"Hi"}') == {"prompt": "Hi"}
@@ -0,0 +1,68 @@
+import pytest
+import datetime
+from app import app
+from app.models.generated_text import GeneratedText
+
+
+@pytest.fixture
+def client():
+    """Create a test client."""
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def history(auth_user, db):
+    """Store seven texts for the user, some sharing a timestamp, and one for another user."""
+    user_id, _ = auth_user
+    base = datetime.datetime(2025, 1, 1)
+
+    texts = [
+        GeneratedText(user_id=user_id, prompt=f"Prompt {i} " + "x" * 200, response=f"Response {i}", timestamp=base + datetime.timedelta(minutes=i // 2))
+        for i in range(7)
+    ]
+    texts.append(GeneratedText(user_id=user_id + 1, prompt="Someone else's prompt", response="Hidden", timestamp=base))
+
+    db.add_all(texts)
+    db.commit()
+
+    return [text.id for text in texts[:7]]
+
+
+def test_cursor_pagination_walks_history_newest_first(client, auth_user, history):
+    """Ensure pages follow each other without gaps or repeats, including timestamp ties."""
+    _, headers = auth_user
+    seen = []
+    cursor = None
+
+    while True:
+        query = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/generate-text/", query_string=query, headers=headers).json["data"]
+
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+
+        if cursor is None:
+            break
+
+    assert seen == sorted(history, reverse=True)
+
+
+def test_summary_view_omits_response(client, auth_user, history):
+    """Ensure the summary view returns only ids, timestamps and a prompt preview."""
+    _, headers = auth_user
+
+    item = client.get("/api/generate-text/?view=summary&limit=1", headers=headers).json["data"]["items"][0]
+
+    assert set(item) == {"id", "timestamp", "prompt_preview"}
+    assert len(item["prompt_preview"]) == 100
+
+
+def test_listing_rejects_bad_parameters(client, auth_user):
+    """Ensure out-of-range limits and malformed cursors are rejected."""
+    _, headers = auth_user
+
+    assert client.get("/api/generate-text/?limit=0", headers=headers).status_code == 422
+    assert client.get("/api/generate-text/?cursor=not-a-cursor", headers=headers).status_code == 422
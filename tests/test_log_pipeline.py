@@ -0,0 +1,144 @@
+import io
+import json
+import time
+import logging
+from app import app
+from app.routes import handle_exception
+from app.utils.errors import NotFoundError
+from app.log_pipeline import LogPipeline, JsonFormatter, ErrorRateLimitFilter, RequestIdFilter, request_id_var, REQUEST_ID_HEADER
+
+
+def build_logger(name, pipeline):
+    logger = logging.getLogger(name)
+    logger.handlers = [pipeline.handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def json_pipeline(use_queue=True, queue_size=100, burst=0, window=60):
+    stream = io.StringIO()
+    output = logging.StreamHandler(stream)
+    output.setFormatter(JsonFormatter())
+
+    return stream, LogPipeline(output, use_queue, queue_size, [RequestIdFilter(), ErrorRateLimitFilter(burst, window)])
+
+
+def test_queue_pipeline_writes_json_with_request_id_on_listener():
+    """Ensure records are written by the listener as JSON carrying the request id and extra fields."""
+    stream, pipeline = json_pipeline()
+    logger = build_logger("test.queue", pipeline)
+    pipeline.start()
+
+    token = request_id_var.set("req-1")
+
+    try:
+        logger.error("Generation failed for %s", "user 1", extra={"user_id": 1})
+
+        try:
+            raise ValueError("boom")
+
+        except ValueError:
+            logger.exception("Unexpected")
+
+    finally:
+        request_id_var.reset(token)
+
+    pipeline.stop()
+    first, second = [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    assert first["message"] == "Generation failed for user 1"
+    assert first["request_id"] == "req-1"
+    assert first["user_id"] == 1
+    assert first["level"] == "ERROR"
+    assert "ValueError: boom" in second["exception"]
+
+
+def test_full_queue_drops_instead_of_blocking():
+    """Ensure a full log queue drops records and counts them."""
+    _, pipeline = json_pipeline(queue_size=2)
+    logger = build_logger("test.full", pipeline)
+
+    # Listener not started: nothing drains the queue
+    for i in range(5):
+        logger.info("record %d", i)
+
+    assert pipeline.stats()["dropped"] == 3
+    assert pipeline.stats()["queued"] == 2
+
+
+def test_repeated_errors_are_rate_limited():
+    """Ensure errors from one call site beyond the burst are suppressed and reported with the next window."""
+    stream, pipeline = json_pipeline(use_queue=False, burst=2, window=0.05)
+    logger = build_logger("test.storm", pipeline)
+
+    def storm():
+        logger.error("OpenAI API is currently unavailable.")
+
+    for _ in range(5):
+        storm()
+
+    logger.error("A different error.")
+    logger.info("Infos are never limited.")
+    logger.info("Infos are never limited.")
+    logger.info("Infos are never limited.")
+
+    assert len(stream.getvalue().splitlines()) == 6
+    assert pipeline.stats()["suppressed"] == 3
+
+    time.sleep(0.06)
+    storm()
+
+    assert json.loads(stream.getvalue().splitlines()[-1])["suppressed"] == 3
+
+
+def test_rate_limit_keys_on_call_site_and_evicts_least_recent():
+    """Ensure f-string errors from one call site share a window, and new call sites only evict idle ones."""
+    limiter = ErrorRateLimitFilter(burst=1, window=60, max_keys=2)
+
+    def record(lineno, message):
+        return logging.LogRecord("test.call_sites", logging.ERROR, "jobs.py", lineno, message, None, None)
+
+    admitted = []
+
+    for job_id in range(5):
+        admitted.append(limiter.filter(record(10, f"Generation job {job_id} failed: upstream timeout")))
+
+        # A different call site each time; the storm's key stays the most recently seen and survives
+        limiter.filter(record(100 + job_id, "One-off error."))
+
+    assert admitted == [True, False, False, False, False]
+    assert len(limiter._windows) == 2
+
+
+def test_queued_record_is_a_copy(monkeypatch):
+    """Ensure preparing a record for the queue leaves the caller's record untouched for other handlers."""
+    stream, pipeline = json_pipeline()
+    record = logging.LogRecord("test.copy", logging.ERROR, __file__, 1, "Job %s failed", ("abc",), None)
+
+    prepared = pipeline.handler.prepare(record)
+    pipeline.stop()
+
+    assert prepared.msg == "Job abc failed" and prepared.args is None
+    assert record.msg == "Job %s failed" and record.args == ("abc",)
+
+
+def test_request_id_is_echoed_or_generated():
+    """Ensure callers' request ids are kept and missing ones are generated."""
+    client = app.test_client()
+
+    assert client.get("/api", headers={REQUEST_ID_HEADER: "abc-123"}).headers[REQUEST_ID_HEADER] == "abc-123"
+    assert len(client.get("/api").headers[REQUEST_ID_HEADER]) == 32
+    assert request_id_var.get() is None
+
+
+def test_base_error_is_logged_once(caplog):
+    """Ensure handle_exception does not log a BaseError again, and client errors are warnings."""
+    with app.test_request_context("/api"):
+        with caplog.at_level(logging.INFO):
+            handle_exception(NotFoundError("Generated text not found."))
+
+    records = [record for record in caplog.records if "not found" in record.getMessage()]
+
+    assert len(records) == 1
+    assert records[0].levelno == logging.WARNING
@@ -0,0 +1,112 @@
+import pytest
+from app import app
+from app.database import engine, queue_pool_options
+from app.models.generated_text import GeneratedText
+from app.utils.errors import NotFoundError, errorTypes
+from app.utils.metrics import (
+    MetricsRegistry, metrics, http_request_duration, http_requests, app_errors,
+    upstream_request_duration, upstream_tokens, db_query_duration, db_pool_wait, InstrumentedQueuePool
+)
+
+
+@pytest.fixture
+def client():
+    """Create a test client."""
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    metrics.clear()
+
+
+def test_render_uses_prometheus_text_format():
+    """Ensure counters, cumulative histogram buckets and escaped labels render as Prometheus expects."""
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs", "Jobs done.", ("queue",))
+    histogram = registry.histogram("latency_seconds", "Latency.", (0.1, 1), ("route",))
+
+    counter.inc('say "hi"')
+    counter.inc('say "hi"', amount=2)
+    histogram.observe(0.05, "/")
+    histogram.observe(0.5, "/")
+    histogram.observe(5, "/")
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE jobs_total counter" in lines
+    assert 'jobs_total{queue="say \\"hi\\""} 3' in lines
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{route="/",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{route="/"} 5.55' in lines
+    assert 'latency_seconds_count{route="/"} 3' in lines
+
+
+def test_generation_records_route_upstream_and_db_metrics(client, auth_user, fake_openai):
+    """Ensure one generation feeds the route, upstream, token and query histograms."""
+    _, headers = auth_user
+
+    response = client.post("/api/generate-text/", json={"prompt": "Tell me a joke."}, headers=headers)
+    assert response.status_code == 201
+
+    assert http_request_duration.count("text.generate_text", "POST") == 1
+    assert http_requests.value("text.generate_text", "POST", 201) == 1
+    assert upstream_request_duration.count("ok") == 1
+    assert upstream_tokens.count("prompt") == 1 and upstream_tokens.count("completion") == 1
+    assert db_query_duration.count("INSERT") >= 1
+
+
+def test_pool_checkout_wait_is_observed():
+    """Ensure connection checkouts from the engine's pool are timed."""
+    with engine.connect():
+        pass
+
+    assert db_pool_wait.count() >= 1
+
+
+def test_errors_counted_by_type():
+    """Ensure raised application errors are counted by their errorType."""
+    NotFoundError("Missing.")
+
+    assert app_errors.value(errorTypes["NOT_FOUND_ERROR"]) == 1
+
+
+def test_metrics_endpoint_includes_component_stats(client, auth_user, db):
+    """Ensure /metrics serves the text format, including stats folded in from services."""
+    user_id, headers = auth_user
+    db.add(GeneratedText(user_id=user_id, prompt="Tell me a joke.", response="A joke."))
+    db.commit()
+
+    client.get("/api/generate-text/", headers=headers)
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+
+    body = response.get_data(as_text=True)
+
+    assert 'http_requests_total{endpoint="text.list_generated_texts",method="GET",status="200"} 1' in body
+    assert 'cache_hits_total{cache="jwt"}' in body
+    assert "db_pool_saturation " in body
+    assert "upstream_breaker_state 0" in body
+    assert "password_hash_operations_total " in body
+
+
+def test_disabled_metrics_record_nothing(client, monkeypatch):
+    """Ensure instrumentation is skipped when switched off."""
+    monkeypatch.setattr(metrics, "enabled", False)
+
+    client.get("/api")
+
+    assert http_request_duration.count("home", "GET") == 0
+
+
+@pytest.mark.parametrize("url, instrumented", [("sqlite:////tmp/metrics.db", True), ("sqlite:///:memory:", False)])
+def test_instrumented_pool_only_replaces_queue_pools(url, instrumented):
+    """Ensure in-memory SQLite keeps its single-connection pool instead of getting a new empty database per connection."""
+    assert (queue_pool_options(url).get("poolclass") is InstrumentedQueuePool) is instrumented
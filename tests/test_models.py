@@ -1,4 +1,6 @@
 from app.models.user import User
+from sqlalchemy import inspect, text
+from app.database import engine, init_db
 from app.models.generated_text import GeneratedText
 
 
@@ -27,4 +29,15 @@ def test_create_generated_text(db):
     assert retrieved_text is not None
     
     assert retrieved_text.prompt == "Tell me a joke"
-    assert retrieved_text.response == "Here is a joke."
\ No newline at end of file
+    assert retrieved_text.response == "Here is a joke."
+
+def test_init_db_adds_indexes_to_existing_tables(db):
+    """Ensure databases created before an index was declared get it on the next start."""
+    db.execute(text("DROP INDEX ix_generated_texts_user_id_timestamp_id"))
+    db.execute(text("DROP INDEX uq_users_username"))
+    db.commit()
+
+    init_db()
+
+    assert "ix_generated_texts_user_id_timestamp_id" in {index["name"] for index in inspect(engine).get_indexes("generated_texts")}
+    assert "uq_users_username" in {index["name"] for index in inspect(engine).get_indexes("users")}
@@ -0,0 +1,51 @@
+from app.services.openai_service import OpenAIService
+from app.services.openai_client import OpenAIClientRegistry
+
+
+def test_client_is_reused(fake_openai):
+    """Ensure the registry hands out the same pooled client."""
+    assert OpenAIClientRegistry.get_client() is OpenAIClientRegistry.get_client()
+
+
+def test_generate_text_reuses_connection(fake_openai):
+    """Ensure consecutive generations share one keep-alive connection."""
+    first = OpenAIService.generate_text("Tell me a joke.")
+    second = OpenAIService.generate_text("Tell me another joke.")
+
+    assert first == "Echo: Tell me a joke."
+    assert second == "Echo: Tell me another joke."
+
+    assert fake_openai.request_count == 2
+    assert fake_openai.connection_count == 1
+
+
+def test_registry_resets_after_fork(fake_openai, monkeypatch):
+    """Ensure a child process never reuses the parent's client."""
+    parent_client = OpenAIClientRegistry.get_client()
+    monkeypatch.setattr(OpenAIClientRegistry, "_pid", -1)
+
+    assert OpenAIClientRegistry.get_client() is not parent_client
+
+
+def test_stream_text_yields_deltas(fake_openai):
+    """Ensure streamed completions arrive as several deltas."""
+    deltas = list(OpenAIService.stream_text("Tell me a joke."))
+
+    assert len(deltas) > 1
+    assert "".join(deltas) == "Echo: Tell me a joke."
+
+
+def test_fork_hook_does_not_wait_on_inherited_lock(fake_openai):
+    """Ensure the child-side fork hook never blocks on a lock held at fork time."""
+    parent_client = OpenAIClientRegistry.get_client()
+    inherited_lock = OpenAIClientRegistry._lock
+    inherited_lock.acquire()
+
+    try:
+        OpenAIClientRegistry._reset_after_fork()
+
+    finally:
+        inherited_lock.release()
+
+    assert OpenAIClientRegistry._lock is not inherited_lock
+    assert OpenAIClientRegistry.get_client() is not parent_client
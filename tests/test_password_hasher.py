@@ -0,0 +1,96 @@
+import pytest
+import threading
+from app import app
+from app.models.user import User
+from app.services.password_hasher import PasswordHasher, password_hasher, expand_method
+from app.utils.errors import ServiceUnavailableError
+
+
+@pytest.fixture
+def client():
+    """Create a test client."""
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        yield client
+
+
+def test_full_queue_is_shed_immediately():
+    """Ensure callers beyond the pending limit get a 503-style error instead of queueing."""
+    hasher = PasswordHasher(method="pbkdf2:sha256:1", workers=1, max_pending=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking_hash(password, method):
+        started.set()
+        release.wait(5)
+        return "hash"
+
+    blocked = threading.Thread(target=hasher._run, args=(blocking_hash, "password", "method"))
+    blocked.start()
+    started.wait(5)
+
+    try:
+        with pytest.raises(ServiceUnavailableError):
+            hasher.hash("password")
+
+    finally:
+        release.set()
+        blocked.join()
+
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.check(hasher.hash("password"), "password")
+
+
+def test_login_rehashes_outdated_hash(client, db, monkeypatch):
+    """Ensure a login upgrades a hash made with old parameters."""
+    monkeypatch.setattr(password_hasher, "method", "pbkdf2:sha256:1")
+    client.post("/api/auth/register", json={"username": "hashuser", "password": "securepassword"})
+
+    monkeypatch.setattr(password_hasher, "method", "pbkdf2:sha256:2")
+    response = client.post("/api/auth/login", json={"username": "hashuser", "password": "securepassword"})
+
+    db.expire_all()
+    stored_hash = db.query(User).filter_by(username="hashuser").one().password_hash
+
+    assert response.status_code == 200
+    assert "hash;dur=" in response.headers["Server-Timing"]
+    assert stored_hash.startswith("pbkdf2:sha256:2$")
+    assert client.post("/api/auth/login", json={"username": "hashuser", "password": "securepassword"}).status_code == 200
+
+
+def test_login_succeeds_when_the_rehash_is_shed(client, monkeypatch):
+    """Ensure a verified login is not failed by an upgrade the full pool cannot take."""
+    monkeypatch.setattr(password_hasher, "method", "pbkdf2:sha256:1")
+    client.post("/api/auth/register", json={"username": "hashuser", "password": "securepassword"})
+
+    def shed(password):
+        raise ServiceUnavailableError("Too many authentication requests in progress.")
+
+    monkeypatch.setattr(password_hasher, "method", "pbkdf2:sha256:2")
+    monkeypatch.setattr(password_hasher, "hash", shed)
+
+    assert client.post("/api/auth/login", json={"username": "hashuser", "password": "securepassword"}).status_code == 200
+
+
+def test_login_sheds_load_with_503(client, monkeypatch):
+    """Ensure an overloaded hashing pool turns into 503 with Retry-After."""
+    client.post("/api/auth/register", json={"username": "hashuser", "password": "securepassword"})
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+    response = client.post("/api/auth/login", json={"username": "hashuser", "password": "securepassword"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+@pytest.mark.parametrize("method", ["scrypt", "scrypt:16384:8:1", "pbkdf2", "pbkdf2:sha512", "pbkdf2:sha256:1"])
+def test_needs_rehash_matches_werkzeug_without_hashing(method):
+    """Ensure the expected prefix is derived from the method alone, so the check never uses the pool."""
+    hasher = PasswordHasher(method=method, workers=1, max_pending=0)
+    stored_hash = PasswordHasher(method=method, workers=1, max_pending=1).hash("password")
+
+    assert expand_method(method) == stored_hash.split("$", 1)[0]
+    assert not hasher.needs_rehash(stored_hash)
+    assert hasher.needs_rehash("pbkdf2:sha256:2$salt$hash")
+    assert hasher.stats()["operations"] == 0
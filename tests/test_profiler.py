@@ -0,0 +1,103 @@
+import pytest
+from app import app
+from app.utils.profiler import profiler, phase, Profile, PROFILE_HEADER, PROFILE_ID_HEADER
+
+ADMIN_TOKEN = "admin-secret"
+
+
+@pytest.fixture
+def client():
+    """Create a test client."""
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def enabled_profiler(monkeypatch):
+    """Turn the profiler on with an admin token and a fast sampling interval."""
+    monkeypatch.setattr(profiler, "enabled", True)
+    monkeypatch.setattr(profiler, "admin_token", ADMIN_TOKEN)
+    monkeypatch.setattr(profiler, "interval", 0.001)
+    monkeypatch.setattr(profiler, "sample_rate", 0.0)
+
+    yield profiler
+
+    profiler.clear()
+
+
+def test_admin_header_profiles_request_with_phases(client, auth_user, fake_openai, enabled_profiler):
+    """Ensure an admin-marked generation is profiled with stacks and every phase."""
+    _, headers = auth_user
+    fake_openai.latency = 0.05
+
+    response = client.post("/api/generate-text/", json={"prompt": "Tell me a joke."}, headers={**headers, PROFILE_HEADER: ADMIN_TOKEN})
+
+    assert response.status_code == 201
+    profile_id = response.headers[PROFILE_ID_HEADER]
+
+    summary = client.get(f"/api/admin/profiles/{profile_id}", headers={PROFILE_HEADER: ADMIN_TOKEN}).json["data"]
+
+    assert summary["endpoint"] == "text.generate_text"
+    assert summary["reason"] == "admin"
+    assert summary["samples"] > 0
+    assert {"auth", "validate", "upstream", "db", "serialize", "other"} <= set(summary["phases_ms"])
+    assert summary["phases_ms"]["upstream"] >= 50
+
+    collapsed = client.get(f"/api/admin/profiles/{profile_id}/collapsed", headers={PROFILE_HEADER: ADMIN_TOKEN})
+
+    assert collapsed.content_type.startswith("text/plain")
+    stack, count = collapsed.get_data(as_text=True).splitlines()[0].rsplit(" ", 1)
+    assert ";" in stack and int(count) > 0
+
+
+def test_unmarked_requests_are_not_profiled(client, auth_user, enabled_profiler):
+    """Ensure requests without the admin header are skipped at a zero sample rate."""
+    _, headers = auth_user
+
+    response = client.get("/api/generate-text/", headers={**headers, PROFILE_HEADER: "wrong"})
+
+    assert PROFILE_ID_HEADER not in response.headers
+    assert profiler.profiles() == []
+
+
+def test_sample_rate_selects_requests(client, enabled_profiler, monkeypatch):
+    """Ensure a sample rate of one profiles every request."""
+    monkeypatch.setattr(profiler, "sample_rate", 1.0)
+
+    response = client.get("/api")
+
+    assert profiler.get(response.headers[PROFILE_ID_HEADER]).reason == "sampled"
+
+
+def test_admin_endpoints_require_token(client, enabled_profiler):
+    """Ensure profiles are only readable with the admin token."""
+    assert client.get("/api/admin/profiles").status_code == 403
+    assert client.get("/api/admin/profiles", headers={PROFILE_HEADER: "wrong"}).status_code == 403
+    assert client.get("/api/admin/profiles/missing", headers={PROFILE_HEADER: ADMIN_TOKEN}).status_code == 404
+
+
+def test_profiles_are_bounded(enabled_profiler, monkeypatch):
+    """Ensure the oldest profiles are dropped beyond max_profiles."""
+    monkeypatch.setattr(profiler, "max_profiles", 2)
+
+    for _ in range(3):
+        profile = Profile("home", "GET", "/api", "sampled")
+        token = profiler.start(profile)
+
+        with phase("serialize"):
+            pass
+
+        profiler.stop(profile, token, 200)
+
+    assert len(profiler.profiles()) == 2
+    assert "serialize" in profiler.profiles()[0].summary()["phases_ms"]
+
+
+def test_phase_is_free_outside_profiles():
+    """Ensure phases outside a profiled request record nothing."""
+    with phase("db") as timed:
+        pass
+
+    assert not hasattr(timed, "profile")
@@ -0,0 +1,203 @@
+import time
+import pytest
+from app import app
+from unittest.mock import patch
+from app.utils import rate_limit
+from app.models.generated_text import GeneratedText
+from app.services.rate_limiter import RateLimiter, MemoryRateLimitBackend, RedisRateLimitBackend
+
+
+@pytest.fixture
+def client():
+    """Create a test client."""
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    """Install a limiter with small budgets in place of the configured one."""
+
+    def install(**limits):
+        installed = RateLimiter(MemoryRateLimitBackend(), **limits)
+        monkeypatch.setattr(rate_limit, "rate_limiter", installed)
+        return installed
+
+    return install
+
+
+def test_bucket_admits_burst_then_refills():
+    """Ensure a full bucket admits its burst, rejects the next call with a wait, and refills over time."""
+    limiter = RateLimiter(MemoryRateLimitBackend(), requests_per_second=20, burst=3)
+
+    assert [limiter.acquire(1) for _ in range(3)] == [0, 0, 0]
+
+    retry_after = limiter.acquire(1)
+    assert 0 < retry_after <= 0.05
+
+    # Other users have their own buckets
+    assert limiter.acquire(2) == 0
+
+    time.sleep(retry_after + 0.01)
+    assert limiter.acquire(1) == 0
+
+    assert limiter.stats()["admitted"] == 5
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_rejection_takes_nothing_from_any_bucket():
+    """Ensure a request refused by the token bucket does not spend the request bucket."""
+    limiter = RateLimiter(MemoryRateLimitBackend(), requests_per_second=0.001, burst=2, tokens_per_minute=600)
+
+    assert limiter.acquire(1, tokens=500) == 0
+
+    # Needs 500 tokens with 100 left at 10 tokens/s
+    assert limiter.acquire(1, tokens=500) == pytest.approx(40, abs=0.1)
+
+    # The request bucket still has its second token
+    assert limiter.acquire(1, tokens=50) == 0
+
+
+def test_oversized_request_is_capped_at_bucket_capacity():
+    """Ensure a request estimated above the per-minute budget is admitted when the bucket is full."""
+    limiter = RateLimiter(MemoryRateLimitBackend(), tokens_per_minute=1000)
+
+    assert limiter.acquire(1, tokens=5000) == 0
+    assert limiter.acquire(1, tokens=1) > 0
+
+
+def test_in_flight_cap():
+    """Ensure a user holds at most max_in_flight slots and leaving frees one."""
+    limiter = RateLimiter(MemoryRateLimitBackend(), max_in_flight=2)
+
+    assert limiter.enter(1) and limiter.enter(1)
+    assert not limiter.enter(1)
+    assert limiter.enter(2)
+
+    limiter.leave(1)
+
+    assert limiter.enter(1)
+    assert limiter.stats()["in_flight"] == 3
+
+
+def test_memory_backend_forgets_least_recently_used_buckets():
+    """Ensure the bucket table stays bounded."""
+    backend = MemoryRateLimitBackend(max_keys=2)
+    buckets = [("requests", 1, 1)]
+
+    for user in ("a", "b", "c"):
+        backend.acquire(user, buckets, [1])
+
+    assert backend.stats()["buckets"] == 2
+
+    # "a" was forgotten and starts with a full bucket again; "c" is still empty
+    assert backend.acquire("a", buckets, [1]) == 0
+    assert backend.acquire("c", buckets, [1]) > 0
+
+
+def test_redis_backend_requires_redis_package():
+    """Ensure a clear configuration error when redis is not installed."""
+    try:
+        import redis
+
+    except ImportError:
+        with pytest.raises(EnvironmentError):
+            RedisRateLimitBackend("redis://localhost:6379/0", slot_ttl=60)
+
+    else:
+        pytest.skip("redis is installed")
+
+
+def test_generate_returns_429_with_retry_after(client, auth_user, limiter, db):
+    """Ensure a user over the request rate gets 429 with Retry-After and nothing is generated."""
+    user_id, headers = auth_user
+    limiter(requests_per_second=0.5, burst=1)
+
+    with patch("app.services.openai_service.OpenAIService.generate_text", return_value="A response.") as generate:
+        first = client.post("/api/generate-text/", json={"prompt": "Tell me a joke."}, headers=headers)
+        second = client.post("/api/generate-text/", json={"prompt": "Tell me another joke."}, headers=headers)
+
+    assert first.status_code == 201
+    assert second.status_code == 429
+    assert second.headers["Retry-After"] == "2"
+    assert second.get_json()["success"] is False
+
+    assert generate.call_count == 1
+    assert db.query(GeneratedText).filter_by(user_id=user_id).count() == 1
+
+
+def test_batch_counts_every_prompt(client, auth_user, limiter):
+    """Ensure a batch is charged one request per prompt."""
+    _, headers = auth_user
+    limiter(requests_per_second=0.1, burst=3)
+
+    with patch("app.services.openai_service.OpenAIService.generate_text", return_value="A response."):
+        batch = client.post("/api/generate-text/batch", json=[{"prompt": "Tell me a joke."}, {"prompt": "Tell me a story."}, {"prompt": "Tell me a fact."}], headers=headers)
+        single = client.post("/api/generate-text/", json={"prompt": "Tell me a riddle."}, headers=headers)
+
+    assert batch.status_code == 201
+    assert single.status_code == 429
+
+
+def test_import_counts_as_one_request(client, auth_user, limiter):
+    """Ensure an import is charged one request and no tokens, without reading its body up front."""
+    _, headers = auth_user
+    limiter(requests_per_second=0.1, burst=1, tokens_per_minute=1)
+    body = '{"prompt": "Tell me a joke.", "response": "A response."}\n'
+
+    first = client.post("/api/generate-text/import", data=body, headers=headers)
+    second = client.post("/api/generate-text/import", data=body, headers=headers)
+
+    assert first.status_code == 201
+    assert second.status_code == 429
+
+
+def test_stream_holds_in_flight_slot_until_closed(auth_user, limiter):
+    """Ensure a streamed generation keeps its slot until the client is done with the stream."""
+    _, headers = auth_user
+    installed = limiter(max_in_flight=1)
+    client = app.test_client()
+
+    with patch("app.services.openai_service.OpenAIService.stream_text", return_value=iter(["Hello", " world"])):
+        stream = client.post("/api/generate-text/stream", json={"prompt": "Say hello."}, headers=headers, buffered=False)
+
+        assert stream.status_code == 200
+        assert installed.stats()["in_flight"] == 1
+
+        blocked = client.post("/api/generate-text/", json={"prompt": "Tell me a joke."}, headers=headers)
+        assert blocked.status_code == 429
+        assert blocked.headers["Retry-After"] == "1"
+
+        stream.get_data()
+        stream.close()
+
+    assert installed.stats()["in_flight"] == 0
+
+
+def test_slot_released_when_generation_fails(client, auth_user, limiter):
+    """Ensure an upstream failure does not leak the user's in-flight slot."""
+    _, headers = auth_user
+    installed = limiter(max_in_flight=1)
+
+    with patch("app.services.openai_service.OpenAIService.generate_text", side_effect=RuntimeError("upstream down")):
+        response = client.post("/api/generate-text/", json={"prompt": "Tell me a joke."}, headers=headers)
+
+    assert response.status_code == 503
+    assert installed.stats()["in_flight"] == 0
+
+
+def test_concurrency_rejection_keeps_rate_budget(limiter):
+    """Ensure a request turned away for concurrency spends nothing, and one turned away for rate holds no slot."""
+    installed = limiter(requests_per_second=1, burst=1, max_in_flight=1)
+
+    assert installed.enter(1)
+    assert rate_limit._admit(1, 1, 0, concurrency=True) == 1
+
+    installed.leave(1)
+    assert rate_limit._admit(1, 1, 0, concurrency=True) is None
+    installed.leave(1)
+
+    assert rate_limit._admit(1, 1, 0, concurrency=True) > 0
+    assert installed.enter(1)
@@ -0,0 +1,80 @@
+import time
+import pytest
+from app import app
+from app.services.response_cache import MemoryCacheBackend, ResponseCache
+
+
+@pytest.fixture
+def client():
+    """Create a test client."""
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        yield client
+
+
+def test_prompt_normalization_shares_key():
+    """Ensure whitespace-only differences map to the same cache key."""
+    params = {"model": "gpt-4o"}
+
+    assert ResponseCache.make_key("Tell me  a joke. ", params) == ResponseCache.make_key("Tell me a joke.", params)
+    assert ResponseCache.make_key("Tell me a joke.", params) != ResponseCache.make_key("Tell me a joke.", {"model": "gpt-4o-mini"})
+
+
+def test_memory_backend_evicts_least_recently_used():
+    """Ensure the size cap evicts the least recently used entry."""
+    backend = MemoryCacheBackend(max_bytes=25, ttl=60)
+
+    backend.set("a", "x" * 9)
+    backend.set("b", "x" * 9)
+    backend.get("a")
+    backend.set("c", "x" * 9)
+
+    assert backend.get("b") is None
+    assert backend.get("a") == "x" * 9
+    assert backend.stats()["evictions"] == 1
+    assert backend.stats()["size_bytes"] <= 25
+
+
+def test_memory_backend_expires_entries():
+    """Ensure entries are dropped once their TTL has passed."""
+    backend = MemoryCacheBackend(max_bytes=1024, ttl=0.01)
+    backend.set("a", "value")
+
+    time.sleep(0.02)
+
+    assert backend.get("a") is None
+    assert backend.stats()["misses"] == 1
+
+
+def test_generate_text_serves_cached_response(client, auth_user, fake_openai):
+    """Ensure a repeated prompt is served from the cache and flagged."""
+    _, headers = auth_user
+
+    first = client.post("/api/generate-text/", json={"prompt": "Tell me a joke."}, headers=headers)
+    second = client.post("/api/generate-text/", json={"prompt": " Tell me  a joke."}, headers=headers)
+
+    assert first.status_code == 201 and second.status_code == 201
+    assert first.json["data"]["cached"] is False
+    assert second.json["data"]["cached"] is True
+
+    assert second.json["data"]["response"] == first.json["data"]["response"]
+    assert second.json["data"]["id"] != first.json["data"]["id"]
+    assert fake_openai.request_count == 1
+
+    stats = client.get("/api/generate-text/cache/stats", headers=headers).json["data"]
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_clear_resets_counters():
+    """Ensure clearing the cache also resets its statistics."""
+    backend = MemoryCacheBackend(max_bytes=1024, ttl=60)
+    backend.set("a", "value")
+    backend.get("a")
+    backend.get("b")
+
+    backend.clear()
+
+    assert backend.stats()["hits"] == 0
+    assert backend.stats()["misses"] == 0
+    assert backend.stats()["entries"] == 0
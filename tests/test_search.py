@@ -0,0 +1,96 @@
+import pytest
+from app import app
+from app.models.user import User
+from sqlalchemy.dialects import postgresql
+from app.models.generated_text import GeneratedText
+from app.services.generated_text_service import GeneratedTextService
+
+
+@pytest.fixture
+def client():
+    """Create a test client."""
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def corpus(auth_user, db):
+    """Store a few texts for the authenticated user and some for another user."""
+    user_id, headers = auth_user
+    other = User(username="otheruser", password_hash="hashedpassword")
+    db.add(other)
+    db.commit()
+
+    db.add_all([
+        GeneratedText(user_id=user_id, prompt="Write about a lighthouse.", response="The keeper lit the lamp."),
+        GeneratedText(user_id=user_id, prompt="Write about the sea.", response="Waves broke far below the old lighthouse."),
+        GeneratedText(user_id=user_id, prompt="Write about cats.", response="Cats sleep in the sun."),
+        GeneratedText(user_id=user_id, prompt="Write a long story.", response="The keeper climbed the stairs. " * 200 + "The bell rang."),
+        GeneratedText(user_id=other.id, prompt="Another lighthouse story.", response="Nothing to see here."),
+    ])
+
+    # Unrelated texts, so matched terms are rare enough for bm25 to rank on
+    db.add_all([GeneratedText(user_id=other.id, prompt=f"Filler prompt {i}.", response="Nothing to see here.") for i in range(10)])
+    db.commit()
+
+    return headers
+
+
+def test_search_ranks_the_users_matches_with_snippets(client, corpus):
+    """Ensure results are the user's matches, best first, carrying snippets instead of full responses."""
+    response = client.get("/api/generate-text/search?q=lighthouse", headers=corpus)
+    items = response.json["data"]["items"]
+
+    assert response.status_code == 200
+    assert [item["prompt_snippet"] for item in items] == ["Write about a \ue000lighthouse\ue001.", "Write about the sea."]
+    assert "\ue000lighthouse\ue001" in items[1]["response_snippet"]
+    assert items[0]["score"] > items[1]["score"]
+    assert all("response" not in item for item in items)
+
+    # The long response is cut down to the snippet around the match
+    bell = client.get("/api/generate-text/search?q=bell", headers=corpus).json["data"]["items"]
+    assert len(bell) == 1 and len(bell[0]["response_snippet"]) < 200 and "\ue000bell\ue001" in bell[0]["response_snippet"]
+
+
+def test_index_follows_updates_and_deletes(client, corpus):
+    """Ensure the index is kept in sync by writes through the API."""
+    cats = client.get("/api/generate-text/search?q=cats", headers=corpus).json["data"]["items"][0]
+
+    client.put(f"/api/generate-text/{cats['id']}", json={"response": "Dogs bark at the mailman."}, headers=corpus)
+    assert client.get("/api/generate-text/search?q=dogs", headers=corpus).json["data"]["items"][0]["id"] == cats["id"]
+
+    client.delete(f"/api/generate-text/{cats['id']}", headers=corpus)
+    assert client.get("/api/generate-text/search?q=dogs", headers=corpus).json["data"]["items"] == []
+
+
+def test_snippets_are_plain_text_with_non_html_markers(client, corpus, auth_user, db):
+    """Ensure stored markup comes back as-is and only the private-use markers are added, never HTML tags."""
+    db.add(GeneratedText(user_id=auth_user[0], prompt="<img src=x onerror=alert(1)> harbour", response="<b>bold</b> harbour"))
+    db.commit()
+
+    item = client.get("/api/generate-text/search?q=harbour", headers=corpus).json["data"]["items"][0]
+
+    assert item["prompt_snippet"] == "<img src=x onerror=alert(1)> \ue000harbour\ue001"
+    assert item["response_snippet"] == "<b>bold</b> \ue000harbour\ue001"
+
+
+def test_query_syntax_is_not_interpreted(client, corpus, auth_user):
+    """Ensure quotes, operators and the owner token in the query are treated as plain text, and bad parameters are rejected."""
+    response = client.get('/api/generate-text/search?q=lighthouse" NEAR(', headers=corpus)
+
+    assert response.status_code == 200
+    assert client.get(f"/api/generate-text/search?q=u{auth_user[0]}", headers=corpus).json["data"]["items"] == []
+    assert client.get("/api/generate-text/search?q=*", headers=corpus).json["data"]["items"] == []
+    assert client.get("/api/generate-text/search", headers=corpus).status_code == 422
+    assert client.get("/api/generate-text/search?q=sea&limit=0", headers=corpus).status_code == 422
+
+
+def test_postgres_search_uses_the_tsvector_index():
+    """Ensure the Postgres query matches on the indexed column and ranks before building headlines."""
+    statement = GeneratedTextService._postgres_search_statement(1, "lighthouse keeper", 20)
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    assert "search_vector @@ websearch_to_tsquery" in sql
+    assert "ts_headline" not in sql.split("FROM (", 1)[1]
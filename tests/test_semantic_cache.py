@@ -0,0 +1,115 @@
+import pytest
+import numpy as np
+from app import app
+from app.config import Config
+from app.services.semantic_cache import semantic_cache, HashingVectorizer, LSHIndex
+
+
+@pytest.fixture
+def client():
+    """Create a test client."""
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def enabled_cache(monkeypatch):
+    """Turn the semantic cache on with a fresh in-memory index."""
+    vectorizer = HashingVectorizer(256)
+
+    monkeypatch.setattr(semantic_cache, "vectorizer", vectorizer)
+    monkeypatch.setattr(semantic_cache, "index", LSHIndex(vectorizer.dimensions, merge_size=4))
+    monkeypatch.setattr(semantic_cache, "threshold", Config.SEMANTIC_CACHE_THRESHOLD)
+    semantic_cache.clear()
+
+    yield semantic_cache
+
+    semantic_cache.clear()
+
+
+def random_units(count, dimensions, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((count, dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_vectorizer_scores_rewordings_above_distinct_prompts():
+    """Ensure filler, case and punctuation changes stay above the default threshold while a different subject falls below it."""
+    vectors = HashingVectorizer().transform([
+        "Write a short poem about the sea.",
+        "please write short poem about the sea",
+        "Write a short poem about the desert.",
+        ""
+    ])
+
+    assert vectors[0] @ vectors[1] >= Config.SEMANTIC_CACHE_THRESHOLD
+    assert vectors[0] @ vectors[2] < Config.SEMANTIC_CACHE_THRESHOLD
+    assert not vectors[3].any()
+
+
+def test_index_finds_neighbours_across_merges_and_respects_tags_and_discards():
+    """Ensure entries are found before and after merging, only under their own tag, and never after being discarded."""
+    vectors = random_units(10, 64)
+    index = LSHIndex(64, merge_size=4)
+
+    index.add(vectors[:6], np.arange(6), np.zeros(6, dtype=np.uint64))
+    index.add(vectors[6:], np.arange(6, 10), np.ones(4, dtype=np.uint64))
+
+    ids, sims = index.search(vectors, np.zeros(10, dtype=np.uint64))
+    assert list(ids[:6]) == list(range(6)) and np.allclose(sims[:6], 1.0, atol=1e-5)
+    assert all(sim < 0.99 for sim in sims[6:])
+
+    index.discard(2)
+    assert index.search(vectors[2:3], np.zeros(1, dtype=np.uint64))[0][0] != 2
+
+
+def test_saved_index_loads_memory_mapped(tmp_path):
+    """Ensure a saved index answers like the original, without its discarded entries."""
+    vectors = random_units(50, 64)
+    index = LSHIndex(64, merge_size=16)
+    index.add(vectors, np.arange(100, 150), np.zeros(50, dtype=np.uint64))
+    index.discard(100)
+
+    index.save(str(tmp_path / "index.bin"))
+    loaded = LSHIndex.load(str(tmp_path / "index.bin"))
+
+    assert len(loaded) == 49
+    assert list(loaded.search(vectors[1:], np.zeros(49, dtype=np.uint64))[0]) == list(range(101, 150))
+    assert loaded.search(vectors[:1], np.zeros(1, dtype=np.uint64))[0][0] != 100
+
+    with pytest.raises(ValueError):
+        (tmp_path / "bad.bin").write_bytes(b"not an index")
+        LSHIndex.load(str(tmp_path / "bad.bin"))
+
+
+def test_reworded_prompt_is_served_from_the_semantic_cache(client, auth_user, fake_openai, enabled_cache):
+    """Ensure a reworded prompt reuses the stored response, and an edited text is no longer served."""
+    _, headers = auth_user
+
+    first = client.post("/api/generate-text/", json={"prompt": "Write a short poem about the sea."}, headers=headers)
+    second = client.post("/api/generate-text/", json={"prompt": "please write short poem about the sea"}, headers=headers)
+
+    assert second.json["data"]["cached"] is True
+    assert second.json["data"]["response"] == first.json["data"]["response"]
+    assert fake_openai.request_count == 1
+    assert enabled_cache.stats()["hits"] == 1
+
+    client.put(f"/api/generate-text/{first.json['data']['id']}", json={"response": "Edited."}, headers=headers)
+    client.put(f"/api/generate-text/{second.json['data']['id']}", json={"response": "Edited."}, headers=headers)
+
+    third = client.post("/api/generate-text/", json={"prompt": "Write me a short poem about the sea!"}, headers=headers)
+    assert third.json["data"]["cached"] is False
+    assert fake_openai.request_count == 2
+
+
+def test_batch_looks_up_every_prompt_at_once(client, auth_user, fake_openai, enabled_cache):
+    """Ensure a batch only sends the prompts without a near-duplicate upstream."""
+    _, headers = auth_user
+    client.post("/api/generate-text/", json={"prompt": "Summarize the plot of Hamlet."}, headers=headers)
+
+    response = client.post("/api/generate-text/batch", json=[{"prompt": "summarize the plot of hamlet"}, {"prompt": "Summarize the plot of Macbeth."}], headers=headers)
+    results = response.json["data"]["results"]
+
+    assert [result["data"]["cached"] for result in results] == [True, False]
+    assert fake_openai.request_count == 2
@@ -0,0 +1,49 @@
+import os
+import runpy
+import pytest
+from app.config import Config
+from app.database import engine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_forked_worker_does_not_reuse_parent_connections(db):
+    """Ensure a forked worker starts with an empty connection pool and leaves the parent's intact."""
+    with engine.connect() as connection:
+        connection.exec_driver_sql("SELECT 1")
+
+    assert engine.pool.checkedin() >= 1
+
+    pid = os.fork()
+
+    if pid == 0:
+        os._exit(0 if engine.pool.checkedin() == 0 else 1)
+
+    _, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert engine.pool.checkedin() >= 1
+
+
+def test_gunicorn_settings_come_from_config(monkeypatch):
+    """Ensure the production server is tuned through Config."""
+    monkeypatch.setattr(Config, "APP_WORKERS", 3)
+    monkeypatch.setattr(Config, "APP_MAX_REQUESTS", 500)
+
+    settings = runpy.run_path(os.path.join(ROOT, "gunicorn.conf.py"))
+
+    assert settings["workers"] == 3
+    assert settings["max_requests"] == 500
+    assert settings["worker_class"] == "gthread"
+    assert settings["bind"] == f"{Config.APP_HOST}:{Config.APP_PORT}"
+
+
+def test_gunicorn_refuses_memory_jobs_with_several_workers(monkeypatch):
+    """Ensure in-process jobs are never used where a poll could land on another worker."""
+    monkeypatch.setattr(Config, "JOB_QUEUE_BACKEND", "memory")
+    settings = runpy.run_path(os.path.join(ROOT, "gunicorn.conf.py"))
+    server = type("Arbiter", (), {"cfg": type("Cfg", (), {"workers": 3})()})()
+
+    with pytest.raises(EnvironmentError):
+        settings["on_starting"](server)
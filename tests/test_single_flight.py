@@ -0,0 +1,125 @@
+import time
+import pytest
+import asyncio
+import threading
+from app import app
+from unittest.mock import patch
+from app.utils.single_flight import SingleFlight, AsyncSingleFlight
+from app.models.generated_text import GeneratedText
+from app.services.rate_limiter import rate_limiter
+from app.services.response_cache import response_cache
+
+
+def test_single_flight_shares_errors():
+    """Ensure followers receive the leader's exception."""
+    flight = SingleFlight()
+    started = threading.Event()
+    errors = []
+
+    def slow_failure():
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("upstream down")
+
+    def lead():
+        try:
+            flight.do("key", slow_failure)
+
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    started.wait()
+
+    # Joins the leader's call instead of starting a second one
+    with pytest.raises(RuntimeError):
+        flight.do("key", slow_failure)
+
+    leader.join()
+
+    assert len(errors) == 1
+    assert flight.in_flight() == 0
+
+
+def test_concurrent_identical_prompts_share_one_upstream_call(auth_user, db, monkeypatch):
+    """Ensure N simultaneous identical requests make exactly one upstream call but store N rows."""
+    user_id, headers = auth_user
+    concurrency = 8
+
+    # Disable the response cache so only request coalescing can deduplicate
+    monkeypatch.setattr(response_cache, "backend", None)
+    # One user sends more simultaneous requests than the per-user in-flight cap allows
+    monkeypatch.setattr(rate_limiter, "backend", None)
+
+    upstream_calls = []
+    barrier = threading.Barrier(concurrency)
+    statuses = []
+
+    def slow_generate(prompt):
+        upstream_calls.append(prompt)
+        time.sleep(0.3)
+        return "A shared response."
+
+    def send():
+        with app.test_client() as client:
+            barrier.wait()
+            response = client.post("/api/generate-text/", json={"prompt": "Tell me a joke."}, headers=headers)
+            statuses.append(response.status_code)
+
+    with patch("app.services.openai_service.OpenAIService.generate_text", side_effect=slow_generate):
+        threads = [threading.Thread(target=send) for _ in range(concurrency)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+    assert statuses == [201] * concurrency
+    assert len(upstream_calls) == 1
+    assert db.query(GeneratedText).filter_by(user_id=user_id).count() == concurrency
+
+
+def test_leader_rechecks_cache_before_upstream_call(monkeypatch):
+    """Ensure a request that missed the cache just before a leader finished does not call upstream again."""
+    from app.services.generation_service import GenerationService
+
+    lookups = iter([None, "A cached response."])
+
+    # First lookup misses; the re-check inside the flight finds the leader's result
+    monkeypatch.setattr(response_cache, "get", lambda prompt, params, record_miss=True: next(lookups))
+
+    with patch("app.services.openai_service.OpenAIService.generate_text") as generate:
+        response, cached = GenerationService.generate("Tell me a joke.")
+
+    generate.assert_not_called()
+    assert (response, cached) == ("A cached response.", True)
+
+
+def test_cancelled_async_leader_hands_the_call_to_a_follower():
+    """Ensure cancelling the leader does not cancel its followers; one of them runs the call instead."""
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def scenario():
+        leader = asyncio.create_task(flight.do("key", fn))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.create_task(flight.do("key", fn)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        results = await asyncio.gather(*followers)
+        return leader.cancelled(), results
+
+    cancelled, results = asyncio.run(scenario())
+
+    assert cancelled
+    assert sorted(results) == [("result", False), ("result", True)]
+    assert len(calls) == 2
+    assert flight.in_flight() == 0
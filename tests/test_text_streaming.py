@@ -0,0 +1,82 @@
+import json
+import pytest
+from app import app
+from app.config import Config
+from app.models.generated_text import GeneratedText
+from app.services.openai_client import OpenAIClientRegistry
+
+
+@pytest.fixture
+def client():
+    """Create a test client."""
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        yield client
+
+
+def parse_events(body):
+    """Split an SSE body into (event, data) pairs."""
+    events = []
+
+    for block in body.strip().split("\n\n"):
+        event, data = "message", None
+
+        for line in block.split("\n"):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+
+        events.append((event, data))
+
+    return events
+
+
+def test_stream_forwards_deltas_and_stores_once(client, auth_user, fake_openai, db):
+    """Ensure deltas are forwarded as SSE and the full response is stored once."""
+    user_id, headers = auth_user
+
+    response = client.post("/api/generate-text/stream", json={"prompt": "Tell me a joke."}, headers=headers)
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+
+    events = parse_events(response.get_data(as_text=True))
+    deltas = [data["delta"] for event, data in events if event == "message"]
+
+    assert len(deltas) > 1
+    assert "".join(deltas) == "Echo: Tell me a joke."
+
+    event, stored = events[-1]
+    assert event == "done"
+    assert stored["response"] == "Echo: Tell me a joke."
+
+    rows = db.query(GeneratedText).filter_by(user_id=user_id).all()
+    assert len(rows) == 1
+    assert rows[0].id == stored["id"]
+
+
+def test_stream_invalid_prompt(client, auth_user):
+    """Ensure invalid prompts are rejected before streaming starts."""
+    _, headers = auth_user
+
+    response = client.post("/api/generate-text/stream", json={"prompt": "Hi"}, headers=headers)
+
+    assert response.status_code == 422
+    assert "Invalid input." in response.json["error_message"]
+
+
+def test_stream_upstream_failure(client, auth_user, db, monkeypatch):
+    """Ensure upstream failures are reported as an error event and nothing is stored."""
+    user_id, headers = auth_user
+    monkeypatch.setattr(Config, "OPENAI_BASE_URL", "http://127.0.0.1:9/v1")  # Nothing listens here
+    OpenAIClientRegistry.reset()
+
+    response = client.post("/api/generate-text/stream", json={"prompt": "Tell me a joke."}, headers=headers)
+    events = parse_events(response.get_data(as_text=True))
+
+    assert events[-1][0] == "error"
+    assert db.query(GeneratedText).filter_by(user_id=user_id).count() == 0
+    OpenAIClientRegistry.reset()
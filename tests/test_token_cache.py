@@ -0,0 +1,68 @@
+import time
+import pytest
+from app import app, jwt
+from app.utils.errors import UnauthorizedError
+from app.utils.jwt_handler import JWTHandler
+from app.utils.token_cache import VerifiedTokenCache
+
+
+@pytest.fixture
+def client():
+    """Create a test client."""
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        yield client
+
+
+def test_jwt_required_reuses_verified_token(client, auth_user):
+    """Ensure repeat requests with one token are verified once."""
+    _, headers = auth_user
+    jwt.verified_tokens.clear()
+
+    for _ in range(3):
+        assert client.get("/api/generate-text/cache/stats", headers=headers).status_code == 200
+
+    assert jwt.verified_tokens.stats() == {"hits": 2, "misses": 1, "entries": 1}
+
+
+def test_tampered_token_is_not_served_from_cache(client, auth_user):
+    """Ensure the cache key covers the whole token, signature included."""
+    _, headers = auth_user
+    client.get("/api/generate-text/cache/stats", headers=headers)
+
+    token = headers["Authorization"]
+    # Flip a character well inside the signature (the last one may only carry padding bits)
+    tampered = token[:-5] + ("A" if token[-5] != "A" else "B") + token[-4:]
+
+    assert client.get("/api/generate-text/cache/stats", headers={"Authorization": tampered}).status_code == 422
+
+
+def test_entries_expire_with_the_token():
+    """Ensure a token is served from cache only until its exp claim."""
+    cache = VerifiedTokenCache(max_entries=10)
+
+    cache.set("expired", {"sub": "1", "exp": time.time() - 1})
+    cache.set("short-lived", {"sub": "1", "exp": time.time() + 0.05})
+    cache.set("no-exp", {"sub": "1"})
+
+    assert cache.get("expired") is None
+    assert cache.get("no-exp") is None
+    assert cache.get("short-lived") == {"sub": "1", "exp": pytest.approx(time.time() + 0.05, abs=0.05)}
+
+    time.sleep(0.06)
+
+    assert cache.get("short-lived") is None
+
+
+def test_jwt_handler_decodes_and_caches():
+    """Ensure JWTHandler verifies its own tokens and rejects forged ones."""
+    JWTHandler.verified_tokens.clear()
+    token = JWTHandler.generate_token(7)
+
+    assert JWTHandler.decode_jwt(token)["sub"] == "7"
+    assert JWTHandler.get_user_id(token) == 7
+    assert JWTHandler.verified_tokens.stats()["hits"] == 1
+
+    with pytest.raises(UnauthorizedError):
+        JWTHandler.decode_jwt(token + "x")
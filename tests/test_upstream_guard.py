@@ -0,0 +1,239 @@
+import time
+import pytest
+import asyncio
+import threading
+from app import app
+from app.services import openai_service
+from app.utils.errors import ServiceUnavailableError
+from app.services.openai_service import OpenAIService
+from app.services.openai_client import OpenAIClientRegistry
+from app.services.upstream_guard import UpstreamGuard, CircuitBreaker, AdaptiveConcurrencyLimiter, OPEN, CLOSED
+
+
+@pytest.fixture
+def client():
+    """Create a test client."""
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def guard(monkeypatch):
+    """Install a guard with test-sized settings that records its backoff delays instead of sleeping."""
+
+    def install(max_retries=3, backoff_base=0.1, backoff_max=5, limit=8, min_limit=1, max_limit=64, min_calls=100, open_seconds=30):
+        installed = UpstreamGuard(
+            AdaptiveConcurrencyLimiter(initial=limit, min_limit=min_limit, max_limit=max_limit, queue_timeout=1),
+            CircuitBreaker(failure_threshold=0.5, min_calls=min_calls, window_seconds=30, open_seconds=open_seconds),
+            max_retries=max_retries,
+            backoff_base=backoff_base,
+            backoff_max=backoff_max
+        )
+        installed.delays = []
+        installed.sleep = installed.delays.append
+
+        async def record(delay):
+            installed.delays.append(delay)
+
+        installed.async_sleep = record
+        monkeypatch.setattr(openai_service, "upstream_guard", installed)
+
+        return installed
+
+    return install
+
+
+def test_retries_429_after_retry_after(fake_openai, guard):
+    """Ensure rate-limited calls are retried after the upstream's Retry-After."""
+    installed = guard()
+    fake_openai.fail_next(429, times=2, retry_after=2)
+
+    assert OpenAIService.generate_text("Tell me a joke.") == "Echo: Tell me a joke."
+
+    assert fake_openai.request_count == 3
+    assert installed.delays == [2.0, 2.0]
+    assert installed.stats()["retries"] == 2
+
+
+def test_backoff_is_exponential_with_full_jitter(fake_openai, guard):
+    """Ensure retries without Retry-After wait a random time below a doubling cap."""
+    installed = guard(backoff_base=0.1)
+    fake_openai.fail_next(503, times=3)
+
+    OpenAIService.generate_text("Tell me a joke.")
+
+    assert len(installed.delays) == 3
+
+    for attempt, delay in enumerate(installed.delays):
+        assert 0 <= delay <= 0.1 * 2 ** attempt
+
+
+def test_gives_up_after_max_retries(fake_openai, guard):
+    """Ensure persistent overload surfaces as ServiceUnavailableError after the retry budget."""
+    installed = guard(max_retries=2)
+    fake_openai.fail_next(500, times=5)
+
+    with pytest.raises(ServiceUnavailableError):
+        OpenAIService.generate_text("Tell me a joke.")
+
+    assert fake_openai.request_count == 3
+    assert installed.stats()["failures"] == 1
+
+
+def test_long_retry_after_is_not_waited_out(fake_openai, guard):
+    """Ensure a Retry-After beyond the backoff cap fails the call instead of holding the request."""
+    installed = guard(backoff_max=5)
+    fake_openai.fail_next(429, retry_after=60)
+
+    with pytest.raises(ServiceUnavailableError):
+        OpenAIService.generate_text("Tell me a joke.")
+
+    assert fake_openai.request_count == 1
+    assert installed.delays == []
+
+
+def test_client_errors_are_not_retried_or_counted_as_overload(fake_openai, guard):
+    """Ensure a 400 is neither retried nor treated as an upstream failure."""
+    installed = guard()
+    fake_openai.fail_next(400)
+
+    with pytest.raises(ServiceUnavailableError):
+        OpenAIService.generate_text("Tell me a joke.")
+
+    assert fake_openai.request_count == 1
+    assert installed.stats()["breaker"]["window_failure_rate"] == 0
+    assert installed.stats()["concurrency"]["decreases"] == 0
+
+
+def test_breaker_opens_and_fails_fast(client, auth_user, fake_openai, guard):
+    """Ensure an open breaker answers 503 with Retry-After without contacting the upstream."""
+    _, headers = auth_user
+    installed = guard(max_retries=0, min_calls=4, open_seconds=30)
+    fake_openai.fail_next(500, times=4)
+
+    for _ in range(4):
+        with pytest.raises(ServiceUnavailableError):
+            OpenAIService.generate_text("Tell me a joke.")
+
+    assert installed.breaker.state == OPEN
+
+    response = client.post("/api/generate-text/", json={"prompt": "Tell me a joke."}, headers=headers)
+
+    assert response.status_code == 503
+    assert 1 <= int(response.headers["Retry-After"]) <= 30
+    assert fake_openai.request_count == 4
+
+
+def test_half_open_probe_closes_breaker(fake_openai, guard):
+    """Ensure the first successful probe after the open period closes the breaker."""
+    installed = guard(max_retries=0, min_calls=2, open_seconds=0.05)
+    fake_openai.fail_next(500, times=2)
+
+    for _ in range(2):
+        with pytest.raises(ServiceUnavailableError):
+            OpenAIService.generate_text("Tell me a joke.")
+
+    assert installed.breaker.state == OPEN
+    time.sleep(0.06)
+
+    assert OpenAIService.generate_text("Tell me a joke.") == "Echo: Tell me a joke."
+    assert installed.breaker.state == CLOSED
+
+
+def test_limiter_is_aimd():
+    """Ensure overload halves the limit and successes grow it by about one per window."""
+    limiter = AdaptiveConcurrencyLimiter(initial=8, min_limit=2, max_limit=16)
+
+    limiter.acquire()
+    limiter.release(overloaded=True)
+    assert limiter.stats()["limit"] == 4
+
+    for _ in range(4):
+        limiter.acquire()
+        limiter.release(overloaded=False)
+
+    assert limiter.limit == pytest.approx(5, abs=0.1)
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_limiter_sheds_when_no_slot_frees_up():
+    """Ensure callers over the limit give up after the queue timeout."""
+    limiter = AdaptiveConcurrencyLimiter(initial=1, min_limit=1, max_limit=1)
+
+    assert limiter.acquire()
+    assert not limiter.acquire(timeout=0.01)
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_limiter_bounds_concurrent_upstream_calls(fake_openai, guard):
+    """Ensure a slow upstream never sees more concurrent calls than the limit."""
+    guard(limit=2, min_limit=2, max_limit=2)
+    fake_openai.latency = 0.05
+    errors = []
+
+    def call():
+        try:
+            OpenAIService.generate_text("Tell me a joke.")
+
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    started = time.monotonic()
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    # Six calls, two at a time: at least three rounds of upstream latency
+    assert time.monotonic() - started >= 0.15
+    assert errors == []
+    assert fake_openai.request_count == 6
+
+
+def test_async_path_retries(fake_openai, guard):
+    """Ensure the async generation path shares the retry policy."""
+    installed = guard()
+    fake_openai.fail_next(429, retry_after=1)
+
+    assert asyncio.run(OpenAIService.generate_text_async("Tell me a joke.")) == "Echo: Tell me a joke."
+    assert installed.delays == [1.0]
+
+
+def test_upstream_stats_endpoint(client, auth_user, fake_openai):
+    """Ensure breaker state and the concurrency window are exposed."""
+    _, headers = auth_user
+
+    response = client.get("/api/generate-text/upstream/stats", headers=headers)
+
+    assert response.status_code == 200
+    data = response.get_json()["data"]
+
+    assert data["breaker"]["state"] == CLOSED
+    assert {"limit", "in_flight", "rejected"} <= set(data["concurrency"])
+
+
+def test_cancelled_async_call_releases_its_slot(fake_openai, guard):
+    """Ensure cancelling a call mid-request frees its limiter slot and leaves the limit and breaker alone."""
+    installed = guard(limit=4)
+    fake_openai.latency = 0.5
+
+    async def cancel_midway():
+        task = asyncio.create_task(installed.call_async(lambda: OpenAIClientRegistry.get_async_client().chat.completions.create(
+            model="gpt-4o", messages=[{"role": "user", "content": "Tell me a joke."}]
+        )))
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_midway())
+
+    assert installed.limiter.in_flight == 0
+    assert installed.limiter.limit == 4
+    assert installed.stats()["calls"] == 0
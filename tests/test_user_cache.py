@@ -0,0 +1,89 @@
+import time
+import pytest
+import threading
+from app import app
+from app.models.user import User
+from app.database import db_session
+from app.services.auth_service import AuthService
+from app.services.user_cache import UserLookupCache, user_cache
+from werkzeug.security import generate_password_hash
+from app.utils.errors import UnprocessableEntityError
+
+
+@pytest.fixture
+def client():
+    """Create a test client."""
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        yield client
+
+
+def test_warm_login_skips_user_query(client, sql_statements):
+    """Ensure a repeated login is served from the user cache."""
+    client.post("/api/auth/register", json={"username": "cacheduser", "password": "securepassword"})
+    user_cache.clear()
+
+    client.post("/api/auth/login", json={"username": "cacheduser", "password": "securepassword"})
+    cold_selects = len([statement for statement in sql_statements if statement.startswith("SELECT")])
+
+    response = client.post("/api/auth/login", json={"username": "cacheduser", "password": "securepassword"})
+    warm_selects = len([statement for statement in sql_statements if statement.startswith("SELECT")]) - cold_selects
+
+    assert response.status_code == 200
+    assert cold_selects == 1 and warm_selects == 0
+    assert user_cache.stats()["hits"] == 1
+
+
+def test_password_change_invalidates_cache(client, db):
+    """Ensure an ORM password change is visible to the next login."""
+    client.post("/api/auth/register", json={"username": "cacheduser", "password": "securepassword"})
+    client.post("/api/auth/login", json={"username": "cacheduser", "password": "securepassword"})
+
+    user = db.query(User).filter_by(username="cacheduser").one()
+    user.password_hash = generate_password_hash("changedpassword")
+    db.commit()
+
+    assert client.post("/api/auth/login", json={"username": "cacheduser", "password": "securepassword"}).status_code == 401
+    assert client.post("/api/auth/login", json={"username": "cacheduser", "password": "changedpassword"}).status_code == 200
+
+
+def test_entries_expire():
+    """Ensure cached users are dropped after the TTL."""
+    cache = UserLookupCache(ttl=0.01, max_entries=10)
+    cache.set("cacheduser", 1, "hash")
+
+    assert cache.get("cacheduser") == (1, "hash")
+
+    time.sleep(0.02)
+
+    assert cache.get("cacheduser") is None
+
+
+def test_concurrent_registrations_of_one_name():
+    """Ensure only one of several simultaneous registrations of a username succeeds."""
+    barrier = threading.Barrier(4)
+    outcomes = []
+
+    def register():
+        barrier.wait()
+
+        try:
+            AuthService.register_user("racinguser", "securepassword")
+            outcomes.append("registered")
+
+        except UnprocessableEntityError:
+            outcomes.append("taken")
+
+        finally:
+            db_session.remove()
+
+    threads = [threading.Thread(target=register) for _ in range(4)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert sorted(outcomes) == ["registered", "taken", "taken", "taken"]
@@ -0,0 +1,8 @@
+"""
+WSGI entry point for production servers.
+
+    gunicorn wsgi:app
+
+Database tables are created by the `on_starting` hook in gunicorn.conf.py.
+"""
+from app import app